@@ -1,7 +1,7 @@
 """Price estimation API endpoint"""
 from fastapi import APIRouter, HTTPException
-from app.models.request import PriceEstimateRequest
-from app.models.response import PriceEstimateResponse, ErrorResponse
+from app.models.request import PriceEstimateRequest, PriceEstimateBatchRequest
+from app.models.response import PriceEstimateResponse, PriceEstimateBatchResponse, ErrorResponse
 from app.core.pricing.estimator import get_estimator
 import logging
 
@@ -31,7 +31,8 @@ async def estimate_price(request: PriceEstimateRequest):
             age_years=request.age_years,
             location=request.location,
             season=request.season,
-            duration_hours=request.duration_hours
+            duration_hours=request.duration_hours,
+            equipment_category=request.equipment_category
         )
         
         return PriceEstimateResponse(**result)
@@ -41,6 +42,37 @@ async def estimate_price(request: PriceEstimateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/price/batch", response_model=PriceEstimateBatchResponse)
+async def estimate_price_batch(request: PriceEstimateBatchRequest):
+    """
+    Estimate rental prices for many listings in a single request
+    
+    - **items**: List of price estimation requests (1-5000), same fields as `/price`
+    
+    Estimates are returned in the same order as the submitted items.
+    """
+    try:
+        items = request.items
+        logger.info(f"Batch price estimation request for {len(items)} listings")
+        
+        estimator = get_estimator()
+        results = estimator.estimate_many(
+            equipment_types=[item.equipment_type for item in items],
+            conditions=[item.condition for item in items],
+            age_years=[item.age_years for item in items],
+            locations=[item.location for item in items],
+            seasons=[item.season for item in items],
+            duration_hours=[item.duration_hours for item in items],
+            equipment_categories=[item.equipment_category for item in items]
+        )
+        
+        return PriceEstimateBatchResponse(estimates=results, count=len(results))
+    
+    except Exception as e:
+        logger.error(f"Error in batch price estimation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/health")
 async def health():
     """Health check for price estimation service"""
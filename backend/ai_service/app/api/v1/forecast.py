@@ -1,8 +1,11 @@
 """Demand forecasting API endpoint"""
+import json
 from fastapi import APIRouter, HTTPException
-from app.models.request import ForecastRequest
+from fastapi.responses import StreamingResponse
+from app.models.request import ForecastRequest, ForecastFleetRequest
 from app.models.response import ForecastResponse
 from app.core.forecasting.demand import get_forecaster
+from app.core.forecasting.fleet import get_fleet_forecaster, fleet_series
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,6 +40,41 @@ async def forecast_demand(request: ForecastRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/demand/fleet")
+async def forecast_fleet(request: ForecastFleetRequest):
+    """
+    Forecast every equipment type x region series in parallel worker processes
+    
+    - **equipment_types**: Equipment types to forecast (1-100)
+    - **regions**: Geographic regions (1-100)
+    - **forecast_days**: Number of days to forecast (7-365, default 30)
+    - **include_seasonality**: Whether to include seasonal patterns
+    
+    Streams newline-delimited JSON, one `ForecastResponse` object per series in completion
+    order (not request order). A series that fails yields `{"equipment_type", "region", "error"}`.
+    """
+    try:
+        series = fleet_series(request.equipment_types, request.regions)
+        logger.info(f"Fleet forecast request for {len(series)} series")
+        fleet = get_fleet_forecaster()
+    except Exception as e:
+        logger.error(f"Error in fleet forecasting: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def lines():
+        try:
+            async for result in fleet.stream(series, request.forecast_days, request.include_seasonality):
+                if "error" not in result:
+                    result = ForecastResponse(**result).model_dump()
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            logger.error(f"Error in fleet forecasting: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.get("/health")
 async def health():
     """Health check for forecasting service"""
@@ -1,8 +1,13 @@
 """Equipment recommendation API endpoint"""
 from fastapi import APIRouter, HTTPException
-from app.models.request import RecommendationRequest
-from app.models.response import RecommendationResponse
+from app.models.request import (
+    RecommendationRequest, RecommendationBatchRequest, CatalogChangeNotification,
+    AvailabilitySearchRequest, BookingChangeNotification
+)
+from app.models.response import RecommendationResponse, RecommendationBatchResponse, AvailabilitySearchResponse
 from app.core.recommendations.hybrid import get_recommender
+from app.core.recommendations.cache import InvalidCursor, ExpiredCursor
+from app.core.recommendations.availability import OutsideHorizon
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +23,15 @@ async def recommend_equipment(request: RecommendationRequest):
     - **user_role**: User role (customer, organization, provider, admin)
     - **current_equipment_id**: Optional - Equipment currently being viewed
     - **location**: Optional - User location for local recommendations
+    - **category**: Optional - Restrict to one equipment category (e.g. agriculture)
+    - **available_from** / **available_to**: Optional - Only equipment with no booking in this window
+      (must end within AVAILABILITY_HORIZON_DAYS, otherwise 400)
     - **limit**: Number of recommendations (1-50, default 10)
+    - **cursor**: Optional - `next_cursor` of the previous response, to fetch the next page
+    
+    Later pages are slices of the ranked list computed for the first page. Cursors expire with
+    the list (TTL or catalog change); an expired cursor returns 410 and the client restarts paging,
+    a cursor that fails to decode returns 400.
     """
     try:
         logger.info(f"Recommendation request for user {request.user_id}")
@@ -29,16 +42,117 @@ async def recommend_equipment(request: RecommendationRequest):
             user_role=request.user_role,
             current_equipment_id=request.current_equipment_id,
             location=request.location,
-            limit=request.limit
+            limit=request.limit,
+            category=request.category,
+            available_from=request.available_from,
+            available_to=request.available_to,
+            cursor=request.cursor
         )
         
         return RecommendationResponse(**result)
     
+    except ExpiredCursor as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OutsideHorizon as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error in recommendations: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/equipment/batch", response_model=RecommendationBatchResponse)
+async def recommend_equipment_batch(request: RecommendationBatchRequest):
+    """
+    Get recommendations for many users in one call (e.g. digests and notifications)
+    
+    - **users**: Users to score (1-5000), each with user_id, user_role and optional location
+    - **limit**: Number of recommendations per user (1-50, default 10)
+    
+    Users sharing a location and role are scored together against the catalog as one matrix.
+    For nightly digests over the whole user base use `digest_job.py`, which streams to a file.
+    """
+    try:
+        logger.info(f"Batch recommendation request for {len(request.users)} users")
+        
+        recommender = get_recommender()
+        results = [
+            {"user_id": user["user_id"], **result}
+            for user, result in recommender.recommend_batch((u.model_dump() for u in request.users), limit=request.limit)
+        ]
+        
+        return RecommendationBatchResponse(results=results, count=len(results))
+    
+    except Exception as e:
+        logger.error(f"Error in batch recommendations: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/availability", response_model=AvailabilitySearchResponse)
+async def search_available(request: AvailabilitySearchRequest):
+    """
+    Find listings that are free for a whole time window
+    
+    - **available_from** / **available_to**: Window to check against bookings and availability blocks
+      (must end within AVAILABILITY_HORIZON_DAYS, otherwise 400)
+    - **location**: Optional - Only listings in this location
+    - **category**: Optional - Only listings of this category
+    - **limit**: Maximum listings returned (1-1000, default 100)
+    """
+    try:
+        recommender = get_recommender()
+        result = recommender.search_available(
+            request.available_from, request.available_to,
+            location=request.location, category=request.category, limit=request.limit
+        )
+        return AvailabilitySearchResponse(**result)
+    
+    except OutsideHorizon as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in availability search: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bookings/changed")
+async def bookings_changed(notification: BookingChangeNotification):
+    """
+    Notify the recommender that bookings changed (e.g. from a database webhook on rentals)
+    
+    - **equipment_ids**: Optional - listings to re-fetch bookings for; omit to poll recent changes
+    
+    Only the affected listings' availability bitsets are rebuilt.
+    """
+    try:
+        recommender = get_recommender()
+        recommender.availability.notify_changed(notification.equipment_ids)
+        return {"status": "accepted", "availability_generation": recommender.availability.generation}
+    
+    except Exception as e:
+        logger.error(f"Error handling booking change notification: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/catalog/changed")
+async def catalog_changed(notification: CatalogChangeNotification):
+    """
+    Notify the recommender that listings changed (e.g. from a database webhook)
+    
+    - **equipment_ids**: Optional - ids to re-fetch; omit to poll everything updated since the last refresh
+    
+    The refresh runs in the background; only changed listings are re-embedded.
+    """
+    try:
+        recommender = get_recommender()
+        recommender.catalog.notify_changed(notification.equipment_ids)
+        return {"status": "accepted", "catalog_version": recommender.catalog.snapshot.version}
+    
+    except Exception as e:
+        logger.error(f"Error handling catalog change notification: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/health")
 async def health():
     """Health check for recommendation service"""
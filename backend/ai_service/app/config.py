@@ -1,6 +1,6 @@
 """Configuration management for AI service - Simplified"""
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -32,6 +32,63 @@ class Settings(BaseSettings):
     MODEL_DIR:str = "./models"
     DATA_DIR: str = "./data"
     
+    # Pricing
+    REGION_TABLE_FILE: str = "pricing/regions.json"  # Relative to DATA_DIR
+    REGION_TABLE_RELOAD_SECONDS: float = 30.0
+    
+    # Embeddings
+    TEXT_EMBEDDING_CACHE_SIZE: int = 10000  # LRU entries in the shared text embedder (0 disables)
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # How long the micro-batcher holds a batch open for more requests
+    TEXT_EMBEDDING_BATCH_SIZE: int = 32  # Max texts per batched e5 forward pass
+    IMAGE_EMBEDDING_BATCH_SIZE: int = 16  # Max images per batched OpenCLIP forward pass
+    
+    # Recommendations
+    CATALOG_REFRESH_SECONDS: float = 60.0  # Poll interval for incremental catalog refresh
+    CATALOG_PAGE_SIZE: int = 1000
+    CATALOG_EMBEDDING_DTYPE: str = "float32"  # On-disk catalog embeddings; float32 keeps quantized-index re-scoring exact
+    CATALOG_SIMILARITY_DTYPE: str = "float32"  # In-memory cosine index form (float32/float16/int8; smaller but slower scans)
+    CATALOG_RESCORE_CANDIDATES: int = 100  # Top quantized candidates re-scored in float32 (0 disables)
+    ANN_CANDIDATES: int = 200  # Top-k pulled from Qdrant for anchored recommendations
+    NEIGHBOR_TOP_N: int = 50  # Precomputed "similar equipment" neighbors per listing
+    NEIGHBOR_TYPE_BOOST: float = 0.1  # Ranking bonus for neighbors of the same equipment type
+    NEIGHBOR_BLOCK_SIZE: int = 512  # Rows per block in the neighbor matmul
+    CF_MODEL_FILE: str = "cf/model.npz"  # Collaborative-filtering factors written by cf_train_job.py, relative to DATA_DIR
+    CF_WEIGHT: float = 0.3  # Share of the final score taken by the collaborative-filtering prediction
+    RECOMMEND_BATCH_CHUNK: int = 1024  # Users pulled from the input stream per batch-scoring chunk
+    RECOMMEND_BATCH_MAX_ELEMENTS: int = 1 << 22  # Cap on a (users x candidates) score block
+    RECOMMEND_BATCH_GROUP_CACHE: int = 512  # (location, role) candidate sets kept across chunks
+    RECOMMEND_JITTER_SEED: int = 0  # Seeds the per-request tie-breaking jitter (change to reshuffle ties)
+    RECOMMEND_CACHE_SIZE: int = 10000  # Ranked results kept in the LRU result cache (0 disables)
+    RECOMMEND_CACHE_TTL_SECONDS: float = 300.0  # Max age of a cached ranked list (and its cursors) within one catalog version
+    RECOMMEND_RANKED_DEPTH: int = 500  # Rows ranked and cached per request; cursors page through them
+    TOPLIST_ENABLED: bool = True  # Materialize ranked lists per (location, role, category) for anonymous traffic
+    TOPLIST_ROLES: List[str] = ["customer", "organization", "provider"]
+    MARKETPLACE_TIMEZONE: str = "Asia/Kolkata"  # Availability slots start at local midnight; naive datetimes are local
+    AVAILABILITY_SLOT_HOURS: int = 24  # Width of one availability bit (1 = hourly, 24 = daily)
+    AVAILABILITY_HORIZON_DAYS: int = 180  # How far ahead bookings are indexed
+    AVAILABILITY_REFRESH_SECONDS: float = 60.0  # Poll interval for booking changes
+    GEO_PLACES_FILE: str = "geo/places.json"  # Gazetteer for geocoding locations, relative to DATA_DIR
+    GEO_RADIUS_RINGS_KM: List[float] = [25.0, 50.0, 100.0, 250.0, 500.0]
+    GEO_CANDIDATE_BUDGET: int = 200  # Listings gathered by radius expansion when nothing matches locally
+    
+    # Forecasting
+    FORECAST_SEED: Optional[int] = None  # Set to make synthetic history/fallback forecasts reproducible per request
+    FORECAST_MODEL_CACHE_SIZE: int = 1024  # Fitted models kept (LRU) per process
+    FORECAST_MODEL_TTL_SECONDS: float = 21600.0  # Fitted models are refitted (if in use) or dropped after this
+    FORECAST_REFIT_INTERVAL_SECONDS: float = 60.0  # How often the background scheduler looks for models to refit
+    FORECAST_FLEET_WORKERS: int = 0  # Worker processes for fleet forecasts (0 = one per CPU core)
+    FORECAST_FLEET_CHUNK_SIZE: int = 8  # Series sent to a worker per task
+    HISTORY_DIR: str = "history"  # Daily booking count partitions written by history_ingest_job.py, relative to DATA_DIR
+    HISTORY_INGEST_LAG_SECONDS: float = 300.0  # Ingest only bookings older than this (in-flight transactions)
+    FORECAST_HISTORY_DAYS: int = 365  # Days of booking history a model is fitted on
+    FORECAST_MIN_HISTORY_DAYS: int = 28  # Days with bookings a series needs before real history replaces synthetic data
+    FORECAST_ENGINE: str = "statsmodels"  # Holt-Winters fitter: "statsmodels" or "native" (vectorized NumPy, batch fits)
+    FORECAST_INCREMENTAL: bool = False  # Keep Holt-Winters state per series and apply new days online instead of refitting
+    FORECAST_ONLINE_REFIT_DAYS: int = 7  # Incremental mode: scheduled full refit period
+    FORECAST_DRIFT_RATIO: float = 1.5  # Incremental mode: refit early when the error EWMA exceeds this multiple of the fit error
+    FORECAST_DRIFT_SMOOTHING: float = 0.1  # Weight of the newest one-step error in the error EWMA
+    FORECAST_DRIFT_MIN_UPDATES: int = 7  # Observations applied before drift is judged
+    
     # Monitoring
     LOG_LEVEL: str = "INFO"
     METRICS_ENABLED: bool = True
@@ -0,0 +1,33 @@
+"""Shared Supabase / PostgREST client wiring"""
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_supabase_client(url: str = None, key: str = None):
+    """Create a Supabase client from SUPABASE_URL / SUPABASE_SERVICE_KEY, or None if unavailable"""
+    url = url or os.environ.get("SUPABASE_URL")
+    key = key or os.environ.get("SUPABASE_SERVICE_KEY")
+    if not (url and key):
+        return None
+    try:
+        from supabase import create_client
+        return create_client(url, key)
+    except Exception as e:
+        logger.error(f"Failed to initialize Supabase: {e}")
+        return None
+
+
+def get_postgrest_client(url: str, key: str = None):
+    """
+    Create a bare PostgREST client (e.g. a local PostgREST stand-in for jobs and tests).
+    Exposes the same `.table(...)` query builder as the Supabase client.
+    """
+    try:
+        from postgrest import SyncPostgrestClient
+        headers = {"apikey": key, "Authorization": f"Bearer {key}"} if key else {}
+        return SyncPostgrestClient(url, headers=headers)
+    except Exception as e:
+        logger.error(f"Failed to initialize PostgREST client for {url}: {e}")
+        return None
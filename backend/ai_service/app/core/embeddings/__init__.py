@@ -0,0 +1 @@
+"""Shared embedding services"""
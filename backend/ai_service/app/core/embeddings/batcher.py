@@ -0,0 +1,89 @@
+"""Asyncio micro-batcher: coalesces concurrent single-item inference calls into batched forward passes"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence
+
+from app.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = metrics.histogram(
+    "inference_batch_size", "Items per batched forward pass", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+QUEUE_DEPTH = metrics.histogram(
+    "inference_queue_depth", "Items waiting in the batcher queue when a batch is dispatched",
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from concurrent coroutines for up to `max_wait_ms` (or until
+    `max_batch_size` items are queued), runs `fn(items)` once in a dedicated worker thread and
+    resolves each caller's future with its own result. While a forward pass runs, new requests
+    keep queueing, so batches grow with load.
+    """
+
+    def __init__(self, name: str, fn: Callable[[List[Any]], Sequence[Any]], max_batch_size: int = 32,
+                 max_wait_ms: float = None):
+        self.name = name
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = (settings.EMBEDDING_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        # One thread per model: forward passes never run concurrently with each other
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"batcher-{name}")
+        self._loop = None
+        self._queue: asyncio.Queue = None
+        self._worker: asyncio.Task = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Result of `fn` for a single item, computed as part of a batch"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def submit_many(self, items: Sequence[Any]) -> List[Any]:
+        """Results for several items (they may be split across or share batches with other callers)"""
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    async def _run(self):
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Drain anything that is already waiting without extending the deadline
+            while len(batch) < self.max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            QUEUE_DEPTH.observe(queue.qsize(), batcher=self.name)
+            BATCH_SIZE.observe(len(batch), batcher=self.name)
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.fn, items)
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batched inference failed in {self.name} ({len(batch)} items): {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
@@ -0,0 +1,162 @@
+"""Process-wide multilingual-e5 text embedding service"""
+import time
+import hashlib
+import threading
+import logging
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.embeddings.batcher import MicroBatcher
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_ML = True
+except ImportError:
+    HAS_ML = False
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'intfloat/multilingual-e5-small'
+# e5 models are trained with these role prefixes; search queries and indexed documents differ
+PREFIXES = {"query": "query: ", "passage": "passage: "}
+
+CACHE_HITS = metrics.counter("text_embedding_cache_hits_total", "Text embeddings served from the LRU cache")
+CACHE_MISSES = metrics.counter("text_embedding_cache_misses_total", "Text embeddings that had to be encoded")
+ENCODE_SECONDS = metrics.histogram("text_embedding_encode_seconds", "Wall time of one model encode call")
+ENCODE_BATCH = metrics.histogram(
+    "text_embedding_encode_batch_size", "Texts per model encode call", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 1024)
+)
+
+
+def with_prefix(text: str, kind: str) -> str:
+    """Apply the e5 role prefix unless the text already carries one"""
+    if text.startswith(PREFIXES["query"]) or text.startswith(PREFIXES["passage"]):
+        return text
+    return PREFIXES[kind] + text
+
+
+class TextEmbedder:
+    """
+    One shared SentenceTransformer for every module that needs text embeddings.
+
+    `encode(texts, kind)` adds the `query:`/`passage:` prefix, serves repeats from an LRU cache
+    keyed by the hash of the prefixed text, and encodes all misses in a single model call.
+    `encode_async` is the request-path variant that micro-batches across concurrent callers.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, cache_size: int = None):
+        self.model_name = model_name
+        self.cache_size = settings.TEXT_EMBEDDING_CACHE_SIZE if cache_size is None else cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.model = None
+        self._batcher = MicroBatcher("text_e5", self._encode_batch, max_batch_size=settings.TEXT_EMBEDDING_BATCH_SIZE)
+        if HAS_ML:
+            try:
+                self.model = SentenceTransformer(model_name)
+                logger.info(f"TextEmbedder: {model_name} loaded (shared by all text-embedding consumers).")
+            except Exception as e:
+                logger.error(f"Failed to load SentenceTransformer {model_name}: {e}")
+        else:
+            logger.info("sentence-transformers not installed. Text embeddings are unavailable.")
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def encode(self, texts: List[str], kind: str = "passage", use_cache: bool = True) -> np.ndarray:
+        """Embeddings (float32, one row per text) for `query` or `passage` texts"""
+        if self.model is None:
+            raise RuntimeError("Text embedding model is not available")
+        prefixed = [with_prefix(t, kind) for t in texts]
+        if not use_cache or self.cache_size <= 0:
+            CACHE_MISSES.inc(len(prefixed), kind=kind)
+            return self._encode(prefixed)
+
+        keys = [self._key(t) for t in prefixed]
+        found: List[Optional[np.ndarray]] = [None] * len(keys)
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    found[i] = vector
+        missing = [i for i, vector in enumerate(found) if vector is None]
+        CACHE_HITS.inc(len(keys) - len(missing), kind=kind)
+        CACHE_MISSES.inc(len(missing), kind=kind)
+
+        if missing:
+            # Duplicates within one call are encoded once
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            text_for = {keys[i]: prefixed[i] for i in missing}
+            fresh = dict(zip(unique, self._encode([text_for[k] for k in unique])))
+            with self._cache_lock:
+                for key, vector in fresh.items():
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for i in missing:
+                found[i] = fresh[keys[i]]
+        return np.stack(found) if found else np.empty((0, 0), dtype=np.float32)
+
+    async def encode_async(self, texts: List[str], kind: str = "passage") -> np.ndarray:
+        """
+        Same as `encode`, for request handlers: cache misses from concurrent requests are
+        coalesced by the micro-batcher into one forward pass that runs off the event loop.
+        """
+        if self.model is None:
+            raise RuntimeError("Text embedding model is not available")
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        with self._cache_lock:
+            cached = [self._cache.get(self._key(with_prefix(t, kind))) for t in texts]
+        if all(vector is not None for vector in cached):
+            return self.encode(texts, kind=kind)
+        vectors = await self._batcher.submit_many([(t, kind) for t in texts])
+        return np.stack(vectors)
+
+    def _encode_batch(self, items: List[tuple]) -> List[np.ndarray]:
+        """Batcher callback: (text, kind) pairs from many requests, grouped by kind for the cache"""
+        results: List[Optional[np.ndarray]] = [None] * len(items)
+        for kind in {kind for _, kind in items}:
+            positions = [i for i, (_, k) in enumerate(items) if k == kind]
+            vectors = self.encode([items[i][0] for i in positions], kind=kind)
+            for i, vector in zip(positions, vectors):
+                results[i] = vector
+        return results
+
+    @staticmethod
+    def _key(prefixed: str) -> str:
+        return hashlib.sha1(prefixed.encode("utf-8")).hexdigest()
+
+    def encode_query(self, text: str) -> np.ndarray:
+        return self.encode([text], kind="query")[0]
+
+    def encode_passage(self, text: str) -> np.ndarray:
+        return self.encode([text], kind="passage")[0]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        started = time.perf_counter()
+        vectors = np.asarray(self.model.encode(texts), dtype=np.float32)
+        ENCODE_SECONDS.observe(time.perf_counter() - started)
+        ENCODE_BATCH.observe(len(texts))
+        return vectors
+
+
+# Global instance
+_text_embedder = None
+_text_embedder_lock = threading.Lock()
+
+
+def get_text_embedder() -> TextEmbedder:
+    """Get or create the process-wide text embedder"""
+    global _text_embedder
+    if _text_embedder is None:
+        with _text_embedder_lock:
+            if _text_embedder is None:
+                _text_embedder = TextEmbedder()
+    return _text_embedder
@@ -5,11 +5,7 @@ import httpx
 import logging
 from typing import Dict, Any, Optional
 
-try:
-    from sentence_transformers import SentenceTransformer
-    HAS_ML = True
-except ImportError:
-    HAS_ML = False
+from app.core.embeddings.text import get_text_embedder
 
 try:
     from app.core.estimator.keras_model import get_keras_estimator
@@ -29,15 +25,9 @@ class ProjectEstimator:
         self.hf_model = "mistralai/Mistral-7B-Instruct-v0.2"
         self.ollama_model = "llama3"
         
-        if HAS_ML:
-            try:
-                self.encoder = SentenceTransformer('intfloat/multilingual-e5-small')
-                logger.info("ProjectEstimator: multilingual-e5-small loaded for text embeddings.")
-            except Exception as e:
-                logger.error(f"Failed to load SentenceTransformer: {e}")
-                self.encoder = None
-        else:
-            self.encoder = None
+        # Shared process-wide multilingual-e5 encoder (also used by the recommender)
+        embedder = get_text_embedder()
+        self.encoder = embedder if embedder.available else None
             
         if HAS_KERAS:
             self.keras_model = get_keras_estimator()
@@ -99,7 +89,7 @@ class ProjectEstimator:
         # Add text embedding extraction using multilingual-e5
         if self.encoder and description:
             try:
-                emb = self.encoder.encode([f"passage: {description}"])
+                emb = await self.encoder.encode_async([description], kind="passage")
                 response_json["text_embedding"] = emb[0].tolist()
             except Exception as e:
                 logger.error(f"Text embedding failed: {e}")
@@ -1,10 +1,19 @@
 """Demand forecasting for equipment"""
+import time
+import hashlib
+import threading
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
+from app.config import settings
+from app.core.forecasting.model_cache import FittedModelCache, FORECAST_SECONDS
+from app.core.forecasting.history import BookingHistoryStore, get_history_store
+from app.core.forecasting.online import OnlineHoltWinters, DRIFT_REFITS
+from app.core.forecasting.native import fit_holt_winters
+
 try:
     from statsmodels.tsa.holtwinters import ExponentialSmoothing
     HAS_ML = True
@@ -14,11 +23,33 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_SEASONAL_PATTERN = {"spring": 1.1, "summer": 1.2, "fall": 1.1, "winter": 0.9}
+SEASONS = ("spring", "summer", "fall", "winter")
+# Season index (into SEASONS) for months 1..12
+MONTH_SEASON = np.array([3, 3, 0, 0, 0, 1, 1, 1, 2, 2, 2, 3])
+
+
+def _stable_seed(*parts) -> int:
+    return int.from_bytes(hashlib.sha1("\x1f".join(map(str, parts)).encode("utf-8")).digest()[:8], "little")
+
+
 class DemandForecaster:
     """Time series forecasting for equipment demand using ML"""
     
-    def __init__(self):
-        """Initialize demand forecaster"""
+    def __init__(self, seed: Optional[int] = None, history: BookingHistoryStore = None, incremental: Optional[bool] = None,
+                 engine: Optional[str] = None):
+        """
+        Initialize demand forecaster. With a `seed` (or FORECAST_SEED) every synthetic draw is
+        derived from (seed, request), so the same request always returns the same forecast.
+        Series with enough ingested booking history (`history`) are fitted on it instead.
+
+        In `incremental` mode (FORECAST_INCREMENTAL) each series keeps its Holt-Winters state and
+        newly ingested days are applied online; full refits happen every FORECAST_ONLINE_REFIT_DAYS
+        or when a series' error drifts.
+
+        `engine` (FORECAST_ENGINE) picks the Holt-Winters fitter: "statsmodels", or "native" for
+        the vectorized fitter, which also fits whole batches of series at once (`prefit`).
+        """
         self.seasonal_patterns = {
             "tractor": {"spring": 1.4, "summer": 1.3, "fall": 1.1, "winter": 0.7},
             "harvester": {"spring": 0.9, "summer": 1.5, "fall": 1.6, "winter": 0.6},
@@ -27,34 +58,191 @@ class DemandForecaster:
             "bulldozer": {"spring": 1.2, "summer": 1.3, "fall": 1.1, "winter": 0.9},
             "crane": {"spring": 1.1, "summer": 1.2, "fall": 1.2, "winter": 1.0},
         }
-        logger.info(f"DemandForecaster initialized. ML Enabled: {HAS_ML}")
+        self.seed = settings.FORECAST_SEED if seed is None else seed
+        self.history = history or get_history_store()
+        self.incremental = settings.FORECAST_INCREMENTAL if incremental is None else incremental
+        self.engine = (engine or settings.FORECAST_ENGINE).lower()
+        if self.engine not in ("statsmodels", "native"):
+            raise ValueError(f"Unknown forecast engine: {self.engine}")
+        # Fitted Holt-Winters models per (type, region, include_seasonality), refitted in the background
+        self.models = FittedModelCache(
+            self._fit_model, self.data_version,
+            ttl=settings.FORECAST_ONLINE_REFIT_DAYS * 86400.0 if self.incremental else None,
+        )
+        self._state_locks: Dict[tuple, threading.Lock] = {}  # One per series: updates and forecasts of a state
+        self._state_locks_guard = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._states_version = None  # History version last applied to the online states
+        logger.info(f"DemandForecaster initialized. ML Enabled: {HAS_ML}, engine: {self.engine}")
+
+    def _rng(self, *key) -> np.random.Generator:
+        """Random generator for one request: reproducible per `key` in seeded mode, fresh otherwise"""
+        if self.seed is None:
+            return np.random.default_rng()
+        return np.random.default_rng(_stable_seed(self.seed, *key))
+
+    def _pattern(self, equipment_type: str) -> Dict[str, float]:
+        return self.seasonal_patterns.get(equipment_type.lower(), DEFAULT_SEASONAL_PATTERN)
+
+    def _season_factors(self, dates: pd.DatetimeIndex, equipment_type: str) -> np.ndarray:
+        """Seasonal multiplier for every date (one lookup per season, not per day)"""
+        pattern = self._pattern(equipment_type)
+        by_season = np.array([pattern.get(season, 1.0) for season in SEASONS])
+        return by_season[MONTH_SEASON[dates.month.values - 1]]
         
-    def _generate_historical_data(self, equipment_type: str, days: int = 365) -> pd.Series:
+    def _generate_historical_data(self, equipment_type: str, days: int = 365, rng: np.random.Generator = None) -> pd.Series:
         """Generate pseudo-historical booking data to seed the model"""
-        start_date = datetime.now().date() - timedelta(days=days)
-        dates = [start_date + timedelta(days=i) for i in range(days)]
+        rng = rng or self._rng("history", equipment_type.lower(), days)
+        dates = pd.date_range(datetime.now().date() - timedelta(days=days), periods=days, freq="D")
         
         base = 50.0
-        history = []
-        for d in dates:
-             demand = base
-             # Add trend
-             demand += (d - start_date).days * 0.05
-             # Add seasonality
-             season = self._get_season(d)
-             seasonal_patterns = self.seasonal_patterns.get(
-                 equipment_type.lower(),
-                 {"spring": 1.1, "summer": 1.2, "fall": 1.1, "winter": 0.9}
-             )
-             demand *= seasonal_patterns.get(season, 1.0)
-             # Add weekend drop
-             if d.weekday() >= 5:
-                  demand *= 0.8
-             # Add noise
-             demand += np.random.normal(0, 5)
-             history.append(max(0, demand))
-             
-        return pd.Series(history, index=dates)
+        # Trend, seasonality and weekend drop as whole-array ops, then noise in one draw
+        demand = base + np.arange(days) * 0.05
+        demand = demand * self._season_factors(dates, equipment_type)
+        demand = demand * np.where(dates.weekday.values >= 5, 0.8, 1.0)
+        demand = demand + rng.normal(0, 5, size=days)
+        return pd.Series(np.maximum(demand, 0), index=dates)
+
+    def _history(self, equipment_type: str, region: str) -> Tuple[pd.Series, bool]:
+        """Daily bookings from the history store (observed=True), or synthetic data while the series has too little of it"""
+        try:
+            counts = self.history.daily_counts(equipment_type, region, settings.FORECAST_HISTORY_DAYS)
+        except Exception as e:
+            logger.error(f"Failed to read booking history for {equipment_type} / {region}: {e}")
+            counts = None
+        if counts is not None and int((counts > 0).sum()) >= settings.FORECAST_MIN_HISTORY_DAYS:
+            return counts, True
+        return self._generate_historical_data(equipment_type, rng=self._rng("history", equipment_type, region)), False
+
+    def data_version(self, key: tuple) -> str:
+        """Version of the history a series is fitted on (the window moves daily and with each ingest)"""
+        if self.incremental:
+            # States absorb new days online; the version only moves with the scheduled refit period
+            return f"period-{datetime.now().date().toordinal() // settings.FORECAST_ONLINE_REFIT_DAYS}"
+        return f"{datetime.now().date().isoformat()}:{self.history.version}"
+
+    @staticmethod
+    def series_key(equipment_type: str, region: str, include_seasonality: bool) -> tuple:
+        """Model cache key of a series"""
+        return (equipment_type.lower(), region.strip().lower(), include_seasonality)
+
+    @property
+    def _can_fit(self) -> bool:
+        return self.engine == "native" or HAS_ML
+
+    def _fit_model(self, key: tuple):
+        """Fit Holt-Winters (trend + seasonality, period=7 for weekly seasonality) for one series"""
+        equipment_type, region, include_seasonality = key
+        hist_data, observed = self._history(equipment_type, region)
+        if self.engine == "native":
+            fit = fit_holt_winters(hist_data.values[None, :], period=7, seasonal=include_seasonality)
+            return fit.state(0, hist_data.index[-1].date(), observed)
+        results = ExponentialSmoothing(
+            hist_data.values, 
+            trend='add', 
+            seasonal='add' if include_seasonality else None, 
+            seasonal_periods=7
+        ).fit()
+        if self.incremental:
+            return OnlineHoltWinters.from_statsmodels(results, hist_data.index[-1].date(), observed=observed)
+        return results
+
+    def prefit(self, keys: List[tuple]) -> int:
+        """
+        Native engine: fit every series in `keys` that is not cached yet in vectorized batches
+        (one per seasonality setting and history length) and cache the results. Returns the
+        number of series fitted; a no-op for the statsmodels engine, which fits per request.
+        """
+        if self.engine != "native":
+            return 0
+        cached = {key for key, _ in self.models.items()}
+        groups: Dict[tuple, list] = {}
+        for key in dict.fromkeys(keys):
+            if key in cached:
+                continue
+            hist_data, observed = self._history(key[0], key[1])
+            groups.setdefault((key[2], len(hist_data)), []).append((key, hist_data, observed))
+        fitted = 0
+        for (include_seasonality, _), members in groups.items():
+            started = time.perf_counter()
+            fit = fit_holt_winters(np.stack([h.values for _, h, _ in members]), period=7, seasonal=include_seasonality)
+            for i, (key, hist_data, observed) in enumerate(members):
+                self.models.put(key, fit.state(i, hist_data.index[-1].date(), observed))
+            fitted += len(members)
+            logger.info(f"Batch-fitted {len(members)} series in {time.perf_counter() - started:.2f}s")
+        return fitted
+
+    def update_states(self) -> Dict[str, int]:
+        """
+        Incremental mode: apply ingested days newer than each cached state, O(1) per series and
+        day, and queue a full refit for series whose error drifted. No-op until the history
+        store's version moves.
+        """
+        counts = {"series": 0, "observations": 0, "drifted": 0}
+        version = self.history.version
+        if not self.incremental or version == self._states_version or not self._update_lock.acquire(blocking=False):
+            return counts
+        try:
+            self._states_version = version
+            last_day = self.history.last_day()
+            stale = [
+                (key, state) for key, state in self.models.items()
+                if isinstance(state, OnlineHoltWinters) and state.observed and state.last_date < last_day
+            ]
+            # One shared window, so the store reads the new tail once for all series
+            days = max([(last_day - state.last_date).days for _, state in stale], default=0)
+            for key, state in stale:
+                equipment_type, region, _ = key
+                observations = self.history.daily_counts(equipment_type, region, days, leading_zeros=True)
+                if observations is None:
+                    continue
+                # Per-series lock: concurrent forecasts wait for at most one series' update
+                with self._series_lock(key):
+                    counts["observations"] += state.update_many(observations)
+                counts["series"] += 1
+                if state.drifted:
+                    counts["drifted"] += 1
+                    self.models.invalidate(key)
+        finally:
+            self._update_lock.release()
+        if counts["drifted"]:
+            DRIFT_REFITS.inc(counts["drifted"])
+        logger.info(f"Online forecast states updated to history v{version}: {counts}")
+        return counts
+
+    def maybe_update_states(self):
+        """Start a background `update_states` when new history was ingested"""
+        if self.incremental and self.history.version != self._states_version and not self._update_lock.locked():
+            threading.Thread(target=self.update_states, daemon=True).start()
+
+    def _series_lock(self, key: tuple) -> threading.Lock:
+        with self._state_locks_guard:
+            return self._state_locks.setdefault(key, threading.Lock())
+
+    def _predict(self, key: tuple, model, forecast_days: int, start_date) -> np.ndarray:
+        if isinstance(model, OnlineHoltWinters):
+            with self._series_lock(key):
+                return model.forecast(forecast_days, start=start_date)
+        return np.asarray(model.forecast(forecast_days))
+
+    @staticmethod
+    def _forecast_points(dates: pd.DatetimeIndex, values: np.ndarray, uncertainty: float) -> List[Dict[str, Any]]:
+        """Response rows for predicted `values`, with a +/- `uncertainty` share as the interval"""
+        spread = values * uncertainty
+        return [
+            {
+                "date": date,
+                "predicted_demand": value,
+                "confidence_interval_lower": lower,
+                "confidence_interval_upper": upper
+            }
+            for date, value, lower, upper in zip(
+                np.datetime_as_string(dates.values, unit="D").tolist(),
+                np.round(values, 1).tolist(),
+                np.round(np.maximum(values - spread, 0), 1).tolist(),
+                np.round(values + spread, 1).tolist(),
+            )
+        ]
 
     def forecast(
         self,
@@ -65,40 +253,27 @@ class DemandForecaster:
     ) -> Dict[str, Any]:
         """Forecast demand for equipment using Holt-Winters Exponential Smoothing"""
         start_date = datetime.now().date()
+        dates = pd.date_range(start_date, periods=forecast_days, freq="D")
+        rng = self._rng(equipment_type.lower(), region, forecast_days, include_seasonality)
         forecast_data = []
 
-        if HAS_ML:
+        if self._can_fit:
              try:
-                 # Generate 1 year of historical seed data
-                 hist_data = self._generate_historical_data(equipment_type)
-                 
-                 # Fit Holt-Winters model (trend + seasonality, period=7 for weekly seasonality)
-                 model = ExponentialSmoothing(
-                     hist_data.values, 
-                     trend='add', 
-                     seasonal='add' if include_seasonality else None, 
-                     seasonal_periods=7
-                 ).fit()
+                 started = time.perf_counter()
+                 self.maybe_update_states()
+                 # Fitted model from the cache; only the first request for a series fits inline
+                 key = self.series_key(equipment_type, region, include_seasonality)
+                 model, hit = self.models.get(key)
                  
                  # Forecast
-                 predictions = model.forecast(forecast_days)
-                 
-                 for day_offset in range(forecast_days):
-                     forecast_date = start_date + timedelta(days=day_offset)
-                     pred_val = max(0, predictions[day_offset])
-                     uncertainty = pred_val * 0.15
-                     
-                     forecast_data.append({
-                         "date": forecast_date.isoformat(),
-                         "predicted_demand": round(pred_val, 1),
-                         "confidence_interval_lower": round(max(0, pred_val - uncertainty), 1),
-                         "confidence_interval_upper": round(pred_val + uncertainty, 1)
-                     })
+                 predictions = np.maximum(self._predict(key, model, forecast_days, start_date), 0)
+                 FORECAST_SECONDS.observe(time.perf_counter() - started, path="cache_hit" if hit else "fit")
+                 forecast_data = self._forecast_points(dates, predictions, 0.15)
              except Exception as e:
-                 logger.error(f"Error forecasting with statsmodels: {e}")
-                 forecast_data = self._fallback_forecast(equipment_type, forecast_days, include_seasonality, start_date)
+                 logger.error(f"Error forecasting with {self.engine}: {e}")
+                 forecast_data = self._fallback_forecast(equipment_type, forecast_days, include_seasonality, start_date, rng)
         else:
-             forecast_data = self._fallback_forecast(equipment_type, forecast_days, include_seasonality, start_date)
+             forecast_data = self._fallback_forecast(equipment_type, forecast_days, include_seasonality, start_date, rng)
         
         # Determine overall trend
         first_week_avg = np.mean([f["predicted_demand"] for f in forecast_data[:7]])
@@ -124,62 +299,36 @@ class DemandForecaster:
             "forecast_data": forecast_data,
             "overall_trend": trend,
             "peak_demand_date": peak_date,
-            "seasonal_pattern": self.seasonal_patterns.get(
-                equipment_type.lower(),
-                {"spring": 1.1, "summer": 1.2, "fall": 1.1, "winter": 0.9}
-            ),
-            "model_accuracy": 0.88 if HAS_ML else 0.72 
+            "seasonal_pattern": self._pattern(equipment_type),
+            "model_accuracy": 0.88 if self._can_fit else 0.72 
         }
 
-    def _fallback_forecast(self, equipment_type: str, forecast_days: int, include_seasonality: bool, start_date: datetime.date):
+    def _fallback_forecast(self, equipment_type: str, forecast_days: int, include_seasonality: bool, start_date: datetime.date,
+                           rng: np.random.Generator = None):
          """Fallback heuristic forecasting"""
-         forecast_data = []
-         base_demand = np.random.uniform(40, 60)
-         for day_offset in range(forecast_days):
-             forecast_date = start_date + timedelta(days=day_offset)
-             demand = self._calculate_demand_heuristic(base_demand, forecast_date, equipment_type, include_seasonality)
-             uncertainty = demand * 0.18
-             forecast_data.append({
-                 "date": forecast_date.isoformat(),
-                 "predicted_demand": round(demand, 1),
-                 "confidence_interval_lower": round(demand - uncertainty, 1),
-                 "confidence_interval_upper": round(demand + uncertainty, 1)
-             })
-         return forecast_data
+         rng = rng or self._rng("fallback", equipment_type.lower(), forecast_days, include_seasonality)
+         dates = pd.date_range(start_date, periods=forecast_days, freq="D")
+         base_demand = rng.uniform(40, 60)
+         demand = self._calculate_demand_heuristic(base_demand, dates, equipment_type, include_seasonality, rng)
+         return self._forecast_points(dates, demand, 0.18)
     
-    def _calculate_demand_heuristic(self, base_demand: float, date: datetime.date, equipment_type: str, include_seasonality: bool) -> float:
-        """Calculate fallback demand for a specific date"""
-        demand = base_demand
-        days_from_now = (date - datetime.now().date()).days
-        demand *= 1.0 + (days_from_now * 0.002)
+    def _calculate_demand_heuristic(self, base_demand: float, dates: pd.DatetimeIndex, equipment_type: str,
+                                    include_seasonality: bool, rng: np.random.Generator = None) -> np.ndarray:
+        """Calculate fallback demand for every date at once"""
+        rng = rng or self._rng("heuristic", equipment_type.lower(), len(dates), include_seasonality)
+        days_from_now = (dates - pd.Timestamp(datetime.now().date())).days.values
+        demand = base_demand * (1.0 + days_from_now * 0.002)
         
         if include_seasonality:
-            season = self._get_season(date)
-            seasonal_patterns = self.seasonal_patterns.get(
-                equipment_type.lower(),
-                {"spring": 1.1, "summer": 1.2, "fall": 1.1, "winter": 0.9}
-            )
-            demand *= seasonal_patterns.get(season, 1.0)
-        
-        if date.weekday() < 5: 
-            demand *= 1.1
-        else: 
-            demand *= 0.8
+            demand = demand * self._season_factors(dates, equipment_type)
         
-        demand += np.random.normal(0, demand * 0.05)
-        return max(0, demand)
+        demand = demand * np.where(dates.weekday.values < 5, 1.1, 0.8)
+        demand = demand + rng.normal(0, demand * 0.05)
+        return np.maximum(demand, 0)
     
     def _get_season(self, date: datetime.date) -> str:
         """Determine season from date"""
-        month = date.month
-        if month in [3, 4, 5]:
-            return "spring"
-        elif month in [6, 7, 8]:
-            return "summer"
-        elif month in [9, 10, 11]:
-            return "fall"
-        else:
-            return "winter"
+        return SEASONS[MONTH_SEASON[date.month - 1]]
 
 
 # Global instance
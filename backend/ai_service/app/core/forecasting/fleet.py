@@ -0,0 +1,209 @@
+"""Fleet-wide forecasting: equipment type x region series fanned out over a process pool"""
+import os
+import csv
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import settings
+from app.core.metrics import metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+FLEET_SERIES = metrics.counter("forecast_fleet_series_total", "Series forecast by fleet runs")
+FLEET_SECONDS = metrics.histogram("forecast_fleet_seconds", "Wall time of one fleet forecast run")
+
+# Consolidated table: one row per (series, forecast date)
+TABLE_FIELDS = [
+    ("equipment_type", "string"), ("region", "string"), ("date", "string"), ("predicted_demand", "float64"),
+    ("confidence_interval_lower", "float64"), ("confidence_interval_upper", "float64"),
+    ("overall_trend", "string"), ("model_accuracy", "float64"), ("error", "string"),
+]
+
+Series = Tuple[str, str]
+
+# Per-worker-process forecaster; each worker fits and caches its own models
+_worker_forecaster = None
+
+
+def _init_worker(seed: Optional[int]):
+    global _worker_forecaster
+    from app.core.forecasting.demand import DemandForecaster
+    _worker_forecaster = DemandForecaster(seed=seed)
+
+
+def _forecast_chunk(chunk: List[Series], forecast_days: int, include_seasonality: bool) -> List[Dict[str, Any]]:
+    """Forecast a chunk of series inside a worker; a failing series yields an error row, not a failed chunk"""
+    results = []
+    try:
+        # Native engine: fit the whole chunk as one vectorized batch up front
+        _worker_forecaster.prefit([_worker_forecaster.series_key(t, r, include_seasonality) for t, r in chunk])
+    except Exception as e:
+        logger.error(f"Batch fit failed, fitting series one by one: {e}")
+    for equipment_type, region in chunk:
+        try:
+            results.append(_worker_forecaster.forecast(equipment_type, region, forecast_days, include_seasonality))
+        except Exception as e:
+            results.append({"equipment_type": equipment_type, "region": region, "error": str(e)})
+    return results
+
+
+def fleet_series(equipment_types: Iterable[str], regions: Iterable[str]) -> List[Series]:
+    """Every (type, region) pair, de-duplicated, in request order"""
+    return list(dict.fromkeys((t, r) for t in equipment_types for r in regions))
+
+
+class FleetForecaster:
+    """
+    Runs many independent series forecasts on a pool of worker processes.
+
+    Series are sent in chunks of FORECAST_FLEET_CHUNK_SIZE (amortizing pickling and IPC) and at
+    most two chunks per worker are in flight, so memory stays bounded however large the fleet.
+    Results are yielded as chunks finish, not in submission order. Fits are CPU-bound and share
+    nothing, so wall time scales close to linearly with the number of workers.
+    """
+
+    def __init__(self, workers: int = None, chunk_size: int = None, seed: Optional[int] = None):
+        self.workers = workers or settings.FORECAST_FLEET_WORKERS or os.cpu_count() or 1
+        self.chunk_size = chunk_size or settings.FORECAST_FLEET_CHUNK_SIZE
+        self.seed = settings.FORECAST_SEED if seed is None else seed
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the service process runs background threads (refits, batchers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.seed,),
+            )
+        return self._pool
+
+    def _chunks(self, series: List[Series]) -> Iterator[List[Series]]:
+        for i in range(0, len(series), self.chunk_size):
+            yield series[i:i + self.chunk_size]
+
+    def run(self, series: List[Series], forecast_days: int = 30, include_seasonality: bool = True) -> Iterator[Dict[str, Any]]:
+        """Forecast results for `series`, yielded as they complete"""
+        started = time.perf_counter()
+        pool = self._get_pool()
+        chunks = self._chunks(series)
+        pending = set()
+        count = 0
+        while True:
+            for chunk in chunks:
+                pending.add(pool.submit(_forecast_chunk, chunk, forecast_days, include_seasonality))
+                if len(pending) >= 2 * self.workers:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    count += 1
+                    yield result
+        FLEET_SERIES.inc(count)
+        FLEET_SECONDS.observe(time.perf_counter() - started)
+
+    async def stream(self, series: List[Series], forecast_days: int = 30,
+                     include_seasonality: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """`run` for the event loop: awaits worker futures instead of blocking on them"""
+        started = time.perf_counter()
+        pool = self._get_pool()
+        chunks = self._chunks(series)
+        pending = set()
+        count = 0
+        while True:
+            for chunk in chunks:
+                pending.add(asyncio.wrap_future(pool.submit(_forecast_chunk, chunk, forecast_days, include_seasonality)))
+                if len(pending) >= 2 * self.workers:
+                    break
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    count += 1
+                    yield result
+        FLEET_SERIES.inc(count)
+        FLEET_SECONDS.observe(time.perf_counter() - started)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+def table_rows(result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Flatten one series result into table rows (a single row carrying `error` for failed series)"""
+    series = {"equipment_type": result["equipment_type"], "region": result["region"]}
+    if "error" in result:
+        yield {**series, "error": result["error"]}
+        return
+    for point in result["forecast_data"]:
+        yield {
+            **series, **point,
+            "overall_trend": result["overall_trend"],
+            "model_accuracy": result["model_accuracy"],
+        }
+
+
+class ForecastTableWriter:
+    """Consolidated forecast table written incrementally as Parquet row groups or CSV"""
+
+    def __init__(self, path: str, row_group_size: int = 50_000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.parquet = path.endswith(".parquet")
+        self.row_group_size = row_group_size
+        self._rows: List[Dict[str, Any]] = []
+        if self.parquet:
+            if not HAS_PYARROW:
+                raise RuntimeError("pyarrow is required for Parquet output")
+            self.schema = pa.schema([(name, pa.type_for_alias(dtype)) for name, dtype in TABLE_FIELDS])
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._file = open(path, "w", encoding="utf-8", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=[name for name, _ in TABLE_FIELDS])
+            self._writer.writeheader()
+
+    def write(self, result: Dict[str, Any]):
+        self._rows.extend(table_rows(result))
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        if self.parquet:
+            columns = {name: [row.get(name) for row in self._rows] for name, _ in TABLE_FIELDS}
+            self._writer.write_table(pa.table(columns, schema=self.schema))
+        else:
+            self._writer.writerows(self._rows)
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        (self._writer if self.parquet else self._file).close()
+
+
+# Global instance
+_fleet = None
+
+
+def get_fleet_forecaster() -> FleetForecaster:
+    """Get or create the global fleet forecaster (its worker pool starts on first use)"""
+    global _fleet
+    if _fleet is None:
+        _fleet = FleetForecaster()
+    return _fleet
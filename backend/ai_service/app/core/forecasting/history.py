@@ -0,0 +1,310 @@
+"""Booking history store: daily booking counts per (equipment type, region) in append-only Parquet partitions"""
+import os
+import json
+import sqlite3
+import threading
+import logging
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+# Partition layout: one row per (day, type, region) with the bookings added by that ingest run
+PARTITION_FIELDS = [("date", "date32"), ("equipment_type", "string"), ("region", "string"), ("bookings", "int64")]
+EVENT_COLUMNS = ["created_at", "equipment_type", "region"]
+
+
+def region_of(location: Any) -> str:
+    """Region key of an equipment.location jsonb (state, falling back to city), normalized"""
+    if isinstance(location, str):
+        try:
+            location = json.loads(location)
+        except ValueError:
+            return location.strip().lower()
+    if isinstance(location, dict):
+        return str(location.get("state") or location.get("city") or "").strip().lower()
+    return ""
+
+
+def events_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Booking events ({created_at, equipment_type, region}) as a normalized DataFrame"""
+    frame = pd.DataFrame(rows, columns=EVENT_COLUMNS)
+    frame["created_at"] = pd.to_datetime(frame["created_at"], utc=True, format="ISO8601")
+    frame["equipment_type"] = frame["equipment_type"].fillna("").astype(str).str.strip().str.lower()
+    frame["region"] = frame["region"].fillna("").astype(str).str.strip().str.lower()
+    return frame
+
+
+# Event sources. Database sources read the half-open window [since, until) of rentals.created_at,
+# keyset-paginated on id, so consecutive runs neither miss nor double count a booking.
+
+def supabase_events(client, since: Optional[str], until: str, page_size: int = None) -> Iterator[pd.DataFrame]:
+    """Pages of booking events from `rentals` joined to their equipment's type and location"""
+    page_size = page_size or settings.CATALOG_PAGE_SIZE
+    last_id = None
+    while True:
+        query = client.table("rentals").select("id, created_at, equipment(type, location)").is_("deleted_at", "null")
+        if since is not None:
+            query = query.gte("created_at", since)
+        query = query.lt("created_at", until)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(page_size).execute().data or []
+        yield events_frame([
+            {"created_at": r["created_at"], "equipment_type": (r.get("equipment") or {}).get("type"),
+             "region": region_of((r.get("equipment") or {}).get("location"))}
+            for r in rows
+        ])
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1]["id"]
+
+
+def sqlite_events(path: str, since: Optional[str], until: str, page_size: int = None) -> Iterator[pd.DataFrame]:
+    """Same as `supabase_events` against a SQLite stand-in with `rentals` and `equipment` tables"""
+    page_size = page_size or settings.CATALOG_PAGE_SIZE
+    # strftime() normalizes stored ISO-8601 values (any offset) to UTC with milliseconds; bounds get the same format
+    bounds = [pd.Timestamp(t).tz_convert("UTC").strftime("%Y-%m-%d %H:%M:%S.%f")[:23] if t else "" for t in (since, until)]
+    with sqlite3.connect(path) as conn:
+        last_id = ""
+        while True:
+            rows = conn.execute(
+                "SELECT r.id, r.created_at, e.type, e.location FROM rentals r JOIN equipment e ON e.id = r.equipment_id "
+                "WHERE r.deleted_at IS NULL AND strftime('%Y-%m-%d %H:%M:%f', r.created_at) >= ? AND strftime('%Y-%m-%d %H:%M:%f', r.created_at) < ? AND r.id > ? "
+                "ORDER BY r.id LIMIT ?",
+                (*bounds, last_id, page_size),
+            ).fetchall()
+            yield events_frame([
+                {"created_at": created_at, "equipment_type": equipment_type, "region": region_of(location)}
+                for _, created_at, equipment_type, location in rows
+            ])
+            if len(rows) < page_size:
+                break
+            last_id = rows[-1][0]
+
+
+def file_events(path: str, since: Optional[str], until: str, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Booking events from a CSV or JSONL export with created_at, equipment_type and region columns"""
+    if path.endswith(".csv"):
+        chunks = pd.read_csv(path, usecols=EVENT_COLUMNS, chunksize=chunk_size)
+    else:
+        chunks = pd.read_json(path, lines=True, chunksize=chunk_size)
+    lower = pd.Timestamp(since) if since else None
+    upper = pd.Timestamp(until)
+    for chunk in chunks:
+        frame = events_frame(chunk[EVENT_COLUMNS].to_dict("records"))
+        window = frame["created_at"] < upper
+        if lower is not None:
+            window &= frame["created_at"] >= lower
+        yield frame[window]
+
+
+class BookingHistoryStore:
+    """
+    Daily booking counts per (equipment type, region) under HISTORY_DIR, with days in
+    MARKETPLACE_TIMEZONE.
+
+    Each ingest run aggregates only its new events and writes them as one new partition
+    (`part-NNNNNN.parquet`, rows of per-day deltas); partitions are never rewritten except by
+    `compact()`. `manifest.json` lists the partitions with their date range plus the ingest
+    watermark, and is replaced atomically, so readers always see a consistent set.
+
+    Reads load only partitions that overlap the requested tail and are cached per manifest
+    version; the manifest is re-read when an ingest job in another process updates it.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or os.path.join(settings.DATA_DIR, settings.HISTORY_DIR)
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Any] = {"version": 0, "watermark": None, "partitions": []}
+        self._mtime = None
+        self._tail: Tuple[Any, Optional[pd.Series]] = (None, None)
+        self._reload()
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.manifest_path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self._manifest = json.load(f)
+            self._mtime = mtime
+        except Exception as e:
+            logger.error(f"Failed to read booking history manifest {self.manifest_path}: {e}")
+
+    @property
+    def version(self) -> int:
+        """Bumped by every append that wrote a partition and by compaction; forecasts refit when it moves"""
+        with self._lock:
+            self._reload()
+            return self._manifest["version"]
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """End (exclusive) of the created_at window ingested so far"""
+        with self._lock:
+            self._reload()
+            return self._manifest["watermark"]
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+        self._manifest = manifest
+        self._mtime = os.path.getmtime(self.manifest_path)
+
+    def _write_partition(self, counts: pd.DataFrame, version: int) -> Dict[str, Any]:
+        name = f"part-{version:06d}.parquet"
+        schema = pa.schema([(field, pa.type_for_alias(dtype)) for field, dtype in PARTITION_FIELDS])
+        table = pa.Table.from_pandas(counts, schema=schema, preserve_index=False)
+        tmp = os.path.join(self.root, name + ".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, os.path.join(self.root, name))
+        return {
+            "file": name, "rows": len(counts), "bookings": int(counts["bookings"].sum()),
+            "min_date": counts["date"].min().isoformat(), "max_date": counts["date"].max().isoformat(),
+        }
+
+    @staticmethod
+    def _aggregate(events: pd.DataFrame) -> pd.DataFrame:
+        # Marketplace days, not UTC days: bookings made after local midnight count for that day
+        events = events.assign(date=events["created_at"].dt.tz_convert(settings.MARKETPLACE_TIMEZONE).dt.date)
+        events = events[(events["equipment_type"] != "") & (events["region"] != "")]
+        return events.groupby(["date", "equipment_type", "region"], sort=True).size().rename("bookings").reset_index()
+
+    def append(self, events: pd.DataFrame, watermark: str) -> int:
+        """
+        Roll new events into daily counts, write them as one partition and advance the watermark.
+        The version only moves when a partition is written, so empty runs leave fitted models current.
+        """
+        if not HAS_PYARROW:
+            raise RuntimeError("pyarrow is required for the booking history store")
+        os.makedirs(self.root, exist_ok=True)
+        counts = self._aggregate(events)
+        with self._lock:
+            self._reload()
+            manifest = {**self._manifest, "partitions": list(self._manifest["partitions"])}
+            if len(counts):
+                manifest["version"] += 1
+                manifest["partitions"].append(self._write_partition(counts, manifest["version"]))
+            manifest["watermark"] = watermark
+            self._write_manifest(manifest)
+        return len(counts)
+
+    def compact(self) -> int:
+        """Merge all partitions into one (sums duplicate days); returns the number of partitions merged"""
+        with self._lock:
+            self._reload()
+            partitions = self._manifest["partitions"]
+            if len(partitions) < 2:
+                return len(partitions)
+            merged = self._read(partitions).groupby(["date", "equipment_type", "region"], sort=True)["bookings"].sum().reset_index()
+            manifest = {**self._manifest, "version": self._manifest["version"] + 1}
+            manifest["partitions"] = [self._write_partition(merged, manifest["version"])]
+            self._write_manifest(manifest)
+        for partition in partitions:
+            try:
+                os.remove(os.path.join(self.root, partition["file"]))
+            except OSError:
+                pass
+        return len(partitions)
+
+    def _read(self, partitions: List[Dict[str, Any]]) -> pd.DataFrame:
+        frames = [pq.read_table(os.path.join(self.root, p["file"])).to_pandas() for p in partitions]
+        if not frames:
+            return pd.DataFrame({field: [] for field, _ in PARTITION_FIELDS})
+        return pd.concat(frames, ignore_index=True)
+
+    def last_day(self) -> date:
+        """Last complete marketplace day covered by ingestion (the day before the watermark, or yesterday)"""
+        watermark = self.watermark
+        end = pd.Timestamp(watermark) if watermark else pd.Timestamp.now(tz="UTC")
+        end = end.tz_convert(settings.MARKETPLACE_TIMEZONE)
+        return end.date() - timedelta(days=1)
+
+    def _tail_counts(self, start: date) -> pd.Series:
+        """Bookings indexed by (type, region, date) from partitions overlapping [start, ...), cached per version"""
+        with self._lock:
+            self._reload()
+            key = (self._manifest["version"], start)
+            if self._tail[0] == key:
+                return self._tail[1]
+            partitions = [p for p in self._manifest["partitions"] if p["max_date"] >= start.isoformat()]
+        frame = self._read(partitions) if HAS_PYARROW else self._read([])
+        frame = frame[pd.to_datetime(frame["date"]).dt.date >= start]
+        counts = frame.groupby(["equipment_type", "region", "date"], sort=True)["bookings"].sum()
+        with self._lock:
+            self._tail = (key, counts)
+        return counts
+
+    def daily_counts(self, equipment_type: str, region: str, days: int, leading_zeros: bool = False) -> Optional[pd.Series]:
+        """
+        Bookings per day for one series over the last `days` complete days (zeros where nothing
+        was booked), or None if the store has no data for the series.
+
+        The series starts at its first booked day in the window, so a model is not fitted on
+        days before the series existed; pass `leading_zeros=True` for the full window (when
+        the caller already covers the earlier days, e.g. extending a fitted state).
+        """
+        end = self.last_day()
+        start = end - timedelta(days=days - 1)
+        counts = self._tail_counts(start)
+        key = (equipment_type.strip().lower(), region.strip().lower())
+        if counts.empty or key not in counts.index.droplevel("date"):
+            return None
+        series = counts.loc[key]
+        series = pd.Series(series.values, index=pd.to_datetime(series.index))
+        first = start if leading_zeros else series.index.min()
+        return series.reindex(pd.date_range(first, end, freq="D"), fill_value=0).astype(np.float64)
+
+
+def ingest(store: BookingHistoryStore, source: str, client=None, path: str = None,
+           lag_seconds: float = None) -> Dict[str, Any]:
+    """
+    Pull the booking events created since the store's watermark (up to now minus
+    HISTORY_INGEST_LAG_SECONDS, leaving room for in-flight transactions) from `source`
+    ("supabase", "sqlite" or "file") and append them as one partition.
+    """
+    lag = settings.HISTORY_INGEST_LAG_SECONDS if lag_seconds is None else lag_seconds
+    since = store.watermark
+    until = (datetime.now(timezone.utc) - timedelta(seconds=lag)).isoformat()
+    if source == "supabase":
+        pages = supabase_events(client, since, until)
+    elif source == "sqlite":
+        pages = sqlite_events(path, since, until)
+    elif source == "file":
+        pages = file_events(path, since, until)
+    else:
+        raise ValueError(f"Unknown booking history source: {source}")
+    frames = [page for page in pages if len(page)]
+    events = pd.concat(frames, ignore_index=True) if frames else events_frame([])
+    rows = store.append(events, until)
+    return {"events": len(events), "daily_rows": rows, "since": since, "until": until, "version": store.version}
+
+
+# Global instance
+_history_store = None
+
+
+def get_history_store() -> BookingHistoryStore:
+    """Get or create the global booking history store"""
+    global _history_store
+    if _history_store is None:
+        _history_store = BookingHistoryStore()
+    return _history_store
@@ -0,0 +1,143 @@
+"""Cache of fitted forecasting models with TTL/LRU eviction and a background refit scheduler"""
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from app.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MODEL_HITS = metrics.counter("forecast_model_cache_hits_total", "Forecasts served from a cached fitted model")
+MODEL_MISSES = metrics.counter("forecast_model_cache_misses_total", "Forecasts that had to fit a model first")
+FIT_SECONDS = metrics.histogram("forecast_model_fit_seconds", "Wall time of one model fit")
+# Request latency split by whether the model was already fitted ("cache_hit") or fitted inline ("fit")
+FORECAST_SECONDS = metrics.histogram("forecast_request_seconds", "Model part of a forecast request")
+# Refit a hot entry once this share of its TTL has elapsed, so requests rarely see an expired model
+REFIT_AT_FRACTION = 0.8
+
+
+class _Entry:
+    def __init__(self, model: Any, version: Hashable, ttl: float):
+        self.model = model
+        self.version = version
+        self.fitted_at = time.monotonic()
+        self.expires = self.fitted_at + ttl
+        self.used = False  # Requested since the last (re)fit; only used entries are refitted
+
+
+class FittedModelCache:
+    """
+    Fitted models keyed by series (e.g. (type, region, include_seasonality)) and tagged with the
+    data version they were fitted on.
+
+    A fresh entry is a hit. An entry that expired or whose data version moved on is still served
+    (stale-while-revalidate) while the scheduler thread refits it; only a series never seen before
+    is fitted inline. The scheduler also refits entries that are in use before their TTL runs out,
+    and lets unused ones expire. Capacity is bounded with LRU eviction.
+    """
+
+    def __init__(self, fit: Callable[[Hashable], Any], version: Callable[[Hashable], Hashable],
+                 max_entries: int = None, ttl: float = None, refit_interval: float = None):
+        self.fit = fit
+        self.version = version
+        self.max_entries = settings.FORECAST_MODEL_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl = settings.FORECAST_MODEL_TTL_SECONDS if ttl is None else ttl
+        self.refit_interval = settings.FORECAST_REFIT_INTERVAL_SECONDS if refit_interval is None else refit_interval
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._stale = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._scheduler: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Tuple[Any, bool]:
+        """(fitted model, cache hit) for `key`; fits inline only on the first request for a series"""
+        version = self.version(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.used = True
+                if entry.version != version or time.monotonic() >= entry.expires:
+                    self._stale.add(key)
+                    self._wake.set()
+        if entry is not None:
+            MODEL_HITS.inc()
+            self._ensure_scheduler()
+            return entry.model, True
+        MODEL_MISSES.inc()
+        return self._refit(key, version), False
+
+    def put(self, key: Hashable, model: Any):
+        """Insert a model fitted elsewhere (e.g. as part of a batch fit)"""
+        with self._lock:
+            self._entries[key] = _Entry(model, self.version(key), self.ttl)
+            self._entries.move_to_end(key)
+            self._stale.discard(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._stale.discard(evicted)
+        self._ensure_scheduler()
+
+    def items(self) -> list:
+        """(key, model) pairs currently cached"""
+        with self._lock:
+            return [(key, entry.model) for key, entry in self._entries.items()]
+
+    def invalidate(self, key: Hashable = None):
+        """Mark one series (or every series) for refit on the next scheduler pass"""
+        with self._lock:
+            self._stale.update([key] if key is not None else list(self._entries))
+        self._wake.set()
+
+    def _refit(self, key: Hashable, version: Hashable = None) -> Any:
+        version = self.version(key) if version is None else version
+        started = time.perf_counter()
+        model = self.fit(key)
+        FIT_SECONDS.observe(time.perf_counter() - started)
+        with self._lock:
+            self._entries[key] = _Entry(model, version, self.ttl)
+            self._entries.move_to_end(key)
+            self._stale.discard(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._stale.discard(evicted)
+        self._ensure_scheduler()
+        return model
+
+    def _ensure_scheduler(self):
+        if self._scheduler is None or not self._scheduler.is_alive():
+            with self._lock:
+                if self._scheduler is None or not self._scheduler.is_alive():
+                    self._scheduler = threading.Thread(target=self._run, name="forecast-refit", daemon=True)
+                    self._scheduler.start()
+
+    def _due(self) -> list:
+        """Keys to refit now; unused expired entries are dropped instead"""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                refit_at = entry.fitted_at + (entry.expires - entry.fitted_at) * REFIT_AT_FRACTION
+                if key in self._stale or (entry.used and now >= refit_at):
+                    due.append(key)
+                elif now >= entry.expires:
+                    del self._entries[key]
+        return due
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.refit_interval)
+            self._wake.clear()
+            for key in self._due():
+                try:
+                    self._refit(key)
+                except Exception as e:
+                    logger.error(f"Background refit failed for {key}: {e}")
+                    with self._lock:
+                        self._stale.discard(key)
@@ -0,0 +1,208 @@
+"""Vectorized additive Holt-Winters: fits a batch of series, shaped (series, time), in NumPy"""
+import numpy as np
+from datetime import date
+from typing import List, Optional, Tuple
+
+from app.core.forecasting.online import OnlineHoltWinters
+
+# Coarse grid searched for every series at once, then refined around each series' best point
+ALPHA_GRID = np.array([0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+BETA_GRID = np.array([0.0, 0.01, 0.03, 0.1, 0.2])
+GAMMA_GRID = np.array([0.0, 0.05, 0.1, 0.2, 0.4])
+REFINE_ROUNDS = 2
+# Start-value re-fits, each followed by one more local refinement
+INIT_ROUNDS = 2
+
+
+def initial_states(y: np.ndarray, period: int, seasonal: bool, periods: int = 4) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Start values per series from a least-squares line through the first `periods` periods:
+    level/trend from the line (as of the step before the first observation), seasonal from the
+    mean detrended deviation at each phase.
+    """
+    window = min(periods * period, y.shape[1])
+    x = np.arange(window, dtype=np.float64)
+    design = np.stack([np.ones(window), x], axis=1)
+    intercept, slope = np.linalg.lstsq(design, y[:, :window].T, rcond=None)[0]
+    if seasonal:
+        resid = y[:, :window] - (intercept[:, None] + slope[:, None] * x)
+        usable = window // period * period
+        season = resid[:, :usable].reshape(len(y), -1, period).mean(axis=1)
+        season -= season.mean(axis=1, keepdims=True)
+    else:
+        season = np.zeros((len(y), period))
+    return intercept - slope, slope, season
+
+
+def optimal_initial_states(y: np.ndarray, alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray,
+                           period: int, seasonal: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Least-squares optimal start values for fixed smoothing parameters.
+
+    For fixed parameters the one-step errors are affine in the initial (level, trend, season),
+    so one filter pass over the data with a zero start plus one pass per state component with
+    zero data and a unit start gives the exact linear map; each series then solves a small
+    least-squares problem (pseudo-inverse, since level and a constant seasonal shift are
+    interchangeable).
+    """
+    n, steps = y.shape
+    k = 2 + (period if seasonal else 0)
+    zero = np.zeros(n)
+    zero_season = np.zeros((n, period))
+    base, *_ = holt_winters_filter(y, alpha, beta, gamma, zero, zero, zero_season, keep_errors=True)
+
+    rows = np.repeat(np.arange(n), k)
+    unit = np.tile(np.eye(k), (n, 1))
+    season_unit = np.zeros((n * k, period))
+    if seasonal:
+        season_unit[:] = unit[:, 2:]
+    response, *_ = holt_winters_filter(
+        np.zeros((n, steps)), alpha[rows], beta[rows], gamma[rows], unit[:, 0], unit[:, 1], season_unit, rows,
+        keep_errors=True,
+    )
+    jacobian = response.reshape(n, k, steps).transpose(0, 2, 1)  # (series, time, state)
+    x = -np.linalg.pinv(jacobian) @ base[:, :, None]
+    x = x[:, :, 0]
+    season = x[:, 2:] if seasonal else zero_season
+    return x[:, 0], x[:, 1], season
+
+
+def holt_winters_filter(y: np.ndarray, alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray,
+                        level: np.ndarray, trend: np.ndarray, season: np.ndarray,
+                        rows: Optional[np.ndarray] = None, keep_errors: bool = False):
+    """
+    Run the additive recurrences over time for a batch of parameter sets at once.
+
+    `rows[b]` is the series (row of `y`) that batch element `b` smooths, so one series can be
+    evaluated under many (alpha, beta, gamma) candidates without copying it. Returns the sum of
+    squared one-step errors (or, with `keep_errors`, all one-step errors as a (batch, time)
+    array), the sum of absolute errors and the final (level, trend, season) per batch element;
+    the season ring is indexed by time modulo the period.
+    """
+    rows = np.arange(len(y)) if rows is None else rows
+    period = season.shape[1]
+    level, trend, season = level.astype(np.float64), trend.astype(np.float64), season.astype(np.float64)
+    sse = np.zeros(len(rows))
+    sae = np.zeros(len(rows))
+    errors = np.empty((len(rows), y.shape[1])) if keep_errors else None
+    one_minus_alpha, one_minus_beta, one_minus_gamma = 1.0 - alpha, 1.0 - beta, 1.0 - gamma
+    for t in range(y.shape[1]):
+        yt = y[rows, t]
+        i = t % period
+        s = season[:, i]
+        base = level + trend
+        error = yt - base - s
+        sse += error * error
+        if keep_errors:
+            errors[:, t] = error
+        sae += np.abs(error)
+        new_level = alpha * (yt - s) + one_minus_alpha * base
+        trend = beta * (new_level - level) + one_minus_beta * trend
+        season[:, i] = gamma * (yt - base) + one_minus_gamma * s
+        level = new_level
+    return (errors if keep_errors else sse), sae, level, trend, season
+
+
+class HoltWintersBatch:
+    """Fitted parameters and final states of a batch of series; series `i` is row `i` of every array"""
+
+    def __init__(self, alpha, beta, gamma, level, trend, season, sse, mae, t: int, seasonal: bool):
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        self.level, self.trend, self.season = level, trend, season
+        self.sse = sse
+        self.mae = mae
+        self.t = t
+        self.seasonal = seasonal
+
+    def __len__(self) -> int:
+        return len(self.level)
+
+    def forecast(self, steps: int) -> np.ndarray:
+        """(series, steps) predictions for the days after the fitted window"""
+        k = np.arange(1, steps + 1)
+        predictions = self.level[:, None] + k[None, :] * self.trend[:, None]
+        if self.seasonal:
+            predictions = predictions + self.season[:, (self.t + k - 1) % self.season.shape[1]]
+        return predictions
+
+    def state(self, i: int, last_date: date, observed: bool = True) -> OnlineHoltWinters:
+        """Online state of series `i`, ready for O(1) updates and forecasting"""
+        return OnlineHoltWinters(
+            alpha=float(self.alpha[i]), beta=float(self.beta[i]), gamma=float(self.gamma[i]),
+            level=float(self.level[i]), trend=float(self.trend[i]),
+            seasonal=self.season[i].copy() if self.seasonal else None,
+            t=self.t, last_date=last_date, fit_error=float(self.mae[i]), observed=observed,
+        )
+
+    def states(self, last_dates: List[date], observed: List[bool] = None) -> List[OnlineHoltWinters]:
+        observed = observed or [True] * len(self)
+        return [self.state(i, last_dates[i], observed[i]) for i in range(len(self))]
+
+
+def _grid(alphas, betas, gammas) -> np.ndarray:
+    return np.stack(np.meshgrid(alphas, betas, gammas, indexing="ij"), axis=-1).reshape(-1, 3)
+
+
+def fit_holt_winters(y: np.ndarray, period: int = 7, seasonal: bool = True, max_batch: int = 400_000) -> HoltWintersBatch:
+    """
+    Fit additive-trend (and additive-seasonal) Holt-Winters to every row of `y` (series x time).
+
+    Every series is scored under every point of a coarse (alpha, beta, gamma) grid in one
+    vectorized filter pass, then REFINE_ROUNDS local grids with halving spacing are searched
+    around each series' own best point. The start values are then re-fitted by least squares
+    for the chosen parameters and the parameters refined once more. Series are processed in
+    blocks so that no more than `max_batch` (series, candidate) pairs are in flight.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if y.ndim != 2 or y.shape[1] < 2 * period:
+        raise ValueError(f"Expected a (series, time) array with at least {2 * period} observations per series")
+    n = len(y)
+    level0, trend0, season0 = initial_states(y, period, seasonal)
+    best = np.zeros((n, 3))
+    best_sse = np.full(n, np.inf)
+
+    def evaluate(series: np.ndarray, candidates: np.ndarray):
+        """Score candidates (len(series) x c x 3) and keep improvements"""
+        c = candidates.shape[1]
+        rows = np.repeat(series, c)
+        flat = candidates.reshape(-1, 3)
+        sse, _, _, _, _ = holt_winters_filter(
+            y, flat[:, 0], flat[:, 1], flat[:, 2], level0[rows], trend0[rows], season0[rows], rows
+        )
+        sse = sse.reshape(len(series), c)
+        pick = np.argmin(sse, axis=1)
+        scored = sse[np.arange(len(series)), pick]
+        better = scored < best_sse[series]
+        best_sse[series[better]] = scored[better]
+        best[series[better]] = candidates[np.arange(len(series)), pick][better]
+
+    gammas = GAMMA_GRID if seasonal else np.zeros(1)
+    coarse = _grid(ALPHA_GRID, BETA_GRID, gammas)
+    steps = np.array([0.1, 0.02, 0.05 if seasonal else 0.0])
+    offsets = _grid(*[np.array([-1.0, 0.0, 1.0])] * 3)
+    for block in _blocks(n, max_batch // len(coarse)):
+        evaluate(block, np.broadcast_to(coarse, (len(block),) + coarse.shape))
+    for _ in range(REFINE_ROUNDS):
+        for block in _blocks(n, max_batch // len(offsets)):
+            candidates = np.clip(best[block][:, None, :] + offsets[None, :, :] * steps, 0.0, 1.0)
+            evaluate(block, candidates)
+        steps = steps / 2
+
+    # Alternate: re-fit the start values for the chosen parameters, then refine the parameters
+    for _ in range(INIT_ROUNDS):
+        level0, trend0, season0 = optimal_initial_states(y, best[:, 0], best[:, 1], best[:, 2], period, seasonal)
+        best_sse[:] = np.inf
+        for block in _blocks(n, max_batch // len(offsets)):
+            candidates = np.clip(best[block][:, None, :] + offsets[None, :, :] * steps, 0.0, 1.0)
+            evaluate(block, candidates)
+        steps = steps / 2
+
+    sse, sae, level, trend, season = holt_winters_filter(y, best[:, 0], best[:, 1], best[:, 2], level0, trend0, season0)
+    return HoltWintersBatch(best[:, 0], best[:, 1], best[:, 2], level, trend, season,
+                            sse, sae / y.shape[1], y.shape[1], seasonal)
+
+
+def _blocks(n: int, size: int):
+    size = max(int(size), 1)
+    for start in range(0, n, size):
+        yield np.arange(start, min(start + size, n))
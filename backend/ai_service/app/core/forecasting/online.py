@@ -0,0 +1,101 @@
+"""Online additive Holt-Winters: per-series smoothing state updated in O(1) per new observation"""
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from typing import Optional
+
+from app.config import settings
+from app.core.metrics import metrics
+
+STATE_UPDATES = metrics.counter("forecast_state_updates_total", "Daily observations applied to online Holt-Winters states")
+DRIFT_REFITS = metrics.counter("forecast_drift_refits_total", "Full refits scheduled because a series' error drifted")
+
+
+class OnlineHoltWinters:
+    """
+    Level, trend and seasonal state of one fitted additive Holt-Winters series.
+
+    `update(y)` applies one day with the smoothing recurrences (the same ones the fit used):
+
+        l_t = alpha * (y_t - s_{t-m}) + (1 - alpha) * (l_{t-1} + b_{t-1})
+        b_t = beta * (l_t - l_{t-1}) + (1 - beta) * b_{t-1}
+        s_t = gamma * (y_t - l_{t-1} - b_{t-1}) + (1 - gamma) * s_{t-m}
+
+    The smoothing parameters stay fixed between full refits. One-step-ahead absolute errors
+    are tracked as an EWMA; `drifted` reports when it exceeds FORECAST_DRIFT_RATIO times the
+    in-sample error of the fit, i.e. the parameters no longer describe the series.
+    """
+
+    def __init__(self, alpha: float, beta: float, gamma: float, level: float, trend: float,
+                 seasonal: Optional[np.ndarray], t: int, last_date: date, fit_error: float, observed: bool = True):
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        self.level = level
+        self.trend = trend
+        self.seasonal = seasonal  # seasonal[t % m] is the component for time index t; None without seasonality
+        self.t = t                # Time index of the next observation
+        self.last_date = last_date
+        self.fit_error = max(fit_error, 1e-9)
+        self.error = fit_error    # EWMA of one-step absolute errors since the fit
+        self.updates = 0
+        self.observed = observed  # Fitted on ingested bookings (False: synthetic history, nothing to update with)
+
+    @classmethod
+    def from_statsmodels(cls, results, last_date: date, observed: bool = True) -> "OnlineHoltWinters":
+        """State at the end of a fitted statsmodels ExponentialSmoothing (trend='add', seasonal 'add' or None)"""
+        params = results.params
+        n = len(results.level)
+        seasonal = None
+        gamma = params.get("smoothing_seasonal")
+        if results.model.seasonal is not None:
+            m = results.model.seasonal_periods
+            season = np.asarray(results.season, dtype=np.float64)
+            seasonal = np.empty(m)
+            seasonal[np.arange(n - m, n) % m] = season[n - m:]
+        return cls(
+            alpha=float(params["smoothing_level"]), beta=float(params["smoothing_trend"]),
+            gamma=float(gamma) if gamma is not None and not np.isnan(gamma) else 0.0,
+            level=float(results.level[-1]), trend=float(results.trend[-1]), seasonal=seasonal,
+            t=n, last_date=last_date, fit_error=float(np.mean(np.abs(results.resid))), observed=observed,
+        )
+
+    def _season(self, t: int) -> float:
+        return self.seasonal[t % len(self.seasonal)] if self.seasonal is not None else 0.0
+
+    def update(self, y: float):
+        """Apply one new daily observation"""
+        season = self._season(self.t)
+        base = self.level + self.trend
+        smoothing = settings.FORECAST_DRIFT_SMOOTHING
+        self.error = (1 - smoothing) * self.error + smoothing * abs(y - base - season)
+        level = self.alpha * (y - season) + (1 - self.alpha) * base
+        self.trend = self.beta * (level - self.level) + (1 - self.beta) * self.trend
+        if self.seasonal is not None:
+            self.seasonal[self.t % len(self.seasonal)] = self.gamma * (y - base) + (1 - self.gamma) * season
+        self.level = level
+        self.t += 1
+        self.last_date += timedelta(days=1)
+        self.updates += 1
+
+    def update_many(self, observations: pd.Series) -> int:
+        """Apply the daily observations dated after `last_date` (in order); returns how many were applied"""
+        applied = 0
+        for day, y in zip(observations.index.date, observations.values):
+            if day == self.last_date + timedelta(days=1):
+                self.update(float(y))
+                applied += 1
+        if applied:
+            STATE_UPDATES.inc(applied)
+        return applied
+
+    @property
+    def drifted(self) -> bool:
+        return self.updates >= settings.FORECAST_DRIFT_MIN_UPDATES and self.error > settings.FORECAST_DRIFT_RATIO * self.fit_error
+
+    def forecast(self, steps: int, start: date = None) -> np.ndarray:
+        """Predictions for `steps` days starting at `start` (default: the day after `last_date`)"""
+        offset = (start - self.last_date).days if start is not None else 1
+        k = np.arange(max(offset, 1), max(offset, 1) + steps)
+        predictions = self.level + k * self.trend
+        if self.seasonal is not None:
+            predictions = predictions + self.seasonal[(self.t + k - 1) % len(self.seasonal)]
+        return predictions
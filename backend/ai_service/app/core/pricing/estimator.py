@@ -1,11 +1,22 @@
 """Price estimation core logic"""
+import threading
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Callable
 import logging
 
+from app.core.pricing.regions import RegionTable
+from app.core.pricing.table import PriceTable, age_bucket, age_buckets
+
 logger = logging.getLogger(__name__)
 
 
+def _map_column(values: Sequence[str], fn: Callable[[str], Any]) -> np.ndarray:
+    """Apply `fn` once per distinct value of a categorical column and broadcast back to rows"""
+    uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    mapped = np.array([fn(str(u)) for u in uniques])
+    return mapped[inverse.reshape(-1)]
+
+
 class PriceEstimator:
     """Equipment price estimation using ML models"""
     
@@ -43,6 +54,14 @@ class PriceEstimator:
             "winter": 0.9,
         }
         
+        self.regions = RegionTable()
+        
+        # Dense price surface over every categorical input; rebuilt when the tables change
+        self._tables_version = 0
+        self._table_lock = threading.Lock()
+        self._price_table = None
+        self._get_price_table()
+        
         logger.info("PriceEstimator initialized for Indian Hyperlocal Market")
     
     def estimate(
@@ -52,60 +71,85 @@ class PriceEstimator:
         age_years: float,
         location: str,
         season: str = None,
-        duration_hours: int = None
+        duration_hours: int = None,
+        equipment_category: str = None
     ) -> Dict[str, Any]:
         """
         Estimate Fair Market Price Bands
-        """
-        # Get base price
-        equipment_type_lower = equipment_type.lower()
-        base_price = self.base_prices.get(equipment_type_lower, 1000.0)
         
-        # Apply multipliers
-        condition_mult = self.condition_multipliers.get(condition.lower(), 1.0)
-        age_mult = max(0.5, 1.0 - (age_years * 0.05))
-        seasonal_mult = self.seasonal_multipliers.get(season.lower(), 1.0) if season else 1.0
-        location_mult = self._get_location_multiplier(location)
-        
-        # Calculate Base Estimated Price
-        estimated_price = base_price * condition_mult * age_mult * seasonal_mult * location_mult
-        
-        # Generate Fair Market Bands instead of fixed point estimates
-        # We use a 15% variance to give suppliers breathing room and avoid race-to-bottom
-        variance = estimated_price * 0.15
-        band_min = max(200.0, estimated_price - variance)
-        band_max = estimated_price + variance
-        
-        confidence = self._calculate_confidence(equipment_type, condition, age_years)
-        trend = self._get_market_trend(equipment_type, season)
-        
-        return {
-            "currency": "INR",
-            "fair_market_band_min": round(band_min, -1), # Round to nearest 10
-            "fair_market_band_max": round(band_max, -1),
-            "recommended_hourly_rate": round(estimated_price, -1),
-            "confidence_score": confidence,
-            "factors": {
-                "condition_impact": condition_mult,
-                "age_impact": round(age_mult, 2),
-                "location_demand": round(location_mult, 2),
-                "seasonal_factor": round(seasonal_mult, 2)
-            },
-            "market_trend": trend,
-            "guidance_message": "Prices are structured in regional bands to protect supplier margins while ensuring fair customer rates."
-        }
+        The price surface is precomputed (see PriceTable), so this is a code
+        lookup plus one array read. Age is resolved to 0.1-year buckets.
+        """
+        table = self._get_price_table()
+        codes = table.codes(equipment_type, condition, season, location, equipment_category)
+        return table.lookup(*codes, age_bucket(age_years))
+
+    def estimate_many(
+        self,
+        equipment_types: Sequence[str],
+        conditions: Sequence[str],
+        age_years: Sequence[float],
+        locations: Sequence[str],
+        seasons: Optional[Sequence[Optional[str]]] = None,
+        duration_hours: Optional[Sequence[Optional[int]]] = None,
+        equipment_categories: Optional[Sequence[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Estimate Fair Market Price Bands for many listings at once.
+
+        Takes column arrays (one entry per listing), encodes them to integer codes
+        and gathers all rows from the price surface in one fancy-indexing step.
+        Categorical columns are resolved once per distinct value, so cost grows
+        with the number of distinct types/locations rather than with the number of rows.
+        """
+        n = len(equipment_types)
+        if not (len(conditions) == len(age_years) == len(locations) == n):
+            raise ValueError("All input columns must have the same length")
+        if seasons is None:
+            seasons = [""] * n
+        elif len(seasons) != n:
+            raise ValueError("All input columns must have the same length")
+        if equipment_categories is None:
+            equipment_categories = [""] * n
+        elif len(equipment_categories) != n:
+            raise ValueError("All input columns must have the same length")
+        if n == 0:
+            return []
+
+        table = self._get_price_table()
+        seasons = ["" if s is None else s for s in seasons]
+        equipment_categories = ["" if c is None else c for c in equipment_categories]
+
+        type_idx = _map_column(equipment_types, table.type_code)
+        condition_idx = _map_column(conditions, table.condition_code)
+        season_idx = _map_column(seasons, table.season_code)
+        region_idx = _map_column(locations, table.region_code)
+        category_idx = _map_column(equipment_categories, table.category_code)
+        level_idx = table.location_level[region_idx, category_idx]
+
+        return table.lookup_many(type_idx, condition_idx, season_idx, level_idx, age_buckets(age_years))
+
+    def update_base_prices(self, base_prices: Dict[str, float]):
+        """Replace the base-price table; the price surface is rebuilt on the next estimate"""
+        self.base_prices = {k.lower(): float(v) for k, v in base_prices.items()}
+        self._tables_version += 1
+
+    def _get_price_table(self) -> PriceTable:
+        """Return the price surface, rebuilding it if the region or base-price tables changed"""
+        self.regions.maybe_reload()
+        compiled = self.regions.compiled
+        table = self._price_table
+        if table is None or table.regions is not compiled or table.tables_version != self._tables_version:
+            with self._table_lock:
+                table = self._price_table
+                if table is None or table.regions is not compiled or table.tables_version != self._tables_version:
+                    table = PriceTable(self, compiled, self._tables_version)
+                    self._price_table = table
+        return table
     
-    def _get_location_multiplier(self, location: str) -> float:
+    def _get_location_multiplier(self, location: str, equipment_category: str = None) -> float:
         """Get location-based demand multiplier for Indian regions"""
-        high_demand_agri = ["punjab", "haryana", "maharashtra", "uttar pradesh"]
-        high_demand_const = ["karnataka", "tamil nadu", "delhi", "gujarat"]
-        location_lower = location.lower()
-        
-        for area in high_demand_agri + high_demand_const:
-            if area in location_lower:
-                return 1.15
-        
-        return 1.0
+        return self.regions.multiplier(location, equipment_category)
     
     def _calculate_confidence(self, equipment_type: str, condition: str, age: float) -> float:
         confidence = 0.85
@@ -0,0 +1,185 @@
+"""Region table and precompiled location matcher for price multipliers"""
+import os
+import json
+import time
+import threading
+import logging
+import numpy as np
+from collections import deque, namedtuple
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Used when no region table file is present in DATA_DIR
+DEFAULT_REGION_TABLE = {
+    "default_multiplier": 1.0,
+    "regions": [
+        {"name": "punjab", "multiplier": 1.15},
+        {"name": "haryana", "multiplier": 1.15},
+        {"name": "maharashtra", "multiplier": 1.15},
+        {"name": "uttar pradesh", "multiplier": 1.15},
+        {"name": "karnataka", "multiplier": 1.15},
+        {"name": "tamil nadu", "multiplier": 1.15},
+        {"name": "delhi", "multiplier": 1.15},
+        {"name": "gujarat", "multiplier": 1.15},
+    ]
+}
+
+CompiledRegions = namedtuple("CompiledRegions", ["matcher", "multipliers", "categories", "names", "version"])
+
+
+class RegionMatcher:
+    """Aho-Corasick automaton mapping substrings of a location to a region index"""
+
+    def __init__(self, patterns: Dict[str, int]):
+        """Compile `patterns` (lowercase pattern -> region index) into a single automaton"""
+        self._goto: List[Dict[str, int]] = [{}]
+        fail = [0]
+        # Best (longest) pattern ending at each node, as (length, region index)
+        self._out: List[Optional[Tuple[int, int]]] = [None]
+
+        for pattern, region_idx in patterns.items():
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    fail.append(0)
+                    self._out.append(None)
+                node = nxt
+            self._out[node] = (len(pattern), region_idx)
+
+        # Breadth-first pass to wire failure links and merge outputs along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in self._goto[f]:
+                    f = fail[f]
+                fail[child] = self._goto[f].get(ch, 0)
+                inherited = self._out[fail[child]]
+                if inherited and (self._out[child] is None or inherited[0] > self._out[child][0]):
+                    self._out[child] = inherited
+        self._fail = fail
+
+    def match(self, text: str) -> Optional[int]:
+        """Return the region of the longest pattern found in `text` (single pass, O(len(text)))"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        best = None
+        for ch in text.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = out[node]
+            if hit and (best is None or hit[0] > best[0]):
+                best = hit
+        return best[1] if best else None
+
+
+class RegionTable:
+    """Per-region, per-category location demand multipliers loaded from DATA_DIR"""
+
+    def __init__(self, path: str = None, reload_interval: float = None):
+        """Load and compile the region table, falling back to built-in defaults"""
+        self.path = path or os.path.join(settings.DATA_DIR, settings.REGION_TABLE_FILE)
+        self.reload_interval = settings.REGION_TABLE_RELOAD_SECONDS if reload_interval is None else reload_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._last_check = time.monotonic()
+        self._compiled = self._compile(self._read())
+
+    def _read(self) -> Dict[str, Any]:
+        """Read the region table file, or return the default table if it is missing/invalid"""
+        try:
+            self._mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._mtime = None
+            logger.warning(f"Region table not found at {self.path}. Using default regions.")
+            return DEFAULT_REGION_TABLE
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read region table {self.path}: {e}. Using default regions.")
+            return DEFAULT_REGION_TABLE
+
+    def _compile(self, table: Dict[str, Any]) -> CompiledRegions:
+        """Build the matcher and the (region x category) multiplier matrix"""
+        regions = table.get("regions", [])
+        default_mult = float(table.get("default_multiplier", 1.0))
+
+        categories: Dict[str, int] = {}
+        for region in regions:
+            for category in region.get("category_multipliers", {}):
+                categories.setdefault(category.lower(), len(categories))
+
+        # Last row is "no region matched", last column is "category not listed"
+        multipliers = np.full((len(regions) + 1, len(categories) + 1), default_mult)
+        patterns: Dict[str, int] = {}
+        names = []
+        for idx, region in enumerate(regions):
+            name = region["name"].lower()
+            names.append(name)
+            multipliers[idx, :] = float(region.get("multiplier", default_mult))
+            for category, mult in region.get("category_multipliers", {}).items():
+                multipliers[idx, categories[category.lower()]] = float(mult)
+            for pattern in [name] + [str(a).lower() for a in region.get("aliases", [])]:
+                patterns[pattern.strip()] = idx
+
+        matcher = RegionMatcher(patterns)
+        self.version += 1
+        logger.info(f"Region table v{self.version} compiled: {len(regions)} regions, {len(patterns)} patterns")
+        return CompiledRegions(matcher, multipliers, categories, names, self.version)
+
+    def maybe_reload(self):
+        """Recompile the table if the file changed (checked at most once per reload interval)"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # Another request is already checking/reloading
+        try:
+            self._last_check = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                # Swap the compiled tuple in one assignment so readers never see a partial table
+                self._compiled = self._compile(self._read())
+        finally:
+            self._lock.release()
+
+    @property
+    def compiled(self) -> CompiledRegions:
+        """Current compiled table; take one reference and read everything from it"""
+        return self._compiled
+
+    def region_index(self, location: str, compiled: CompiledRegions = None) -> int:
+        """Index of the matched region, or the trailing "no match" row when nothing matches"""
+        compiled = compiled or self._compiled
+        idx = compiled.matcher.match(location or "")
+        return len(compiled.names) if idx is None else idx
+
+    def category_index(self, category: str = None, compiled: CompiledRegions = None) -> int:
+        """Index of the category column, or the trailing column for unlisted categories"""
+        categories = (compiled or self._compiled).categories
+        return categories.get(category.lower(), len(categories)) if category else len(categories)
+
+    def multiplier(self, location: str, category: str = None) -> float:
+        """Location demand multiplier for a listing"""
+        compiled = self._compiled
+        return float(compiled.multipliers[
+            self.region_index(location, compiled),
+            self.category_index(category, compiled)
+        ])
@@ -0,0 +1,142 @@
+"""Dense precomputed price surface for O(1) estimates"""
+import logging
+import numpy as np
+from typing import Dict, Any, List
+
+from app.core.pricing.regions import CompiledRegions
+
+logger = logging.getLogger(__name__)
+
+AGE_BUCKETS_PER_YEAR = 10
+AGE_BUCKETS = 10 * AGE_BUCKETS_PER_YEAR + 1  # 0.0 .. 10.0 years; age multiplier bottoms out at 10 years
+AGE_OVER_15 = AGE_BUCKETS  # Extra bucket for age > 15 (lower confidence)
+
+GUIDANCE_MESSAGE = "Prices are structured in regional bands to protect supplier margins while ensuring fair customer rates."
+
+
+def age_bucket(age_years: float) -> int:
+    """Integer age bucket for a listing age"""
+    if age_years > 15:
+        return AGE_OVER_15
+    return min(int(age_years * AGE_BUCKETS_PER_YEAR + 0.5), AGE_BUCKETS - 1)
+
+
+def age_buckets(age_years: np.ndarray) -> np.ndarray:
+    """Vectorized `age_bucket`"""
+    ages = np.asarray(age_years, dtype=np.float64)
+    idx = np.minimum(np.floor(ages * AGE_BUCKETS_PER_YEAR + 0.5), AGE_BUCKETS - 1).astype(np.intp)
+    return np.where(ages > 15, AGE_OVER_15, idx)
+
+
+class PriceTable:
+    """Price surface indexed by (type, condition, season, location level, age bucket)"""
+
+    def __init__(self, estimator, regions: CompiledRegions, tables_version: int = 0):
+        """Materialize every combination from the estimator's tables and a compiled region table"""
+        self.regions = regions
+        self.tables_version = tables_version
+
+        # Integer codes; the trailing slot of each dimension is "unknown/not given"
+        self.type_index = {t: i for i, t in enumerate(estimator.base_prices)}
+        self.condition_index = {c: i for i, c in enumerate(estimator.condition_multipliers)}
+        self.season_index = {s: i for i, s in enumerate(estimator.seasonal_multipliers)}
+
+        base = np.array(list(estimator.base_prices.values()) + [1000.0])
+        condition = np.array(list(estimator.condition_multipliers.values()) + [1.0])
+        seasonal = np.array(list(estimator.seasonal_multipliers.values()) + [1.0])
+        # Location multipliers collapse to their distinct values; regions map onto those levels
+        levels, level_index = np.unique(regions.multipliers, return_inverse=True)
+        self.location_level = level_index.reshape(regions.multipliers.shape)
+        ages = np.append(np.arange(AGE_BUCKETS) / AGE_BUCKETS_PER_YEAR, 16.0)
+        age = np.maximum(0.5, 1.0 - (ages * 0.05))
+
+        # Same multiplication order as PriceEstimator.estimate
+        price = (
+            base[:, None, None, None, None]
+            * condition[None, :, None, None, None]
+            * age[None, None, None, None, :]
+            * seasonal[None, None, :, None, None]
+            * levels[None, None, None, :, None]
+        )
+        variance = price * 0.15
+
+        # Confidence only varies with (type, condition, age > 15): fill that small grid directly
+        type_names = list(estimator.base_prices) + [""]
+        condition_names = list(estimator.condition_multipliers) + [""]
+        by_age = [estimator._calculate_confidence(t, c, a) for t in type_names for c in condition_names for a in (0.0, 16.0)]
+        by_age = np.array(by_age).reshape(len(type_names), len(condition_names), 2)
+        confidence = np.where(ages > 15, by_age[:, :, 1:2], by_age[:, :, 0:1])
+
+        # Last axis: band min, band max, recommended rate, confidence
+        self.surface = np.empty(price.shape + (4,))
+        self.surface[..., 0] = np.round(np.maximum(200.0, price - variance), -1)
+        self.surface[..., 1] = np.round(price + variance, -1)
+        self.surface[..., 2] = np.round(price, -1)
+        self.surface[..., 3] = confidence[:, :, None, None, :]
+
+        # Per-index response factors, kept as Python floats for direct serialization
+        self.condition_factor = condition.tolist()
+        self.age_factor = [round(a, 2) for a in age.tolist()]
+        self.location_factor = [round(m, 2) for m in levels.tolist()]
+        self.seasonal_factor = [round(m, 2) for m in seasonal.tolist()]
+        self.trend = [estimator._get_market_trend("", s) for s in estimator.seasonal_multipliers] + ["stable"]
+
+        logger.info(f"Price table built: shape {self.surface.shape[:-1]}, {self.surface.nbytes / 1024:.0f} KiB")
+
+    def type_code(self, equipment_type: str) -> int:
+        return self.type_index.get(equipment_type.lower(), len(self.type_index))
+
+    def condition_code(self, condition: str) -> int:
+        return self.condition_index.get(condition.lower(), len(self.condition_index))
+
+    def season_code(self, season: str = None) -> int:
+        return self.season_index.get(season.lower(), len(self.season_index)) if season else len(self.season_index)
+
+    def region_code(self, location: str) -> int:
+        region_idx = self.regions.matcher.match(location or "")
+        return len(self.regions.names) if region_idx is None else region_idx
+
+    def category_code(self, equipment_category: str = None) -> int:
+        categories = self.regions.categories
+        return categories.get(equipment_category.lower(), len(categories)) if equipment_category else len(categories)
+
+    def codes(self, equipment_type: str, condition: str, season: str, location: str, equipment_category: str = None) -> tuple:
+        """Resolve categorical inputs to integer codes (everything except age)"""
+        return (
+            self.type_code(equipment_type),
+            self.condition_code(condition),
+            self.season_code(season),
+            self.location_level[self.region_code(location), self.category_code(equipment_category)],
+        )
+
+    def lookup(self, type_idx: int, condition_idx: int, season_idx: int, level_idx: int, age_idx: int) -> Dict[str, Any]:
+        """Build an estimate response from a single surface cell"""
+        band_min, band_max, rate, confidence = self.surface[type_idx, condition_idx, season_idx, level_idx, age_idx].tolist()
+        return self._result(band_min, band_max, rate, confidence, condition_idx, season_idx, level_idx, age_idx)
+
+    def lookup_many(self, type_idx: np.ndarray, condition_idx: np.ndarray, season_idx: np.ndarray,
+                    level_idx: np.ndarray, age_idx: np.ndarray) -> List[Dict[str, Any]]:
+        """Gather many surface cells at once"""
+        cells = self.surface[type_idx, condition_idx, season_idx, level_idx, age_idx]
+        rows = zip(
+            cells[:, 0].tolist(), cells[:, 1].tolist(), cells[:, 2].tolist(), cells[:, 3].tolist(),
+            condition_idx.tolist(), season_idx.tolist(), level_idx.tolist(), age_idx.tolist()
+        )
+        return [self._result(*row) for row in rows]
+
+    def _result(self, band_min, band_max, rate, confidence, condition_idx, season_idx, level_idx, age_idx) -> Dict[str, Any]:
+        return {
+            "currency": "INR",
+            "fair_market_band_min": band_min,
+            "fair_market_band_max": band_max,
+            "recommended_hourly_rate": rate,
+            "confidence_score": confidence,
+            "factors": {
+                "condition_impact": self.condition_factor[condition_idx],
+                "age_impact": self.age_factor[age_idx],
+                "location_demand": self.location_factor[level_idx],
+                "seasonal_factor": self.seasonal_factor[season_idx]
+            },
+            "market_trend": self.trend[season_idx],
+            "guidance_message": GUIDANCE_MESSAGE
+        }
@@ -0,0 +1,272 @@
+"""Time-slot availability index: per-listing booking bitsets for interval-availability queries"""
+import time
+import threading
+import logging
+import numpy as np
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.recommendations.catalog import CatalogSnapshot
+
+logger = logging.getLogger(__name__)
+
+WORD_BITS = 64
+# Rental statuses that hold the equipment (cancelled/completed rentals free their slots)
+BLOCKING_RENTAL_STATUSES = {"pending", "approved", "active"}
+# Every equipment_availability row (booked, tentative, maintenance, blocked) takes its slots
+BOOKING_SOURCES = (
+    ("equipment_availability", "id, equipment_id, start_date, end_date, status, updated_at"),
+    ("rentals", "id, equipment_id, start_date, end_date, status, updated_at, deleted_at"),
+)
+
+
+class OutsideHorizon(ValueError):
+    """Queried window ends after the indexed horizon, so its availability is unknown"""
+
+
+def to_epoch(value: Any) -> float:
+    """Seconds since the epoch for a datetime or ISO-8601 string (naive values are taken in MARKETPLACE_TIMEZONE)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=ZoneInfo(settings.MARKETPLACE_TIMEZONE))
+    return value.timestamp()
+
+
+def _bit_mask(start_slot: int, end_slot: int, words: int) -> np.ndarray:
+    """uint64 words with bits [start_slot, end_slot) set"""
+    bits = np.zeros(words * WORD_BITS, dtype=bool)
+    bits[max(start_slot, 0):max(end_slot, 0)] = True
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+class AvailabilityIndex:
+    """
+    Booked time slots of every listing as packed bitsets: a (listings x words) uint64 matrix whose
+    bit `s` is set when slot `s` (AVAILABILITY_SLOT_HOURS wide, counted from today's midnight in
+    MARKETPLACE_TIMEZONE up to AVAILABILITY_HORIZON_DAYS ahead) is taken. Slots start at local
+    midnight so that a booking for a whole marketplace day takes exactly that day's slots.
+
+    "Free between start and end" is one AND of the matrix with an interval mask over the few words
+    the interval touches, vectorized over all listings. Booking changes are polled incrementally
+    (`updated_at` watermark) or pushed via `notify_changed`; only the affected listings' rows are
+    recomputed. The horizon slides forward daily with a full reload, which also drops past bookings.
+    """
+
+    def __init__(self, supabase=None, refresh_interval: float = None, slot_hours: int = None, horizon_days: int = None):
+        self.supabase = supabase
+        self.refresh_interval = settings.AVAILABILITY_REFRESH_SECONDS if refresh_interval is None else refresh_interval
+        self.slot_seconds = (slot_hours or settings.AVAILABILITY_SLOT_HOURS) * 3600
+        self.slots = (horizon_days or settings.AVAILABILITY_HORIZON_DAYS) * 86400 // self.slot_seconds
+        self.words = -(-self.slots // WORD_BITS)
+        self.generation = 0  # Bumped on every change; part of recommendation cache keys for filtered requests
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._bookings: Dict[str, Tuple[str, float, float]] = {}  # booking key -> (equipment_id, start, end)
+        self._by_equipment: Dict[str, Set[str]] = {}
+        self._row_of: Dict[str, int] = {}
+        self._bits = np.zeros((0, self.words), dtype=np.uint64)
+        self._origin = self._current_origin()
+        self._watermark: Optional[str] = None
+        self._pending_ids: Set[str] = set()
+        self._dirty = False
+        self._last_refresh = time.monotonic()
+        self._aligned: Tuple[Any, np.ndarray] = (None, np.empty(0, dtype=np.int64))
+        if self.supabase:
+            self._load_full()
+
+    @staticmethod
+    def _current_origin() -> float:
+        """Epoch seconds of today's midnight in the marketplace timezone"""
+        now = datetime.now(ZoneInfo(settings.MARKETPLACE_TIMEZONE))
+        return now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+    # Slots
+
+    def slot_range(self, start: Any, end: Any) -> Tuple[int, int]:
+        """Half-open slot range covering [start, end), clipped to the horizon"""
+        start_slot = int((to_epoch(start) - self._origin) // self.slot_seconds)
+        end_slot = int(-((self._origin - to_epoch(end)) // self.slot_seconds))  # ceil
+        return max(start_slot, 0), min(end_slot, self.slots)
+
+    def _query_range(self, start: Any, end: Any) -> Tuple[int, int]:
+        """`slot_range` for a queried window; a window reaching past the horizon is rejected, not clipped"""
+        horizon_end = self._origin + self.slots * self.slot_seconds
+        if to_epoch(end) > horizon_end:
+            last = datetime.fromtimestamp(horizon_end, tz=ZoneInfo(settings.MARKETPLACE_TIMEZONE))
+            raise OutsideHorizon(f"Availability is only indexed until {last.isoformat()}")
+        return self.slot_range(start, end)
+
+    def _recompute_rows(self, equipment_ids: Iterable[str]):
+        """Rebuild the bitset rows of `equipment_ids` from their current bookings (lock held)"""
+        for equipment_id in equipment_ids:
+            row = self._row_of.get(equipment_id)
+            if row is None:
+                if not self._by_equipment.get(equipment_id):
+                    continue
+                row = self._row_of[equipment_id] = len(self._row_of)
+                if row >= len(self._bits):
+                    grown = np.zeros((max(64, 2 * len(self._bits)), self.words), dtype=np.uint64)
+                    grown[:len(self._bits)] = self._bits
+                    self._bits = grown
+            bits = np.zeros(self.slots, dtype=bool)
+            for key in self._by_equipment.get(equipment_id, ()):
+                _, start, end = self._bookings[key]
+                s0, s1 = self.slot_range(start, end)
+                bits[s0:s1] = True
+            padded = np.zeros(self.words * WORD_BITS, dtype=bool)
+            padded[:self.slots] = bits
+            self._bits[row] = np.packbits(padded, bitorder="little").view(np.uint64)
+        self.generation += 1
+
+    def _apply(self, rows: List[Dict[str, Any]], source: str):
+        """Upsert/remove booking rows from `equipment_availability` or `rentals` (lock held)"""
+        touched = set()
+        for r in rows:
+            key = f"{source}:{r['id']}"
+            blocking = r.get("deleted_at") is None and (
+                source != "rentals" or r.get("status") in BLOCKING_RENTAL_STATUSES
+            )
+            previous = self._bookings.pop(key, None)
+            if previous is not None:
+                self._by_equipment.get(previous[0], set()).discard(key)
+                touched.add(previous[0])
+            if blocking and r.get("start_date") and r.get("end_date"):
+                equipment_id = str(r["equipment_id"])
+                self._bookings[key] = (equipment_id, to_epoch(r["start_date"]), to_epoch(r["end_date"]))
+                self._by_equipment.setdefault(equipment_id, set()).add(key)
+                touched.add(equipment_id)
+            if r.get("updated_at") and (self._watermark is None or r["updated_at"] > self._watermark):
+                self._watermark = r["updated_at"]
+        if touched:
+            self._recompute_rows(touched)
+
+    # Loading
+
+    def _fetch(self, table: str, columns: str, since: Optional[str] = None, ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Keyset-paginated booking rows ending after the horizon origin (or changed since `since`)"""
+        rows, last_id = [], None
+        page_size = settings.CATALOG_PAGE_SIZE
+        origin = datetime.fromtimestamp(self._origin, tz=timezone.utc).isoformat()
+        while True:
+            query = self.supabase.table(table).select(columns)
+            if since is not None:
+                query = query.gte("updated_at", since)
+            else:
+                query = query.gte("end_date", origin)
+            if ids is not None:
+                query = query.in_("equipment_id", ids)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            page = query.order("id").limit(page_size).execute().data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            last_id = page[-1]["id"]
+
+    def _load_full(self):
+        try:
+            started = datetime.now(timezone.utc).isoformat()
+            fetched = [(table, self._fetch(table, columns)) for table, columns in BOOKING_SOURCES]
+            with self._lock:
+                self._bookings.clear()
+                self._by_equipment.clear()
+                self._row_of.clear()
+                self._bits = np.zeros((0, self.words), dtype=np.uint64)
+                self._watermark = None
+                for table, rows in fetched:
+                    self._apply(rows, table)
+                if self._watermark is None:
+                    # No bookings yet: poll for anything changed since this load started
+                    self._watermark = started
+                self.generation += 1
+            logger.info(f"Availability index loaded: {len(self._bookings)} bookings over {len(self._row_of)} listings")
+        except Exception as e:
+            logger.error(f"Failed to load bookings for the availability index: {e}")
+
+    def notify_changed(self, equipment_ids: Optional[Iterable[str]] = None):
+        """Booking change notification: re-fetch the listings' bookings (catches deletions) or poll all changes"""
+        if equipment_ids:
+            self._pending_ids.update(str(i) for i in equipment_ids)
+        self._dirty = True
+        self.maybe_refresh()
+
+    def maybe_refresh(self):
+        """Start a background refresh if the poll interval elapsed or a change was notified"""
+        if not self.supabase:
+            return
+        if not self._dirty and time.monotonic() - self._last_refresh < self.refresh_interval:
+            return
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def refresh(self):
+        """Apply booking changes since the last watermark; reload with a new horizon when the day rolled over"""
+        if not self.supabase or not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_refresh = time.monotonic()
+            self._dirty = False
+            if self._current_origin() != self._origin or self._watermark is None:
+                # Past bookings drop out and the horizon extends by a day (or the last full load failed)
+                self._origin = self._current_origin()
+                self._pending_ids.clear()
+                self._load_full()
+                return
+            ids, self._pending_ids = list(self._pending_ids), set()
+            for table, columns in BOOKING_SOURCES:
+                rows = self._fetch(table, columns, since=self._watermark) if self._watermark else []
+                current = self._fetch(table, columns, ids=ids) if ids else []
+                with self._lock:
+                    # Full booking set of notified listings: anything held but no longer returned was deleted
+                    seen = {f"{table}:{r['id']}" for r in current}
+                    gone = [
+                        {"id": key.split(":", 1)[1], "deleted_at": "deleted"}
+                        for i in ids for key in list(self._by_equipment.get(i, ()))
+                        if key.startswith(f"{table}:") and key not in seen
+                    ]
+                    self._apply(rows + current + gone, table)
+        except Exception as e:
+            logger.error(f"Incremental availability refresh failed: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    # Queries
+
+    def _rows_for(self, snapshot: CatalogSnapshot) -> np.ndarray:
+        """Index row of every snapshot row (-1 for listings without bookings), cached per version"""
+        key = (snapshot.version, len(self._row_of))
+        if self._aligned[0] != key:
+            rows = np.fromiter((self._row_of.get(i, -1) for i in snapshot.ids), dtype=np.int64, count=len(snapshot))
+            self._aligned = (key, rows)
+        return self._aligned[1]
+
+    def free_mask(self, snapshot: CatalogSnapshot, start: Any, end: Any) -> np.ndarray:
+        """Boolean mask of snapshot rows with no booking overlapping [start, end); OutsideHorizon past the horizon"""
+        s0, s1 = self._query_range(start, end)
+        free = np.ones(len(snapshot), dtype=bool)
+        if s1 <= s0:
+            return free
+        with self._lock:
+            rows = self._rows_for(snapshot)
+            w0, w1 = s0 // WORD_BITS, -(-s1 // WORD_BITS)
+            mask = _bit_mask(s0, s1, self.words)[w0:w1]
+            booked = rows >= 0
+            if booked.any():
+                tiles = self._bits[rows[booked], w0:w1]
+                free[booked] = ~np.any(tiles & mask, axis=1)
+        return free
+
+    def is_free(self, equipment_id: str, start: Any, end: Any) -> bool:
+        s0, s1 = self._query_range(start, end)
+        row = self._row_of.get(equipment_id)
+        if row is None or s1 <= s0:
+            return True
+        w0, w1 = s0 // WORD_BITS, -(-s1 // WORD_BITS)
+        return not np.any(self._bits[row, w0:w1] & _bit_mask(s0, s1, self.words)[w0:w1])
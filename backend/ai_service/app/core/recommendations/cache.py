@@ -0,0 +1,147 @@
+"""Deterministic score jitter, ranked-list cache (LRU/TTL) and opaque pagination cursors"""
+import time
+import base64
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from app.config import settings
+from app.core.metrics import metrics
+
+JITTER_SCALE = 0.05
+
+CACHE_HITS = metrics.counter("recommend_cache_hits_total", "Recommendation requests served from a cached ranked list")
+CACHE_MISSES = metrics.counter("recommend_cache_misses_total", "Recommendation requests that had to be scored")
+CACHE_HIT_RATIO = metrics.gauge("recommend_cache_hit_ratio", "Hits / lookups of the recommendation result cache")
+CACHE_ENTRIES = metrics.gauge("recommend_cache_entries", "Ranked lists held in the recommendation result cache")
+
+
+def stable_hash(value: str) -> int:
+    """64-bit hash that is identical across processes (unlike the salted built-in `hash`)"""
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "little")
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: decorrelates nearby uint64 inputs"""
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def seeded_jitter(id_hashes: np.ndarray, request_key: str, seed: int = None) -> np.ndarray:
+    """
+    Uniform [0, JITTER_SCALE) tie-breaking noise per listing, fixed by (seed, request, listing id).
+
+    The same request always sees the same ordering, different requests still get varied
+    tie-breaks, and a listing's jitter does not depend on its row position in the snapshot.
+    """
+    seed = settings.RECOMMEND_JITTER_SEED if seed is None else seed
+    salt = np.uint64(stable_hash(f"{seed}\x1f{request_key}"))
+    bits = _mix64(id_hashes ^ salt)
+    return (bits >> np.uint64(11)).astype(np.float64) * (JITTER_SCALE / float(1 << 53))
+
+
+class InvalidCursor(ValueError):
+    """Cursor is malformed, tampered with or belongs to another user"""
+
+
+class ExpiredCursor(InvalidCursor):
+    """Cursor's ranked list expired (TTL, eviction or catalog change)"""
+
+
+def list_key(*parts) -> str:
+    """Id of the ranked list for a normalized request (parts include the catalog version)"""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:24]
+
+
+def encode_cursor(list_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{list_id}:{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        list_id, offset = raw.split(":")
+        offset = int(offset)
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    if offset < 0:
+        raise InvalidCursor("Malformed cursor")
+    return list_id, offset
+
+
+class RankedList:
+    """Top rows of one scored request, best first, with what is needed to render any page of it"""
+
+    def __init__(self, version: int, rows: np.ndarray, scores: np.ndarray, reasons: np.ndarray, total_count: int,
+                 algorithm: str, user_role: str, location: Optional[str], user_id: Optional[str] = None):
+        self.version = version          # Catalog snapshot the rows refer to
+        self.rows = rows
+        self.scores = scores
+        self.reasons = reasons          # Per-row reason flags
+        self.total_count = total_count  # Candidates before truncation to the ranked depth
+        self.algorithm = algorithm
+        self.user_role = user_role
+        self.location = location
+        self.user_id = user_id          # Set for personalized lists; cursors are then bound to the user
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of ranked results with a per-entry TTL.
+
+    Keys carry the catalog version, so entries for an older snapshot can never be served;
+    `clear()` is also called on every catalog swap to release them immediately.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = settings.RECOMMEND_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl = settings.RECOMMEND_CACHE_TTL_SECONDS if ttl is None else ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._lookups = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if self.max_entries <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._lookups += 1
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            ratio = self._hits / self._lookups
+        (CACHE_HITS if entry is not None else CACHE_MISSES).inc()
+        CACHE_HIT_RATIO.set(ratio)
+        return entry[1] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            size = len(self._entries)
+        CACHE_ENTRIES.set(size)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        CACHE_ENTRIES.set(0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        return self._hits / self._lookups if self._lookups else 0.0
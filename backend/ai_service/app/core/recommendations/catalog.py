@@ -0,0 +1,446 @@
+"""Equipment catalog snapshot with incremental refresh"""
+import time
+import random
+import threading
+import logging
+import numpy as np
+from typing import List, Dict, Any, Optional, Iterable, Callable
+
+from app.config import settings
+from app.core.recommendations.embedding_store import EmbeddingStore
+from app.core.recommendations.geo import GeoIndex, get_gazetteer
+from app.core.recommendations.quantization import QuantizedIndex
+from app.core.recommendations.cache import stable_hash
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLUMNS = (
+    "id, name, type, category, pricing, location, available, verification_status, "
+    "reliability_score, image_url, specifications, updated_at, deleted_at"
+)
+
+
+def embedding_text(item: Dict[str, Any]) -> str:
+    """Passage text used to embed a listing"""
+    specs = item.get("specifications") or {}
+    return f"passage: {item['name']} {item['category']} {item['type']} {specs.get('horsepower', '')} HP"
+
+
+def row_to_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an `equipment` row into the recommender's item dict"""
+    price = row.get("pricing", {}).get("per_hour", 50) if isinstance(row.get("pricing"), dict) else 50
+    loc = row.get("location", {})
+    loc_str = loc.get("city", "Unknown") if isinstance(loc, dict) else str(loc)
+    coordinates = None
+    if isinstance(loc, dict) and loc.get("lat") is not None and loc.get("lng") is not None:
+        coordinates = (float(loc["lat"]), float(loc["lng"]))
+    return {
+        "equipment_id": str(row["id"]),
+        "name": row.get("name", "Unknown Equipment"),
+        "type": row.get("type", "unknown"),
+        "category": row.get("category", "unknown"),
+        "price_per_hour": price,
+        "location": loc_str,
+        "coordinates": coordinates,
+        "available": row.get("available", False),
+        "verification_status": row.get("verification_status", "unverified"),
+        "reliability_score": float(row.get("reliability_score") or 5.0),
+        "rating": float(row.get("reliability_score") or 5.0), # Using reliability as rating surrogate for logic
+        "total_rentals": 0,
+        "image_url": row.get("image_url", ""),
+        "specifications": row.get("specifications", {})
+    }
+
+
+def create_mock_equipment() -> List[Dict[str, Any]]:
+    """Create mock equipment data for demo"""
+    equipment_types = [
+        ("John Deere 6M Series Tractor", "tractor", "agriculture"),
+        ("Caterpillar 320 Excavator", "excavator", "construction"),
+        ("Bobcat S650 Skid Steer", "skid_steer", "construction"),
+        ("Case IH Magnum Tractor", "tractor", "agriculture"),
+        ("Komatsu PC210 Excavator", "excavator", "construction"),
+        ("New Holland T7 Series", "tractor", "agriculture"),
+        ("JCB 3CX Backhoe", "backhoe", "construction"),
+        ("Kubota M7 Tractor", "tractor", "agriculture"),
+        ("Volvo EC220 Excavator", "excavator", "construction"),
+        ("Massey Ferguson 7700 Series", "tractor", "agriculture"),
+    ]
+
+    equipment = []
+    for idx, (name, equip_type, category) in enumerate(equipment_types):
+        equipment.append({
+            "equipment_id": f"equip_{idx + 1:03d}",
+            "name": name,
+            "type": equip_type,
+            "category": category,
+            "price_per_hour": round(random.uniform(35, 120), 2),
+            "location": random.choice(["Iowa", "Texas", "California", "Florida"]),
+            "available": random.choice([True, True, True, False]),
+            "verification_status": random.choice(["verified", "verified", "unverified", "flagged"]),
+            "reliability_score": round(random.uniform(2.5, 5.0), 2),
+            "rating": round(random.uniform(3.5, 5.0), 1),
+            "total_rentals": random.randint(10, 500),
+            "image_url": f"https://example.com/equipment/{idx + 1}.jpg",
+            "specifications": {
+                "year": random.randint(2018, 2024),
+                "horsepower": random.randint(80, 200)
+            }
+        })
+    return equipment
+
+
+# Columnar layout: categorical fields hold int32 codes into a per-snapshot vocabulary
+CATEGORICAL_COLUMNS = ("type", "category", "location", "verification_status")
+NUMERIC_COLUMNS = {
+    "price_per_hour": np.float64,
+    "available": np.bool_,
+    "reliability_score": np.float64,
+    "rating": np.float64,
+    "total_rentals": np.int64,
+}
+OBJECT_COLUMNS = ("equipment_id", "name", "image_url", "specifications", "coordinates")
+ITEM_DEFAULTS = {
+    "type": "unknown", "category": "unknown", "location": "Unknown", "verification_status": "unverified",
+    "price_per_hour": 0.0, "available": False, "reliability_score": 5.0, "rating": 0.0, "total_rentals": 0,
+    "name": "Unknown Equipment", "image_url": "", "specifications": None, "coordinates": None,
+}
+
+
+def _encode_items(items: List[Dict[str, Any]], vocab: Dict[str, List[str]]) -> tuple:
+    """Encode item dicts into columns, extending (a copy of) `vocab` with unseen values"""
+    vocab = {name: list(vocab.get(name, [])) for name in CATEGORICAL_COLUMNS}
+    columns: Dict[str, np.ndarray] = {}
+    for name in CATEGORICAL_COLUMNS:
+        lookup = {v: i for i, v in enumerate(vocab[name])}
+        codes = np.empty(len(items), dtype=np.int32)
+        for row, item in enumerate(items):
+            value = item.get(name, ITEM_DEFAULTS[name])
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(vocab[name])
+                vocab[name].append(value)
+            codes[row] = code
+        columns[name] = codes
+    for name, dtype in NUMERIC_COLUMNS.items():
+        columns[name] = np.array([item.get(name, ITEM_DEFAULTS[name]) for item in items], dtype=dtype)
+    for name in OBJECT_COLUMNS:
+        column = np.empty(len(items), dtype=object)
+        column[:] = [item.get(name, ITEM_DEFAULTS.get(name)) for item in items]
+        columns[name] = column
+    return columns, vocab
+
+
+class CatalogSnapshot:
+    """
+    Immutable columnar view of the catalog: NumPy columns, embeddings and an id -> row index.
+
+    Use `item(row)` to materialize a single listing as a dict (e.g. for responses).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], vocab: Dict[str, List[str]], embeddings: Optional[np.ndarray],
+                 version: int, watermark: Optional[str], changes: Optional[tuple] = None):
+        self.columns = columns
+        self.vocab = vocab
+        self.embeddings = embeddings
+        self.version = version
+        self.watermark = watermark  # Highest `updated_at` seen, used for the next incremental poll
+        self.changes = changes      # (changed ids, deleted ids) relative to version - 1
+        self.ids = columns["equipment_id"]
+        self.index = {equipment_id: i for i, equipment_id in enumerate(self.ids)}
+        # Lower-cased location vocabulary so substring matching runs once per distinct location
+        self.location_lower = np.array([loc.lower() for loc in vocab["location"]], dtype=object)
+        self._geo_index: Optional[GeoIndex] = None
+        self._similarity_index: Optional[QuantizedIndex] = None
+        self._id_hashes: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_items(cls, items: List[Dict[str, Any]], embeddings: Optional[np.ndarray], version: int,
+                   watermark: Optional[str], changes: Optional[tuple] = None) -> "CatalogSnapshot":
+        columns, vocab = _encode_items(items, {})
+        return cls(columns, vocab, embeddings, version, watermark, changes)
+
+    def merged(self, keep_rows: np.ndarray, new_items: List[Dict[str, Any]]) -> tuple:
+        """Columns for `self[keep_rows]` followed by `new_items` (vocabularies only grow)"""
+        new_columns, vocab = _encode_items(new_items, self.vocab)
+        columns = {
+            name: np.concatenate([column[keep_rows], new_columns[name]])
+            for name, column in self.columns.items()
+        }
+        return columns, vocab
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def decode(self, name: str, rows=None) -> np.ndarray:
+        """Decoded values of a categorical column"""
+        codes = self.columns[name] if rows is None else self.columns[name][rows]
+        return np.asarray(self.vocab[name], dtype=object)[codes]
+
+    def code(self, name: str, value: str) -> int:
+        """Code of `value` in a categorical column, or -1 if it never occurs"""
+        vocab = self.vocab[name]
+        return vocab.index(value) if value in vocab else -1
+
+    def location_match(self, location: str) -> np.ndarray:
+        """Boolean mask of rows whose location contains `location` (case-insensitive)"""
+        query = location.lower()
+        vocab_match = np.array([query in loc for loc in self.location_lower], dtype=bool)
+        return vocab_match[self.columns["location"]] if len(vocab_match) else np.zeros(len(self), dtype=bool)
+
+    def matching_locations(self, location: str) -> List[str]:
+        """Lowercased listing locations `location_match` accepts (the values filtered on in Qdrant)"""
+        query = location.lower()
+        return [loc for loc in self.location_lower if query in loc]
+
+    def geo_index(self) -> GeoIndex:
+        """Radius index over listing coordinates, built on first use"""
+        if self._geo_index is None:
+            # Geocode each distinct location once; explicit listing coordinates take precedence
+            gazetteer = get_gazetteer()
+            by_location = np.array(
+                [gazetteer.geocode(loc) or (np.nan, np.nan) for loc in self.vocab["location"]], dtype=np.float64
+            ).reshape(-1, 2)
+            coords = by_location[self.columns["location"]]
+            explicit = [row for row, c in enumerate(self.columns["coordinates"]) if c]
+            if explicit:
+                coords[explicit] = [self.columns["coordinates"][row] for row in explicit]
+            self._geo_index = GeoIndex(coords[:, 0], coords[:, 1])
+            logger.info(f"Geo index built: {len(self._geo_index)} of {len(self)} listings located")
+        return self._geo_index
+
+    def id_hashes(self) -> np.ndarray:
+        """Stable 64-bit hash per listing id (keys per-listing jitter), computed on first use"""
+        if self._id_hashes is None:
+            self._id_hashes = np.fromiter((stable_hash(i) for i in self.ids), dtype=np.uint64, count=len(self))
+        return self._id_hashes
+
+    def similarity_index(self) -> Optional[QuantizedIndex]:
+        """Quantized cosine index over the embeddings (CATALOG_SIMILARITY_DTYPE), built on first use"""
+        if self._similarity_index is None and self.embeddings is not None:
+            self._similarity_index = QuantizedIndex(self.embeddings)
+            logger.info(f"Similarity index built: {len(self)} listings as {self._similarity_index.mode} "
+                        f"({self._similarity_index.nbytes / 1e6:.1f} MB)")
+        return self._similarity_index
+
+    def nearby(self, location: str, budget: int) -> np.ndarray:
+        """Rows around the geocoded `location`, expanding in radius rings until `budget` is filled"""
+        point = get_gazetteer().geocode(location)
+        if point is None:
+            return np.empty(0, dtype=np.intp)
+        return self.geo_index().expand(point[0], point[1], budget)
+
+    def item(self, row: int) -> Dict[str, Any]:
+        """Materialize one listing as the recommender's item dict"""
+        item = {"equipment_id": self.ids[row]}
+        for name in CATEGORICAL_COLUMNS:
+            item[name] = self.vocab[name][self.columns[name][row]]
+        for name in NUMERIC_COLUMNS:
+            item[name] = self.columns[name][row].item()
+        for name in OBJECT_COLUMNS[1:]:
+            item[name] = self.columns[name][row]
+        return item
+
+    def embedding_texts(self) -> List[str]:
+        """Passage texts for every row, matching `embedding_text(item)`"""
+        types, categories = self.vocab["type"], self.vocab["category"]
+        return [
+            f"passage: {name} {categories[c]} {types[t]} {(specs or {}).get('horsepower', '')} HP"
+            for name, c, t, specs in zip(
+                self.columns["name"], self.columns["category"], self.columns["type"], self.columns["specifications"]
+            )
+        ]
+
+
+def diff_snapshots(old: CatalogSnapshot, new: CatalogSnapshot) -> tuple:
+    """Rows of `new` that are new or changed since `old`, and ids that disappeared"""
+    if new.changes is not None and new.version == old.version + 1:
+        changed_ids, deleted = new.changes
+        return [new.index[i] for i in changed_ids if i in new.index], list(deleted)
+    changed = [
+        row for row, equipment_id in enumerate(new.ids)
+        if equipment_id not in old.index or old.item(old.index[equipment_id]) != new.item(row)
+    ]
+    deleted = [equipment_id for equipment_id in old.index if equipment_id not in new.index]
+    return changed, deleted
+
+
+class CatalogStore:
+    """
+    Holds the current CatalogSnapshot and refreshes it incrementally.
+
+    Refreshes poll rows whose `updated_at` moved past the last watermark (or a
+    specific list of ids after a change notification), re-embed only rows whose
+    passage text changed (via EmbeddingStore), and publish a new snapshot with a
+    single reference swap.
+    """
+
+    def __init__(self, supabase=None, encoder=None, refresh_interval: float = None, embedding_store: EmbeddingStore = None):
+        self.supabase = supabase
+        self.encoder = encoder
+        self.embedding_store = embedding_store
+        self.refresh_interval = settings.CATALOG_REFRESH_SECONDS if refresh_interval is None else refresh_interval
+        self.page_size = settings.CATALOG_PAGE_SIZE
+        self._lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending_ids: set = set()
+        self._listeners: List[Callable[[Optional[CatalogSnapshot], CatalogSnapshot], None]] = []
+        self._dirty = False
+        self._last_refresh = time.monotonic()
+        self._snapshot = self._load_full()
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    def subscribe(self, listener: Callable[[Optional[CatalogSnapshot], CatalogSnapshot], None]):
+        """Register `listener(old, new)`, called after every snapshot swap (old is None for the initial load)"""
+        self._listeners.append(listener)
+
+    def _publish(self, old: Optional[CatalogSnapshot], new: CatalogSnapshot):
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                logger.error(f"Catalog listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+    def _encode(self, snapshot: CatalogSnapshot) -> Optional[np.ndarray]:
+        """Embeddings aligned with the snapshot rows; the persistent store re-encodes only changed texts"""
+        if self.encoder is None or not len(snapshot):
+            return None
+        texts = snapshot.embedding_texts()
+        if self.embedding_store is not None:
+            return self.embedding_store.sync(list(snapshot.ids), texts, self._encode_texts)
+        return self._encode_texts(texts)
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        # Catalog passages bypass the embedder's LRU cache; the embedding store is their cache
+        return self.encoder.encode(texts, kind="passage", use_cache=False)
+
+    def _with_embeddings(self, snapshot: CatalogSnapshot) -> CatalogSnapshot:
+        snapshot.embeddings = self._encode(snapshot)
+        return snapshot
+
+    def _fetch_rows(self, since: Optional[str] = None, ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch rows with keyset pagination on id, optionally limited to changes or specific ids"""
+        rows = []
+        last_id = None
+        while True:
+            query = self.supabase.table("equipment").select(CATALOG_COLUMNS)
+            if since is not None:
+                query = query.gte("updated_at", since)
+            elif ids is not None:
+                query = query.in_("id", ids)
+            else:
+                query = query.is_("deleted_at", "null")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            page = query.order("id").limit(self.page_size).execute().data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+            last_id = page[-1]["id"]
+
+    def _load_rows(self, version: int) -> Optional[CatalogSnapshot]:
+        """Every live row from Supabase as a snapshot, or None if the table is empty or unreachable"""
+        try:
+            rows = self._fetch_rows()
+            items = [row_to_item(r) for r in rows]
+            if items:
+                watermark = max((r.get("updated_at") or "" for r in rows), default="") or None
+                logger.info(f"Catalog loaded: {len(items)} listings")
+                return self._with_embeddings(CatalogSnapshot.from_items(items, None, version, watermark))
+        except Exception as e:
+            logger.error(f"Failed to fetch equipment from DB: {e}")
+        return None
+
+    def _load_full(self) -> CatalogSnapshot:
+        """Initial load: every live row from Supabase, or mock data (watermark None) until real rows load"""
+        snapshot = self._load_rows(1) if self.supabase else None
+        if snapshot is not None:
+            return snapshot
+        items = create_mock_equipment()
+        return self._with_embeddings(CatalogSnapshot.from_items(items, None, 1, None))
+
+    def notify_changed(self, equipment_ids: Optional[Iterable[str]] = None):
+        """Change notification: refresh the given ids (or poll all changes) on the next check"""
+        if equipment_ids:
+            with self._pending_lock:
+                self._pending_ids.update(str(i) for i in equipment_ids)
+        self._dirty = True
+        self.maybe_refresh()
+
+    def maybe_refresh(self):
+        """Start a background refresh if the poll interval elapsed or a change was notified"""
+        if not self.supabase:
+            return
+        if not self._dirty and time.monotonic() - self._last_refresh < self.refresh_interval:
+            return
+        if self._lock.locked():
+            return
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def refresh(self) -> bool:
+        """Apply changed rows to a new snapshot and swap it in. Returns True if anything changed."""
+        if not self.supabase or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_refresh = time.monotonic()
+            self._dirty = False
+            with self._pending_lock:
+                ids, self._pending_ids = list(self._pending_ids), set()
+            current = self._snapshot
+            if current.watermark is None:
+                # Still on mock data after an empty or failed initial load: retry the full load
+                new_snapshot = self._load_rows(current.version + 1) or current
+            else:
+                rows = self._fetch_rows(since=current.watermark)
+                if ids:
+                    rows.extend(self._fetch_rows(ids=ids))
+                if not rows:
+                    return False
+                new_snapshot = self._apply(current, rows)
+            if new_snapshot is not current:
+                self._snapshot = new_snapshot
+                logger.info(f"Catalog v{new_snapshot.version}: {len(new_snapshot)} listings after incremental refresh")
+                self._publish(current, new_snapshot)
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"Incremental catalog refresh failed: {e}")
+            return False
+        finally:
+            self._lock.release()
+
+    def _apply(self, current: CatalogSnapshot, rows: List[Dict[str, Any]]) -> CatalogSnapshot:
+        """Merge changed rows into `current`; the embedding store re-encodes only changed texts"""
+        upserts: Dict[str, Dict[str, Any]] = {}
+        deletes = set()
+        watermark = current.watermark
+        for row in rows:
+            equipment_id = str(row["id"])
+            if row.get("deleted_at"):
+                deletes.add(equipment_id)
+                upserts.pop(equipment_id, None)
+            else:
+                upserts[equipment_id] = row_to_item(row)
+                deletes.discard(equipment_id)
+            if row.get("updated_at") and (watermark is None or row["updated_at"] > watermark):
+                watermark = row["updated_at"]
+
+        # Drop rows we already hold unchanged (the poll is inclusive of the watermark)
+        upserts = {
+            i: item for i, item in upserts.items()
+            if i not in current.index or current.item(current.index[i]) != item
+        }
+        deletes &= set(current.index)
+        if not upserts and not deletes:
+            return current
+
+        # Unchanged rows are gathered column-wise; changed and new rows are appended
+        keep = np.ones(len(current), dtype=bool)
+        keep[[current.index[i] for i in deletes | (upserts.keys() & current.index.keys())]] = False
+        keep_rows = np.flatnonzero(keep)
+        columns, vocab = current.merged(keep_rows, list(upserts.values()))
+        snapshot = CatalogSnapshot(columns, vocab, None, current.version + 1, watermark, (list(upserts), list(deletes)))
+        return self._with_embeddings(snapshot)
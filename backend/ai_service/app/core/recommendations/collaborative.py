@@ -0,0 +1,211 @@
+"""Implicit-feedback collaborative filtering (ALS over booking and view events)"""
+import os
+import time
+import threading
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Iterable, Tuple
+
+from app.config import settings
+
+try:
+    import scipy.sparse as sp
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+logger = logging.getLogger(__name__)
+
+# Implicit signal strength per event kind (summed per user-item pair)
+EVENT_WEIGHTS = {
+    "booking": 5.0,
+    "view": 1.0,
+}
+
+
+def fetch_interactions(client, page_size: int = None) -> List[Tuple[str, str, float]]:
+    """
+    Pull (user_id, equipment_id, weight) events: non-cancelled rentals are bookings,
+    `user_activity` rows with activity_type 'view' are views. Keyset-paginated on id.
+    """
+    page_size = page_size or settings.CATALOG_PAGE_SIZE
+    events: List[Tuple[str, str, float]] = []
+    sources = [
+        ("rentals", "id, renter_id, equipment_id", "renter_id", "equipment_id", "booking",
+         lambda q: q.neq("status", "cancelled").is_("deleted_at", "null")),
+        ("user_activity", "id, user_id, reference_id", "user_id", "reference_id", "view",
+         lambda q: q.eq("activity_type", "view").not_.is_("reference_id", "null")),
+    ]
+    for table, columns, user_col, item_col, kind, where in sources:
+        last_id = None
+        while True:
+            query = where(client.table(table).select(columns))
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = query.order("id").limit(page_size).execute().data or []
+            events.extend((str(r[user_col]), str(r[item_col]), EVENT_WEIGHTS[kind]) for r in rows)
+            if len(rows) < page_size:
+                break
+            last_id = rows[-1]["id"]
+    return events
+
+
+def interaction_matrix(events: Iterable[Tuple[str, str, float]]) -> tuple:
+    """Sparse (users x items) CSR matrix of summed event weights, plus the user and item id lists"""
+    user_index: Dict[str, int] = {}
+    item_index: Dict[str, int] = {}
+    rows, cols, weights = [], [], []
+    for user_id, item_id, weight in events:
+        rows.append(user_index.setdefault(user_id, len(user_index)))
+        cols.append(item_index.setdefault(item_id, len(item_index)))
+        weights.append(weight)
+    matrix = sp.csr_matrix(
+        (np.asarray(weights, dtype=np.float32), (rows, cols)), shape=(len(user_index), len(item_index))
+    )
+    matrix.sum_duplicates()
+    return matrix, list(user_index), list(item_index)
+
+
+def _als_step(confidence, fixed: np.ndarray, regularization: float) -> np.ndarray:
+    """Solve every row's factors against the fixed side (Hu, Koren & Volinsky weighted least squares)"""
+    fixed64 = fixed.astype(np.float64)
+    gram = fixed64.T @ fixed64
+    reg = regularization * np.eye(fixed.shape[1])
+    solved = np.zeros((confidence.shape[0], fixed.shape[1]), dtype=np.float32)
+    indptr, indices, data = confidence.indptr, confidence.indices, confidence.data
+    for row in range(confidence.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        f = fixed64[indices[start:end]]
+        c = data[start:end].astype(np.float64)  # alpha * r, i.e. confidence - 1
+        a = gram + (f.T * c) @ f + reg
+        b = f.T @ (1.0 + c)
+        solved[row] = np.linalg.solve(a, b)
+    return solved
+
+
+def train_als(matrix, factors: int = 32, regularization: float = 0.05, alpha: float = 20.0,
+              iterations: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Implicit ALS on a (users x items) weight matrix; returns float32 user and item factors"""
+    rng = np.random.default_rng(seed)
+    confidence = matrix.astype(np.float32).tocsr() * alpha
+    confidence_t = confidence.T.tocsr()
+    users = (rng.standard_normal((matrix.shape[0], factors)) * 0.01).astype(np.float32)
+    items = (rng.standard_normal((matrix.shape[1], factors)) * 0.01).astype(np.float32)
+    for it in range(iterations):
+        started = time.perf_counter()
+        users = _als_step(confidence, items, regularization)
+        items = _als_step(confidence_t, users, regularization)
+        logger.info(f"ALS iteration {it + 1}/{iterations} in {time.perf_counter() - started:.2f}s")
+    return users, items
+
+
+class CollaborativeModel:
+    """User and item factors (float32) with id lookups; scores are plain dot products"""
+
+    def __init__(self, user_ids: np.ndarray, item_ids: np.ndarray, user_factors: np.ndarray, item_factors: np.ndarray):
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.user_factors = np.ascontiguousarray(user_factors, dtype=np.float32)
+        self.item_factors = np.ascontiguousarray(item_factors, dtype=np.float32)
+        self.user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+        self.item_index = {item_id: i for i, item_id in enumerate(item_ids)}
+        self._aligned: Optional[tuple] = None
+
+    @classmethod
+    def train(cls, events: Iterable[Tuple[str, str, float]], **kwargs) -> "CollaborativeModel":
+        matrix, user_ids, item_ids = interaction_matrix(events)
+        logger.info(f"Training ALS on {matrix.shape[0]} users x {matrix.shape[1]} items ({matrix.nnz} interactions)")
+        users, items = train_als(matrix, **kwargs)
+        return cls(np.asarray(user_ids, dtype=object), np.asarray(item_ids, dtype=object), users, items)
+
+    def user_vector(self, user_id: str) -> Optional[np.ndarray]:
+        row = self.user_index.get(user_id)
+        return None if row is None else self.user_factors[row]
+
+    def item_matrix(self, snapshot) -> np.ndarray:
+        """Item factors aligned with the snapshot rows (zeros for listings without interactions)"""
+        aligned = self._aligned
+        if aligned is not None and aligned[0] is snapshot:
+            return aligned[1]
+        rows = np.array([self.item_index.get(i, -1) for i in snapshot.ids], dtype=np.int64)
+        matrix = np.zeros((len(rows), self.item_factors.shape[1]), dtype=np.float32)
+        known = rows >= 0
+        matrix[known] = self.item_factors[rows[known]]
+        self._aligned = (snapshot, matrix)
+        return matrix
+
+    def scores(self, user_id: str, snapshot) -> Optional[np.ndarray]:
+        """Predicted preference of `user_id` for every snapshot row, or None for unknown users"""
+        vector = self.user_vector(user_id)
+        if vector is None:
+            return None
+        return self.item_matrix(snapshot) @ vector
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, user_ids=self.user_ids.astype(str), item_ids=self.item_ids.astype(str),
+                 user_factors=self.user_factors, item_factors=self.item_factors)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CollaborativeModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["user_ids"].astype(object), data["item_ids"].astype(object),
+                       data["user_factors"], data["item_factors"])
+
+
+class CollaborativeFilter:
+    """Serves the latest trained CollaborativeModel from DATA_DIR, reloading when the file changes"""
+
+    def __init__(self, path: str = None, reload_interval: float = None):
+        self.path = path or os.path.join(settings.DATA_DIR, settings.CF_MODEL_FILE)
+        self.reload_interval = settings.CATALOG_REFRESH_SECONDS if reload_interval is None else reload_interval
+        self.model: Optional[CollaborativeModel] = None
+        self._mtime = None
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            self.model = CollaborativeModel.load(self.path)
+            self._mtime = mtime
+            logger.info(f"Collaborative model loaded: {len(self.model.user_ids)} users, {len(self.model.item_ids)} items")
+        except Exception as e:
+            logger.error(f"Failed to load collaborative model {self.path}: {e}")
+
+    def maybe_reload(self):
+        """Pick up a retrained model; at most one stat per reload interval"""
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_check = now
+            self._load()
+        finally:
+            self._lock.release()
+
+    @property
+    def version(self):
+        """Identifies the loaded model (its file mtime), for cache keys"""
+        return self._mtime
+
+    def knows(self, user_id: str) -> bool:
+        """True if the loaded model has factors for `user_id` (their results are personalized)"""
+        model = self.model
+        return model is not None and bool(user_id) and user_id in model.user_index
+
+    def scores(self, user_id: str, snapshot) -> Optional[np.ndarray]:
+        model = self.model
+        if model is None or not user_id:
+            return None
+        return model.scores(user_id, snapshot)
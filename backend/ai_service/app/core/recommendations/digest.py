@@ -0,0 +1,100 @@
+"""Streaming sinks for batch recommendation results (digests, notifications)"""
+import os
+import json
+import logging
+from typing import Dict, Any, List, Callable, Iterable, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+# Flat row layout used for Parquet output: one row per (user, recommended listing)
+PARQUET_FIELDS = [
+    ("user_id", "string"), ("rank", "int32"), ("equipment_id", "string"), ("name", "string"),
+    ("type", "string"), ("score", "float32"), ("price_per_hour", "float64"), ("location", "string"),
+    ("available", "bool"), ("reason", "string"),
+]
+
+
+class JsonlSink:
+    """One JSON object per user: {"user_id", "recommendations", "total_count", "algorithm_used"}"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, user: Dict[str, Any], result: Dict[str, Any]):
+        self._file.write(json.dumps({"user_id": user.get("user_id"), **result}, default=str) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetSink:
+    """Flattened rows buffered into fixed-size row groups, so memory does not grow with the user count"""
+
+    def __init__(self, path: str, row_group_size: int = 50_000):
+        if not HAS_PYARROW:
+            raise RuntimeError("pyarrow is required for Parquet output")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.schema = pa.schema([(name, pa.type_for_alias(dtype)) for name, dtype in PARQUET_FIELDS])
+        self._writer = pq.ParquetWriter(path, self.schema)
+        self._columns: Dict[str, List[Any]] = {name: [] for name, _ in PARQUET_FIELDS}
+        self._buffered = 0
+        self.row_group_size = row_group_size
+
+    def write(self, user: Dict[str, Any], result: Dict[str, Any]):
+        for rank, rec in enumerate(result["recommendations"], start=1):
+            row = {**rec, "user_id": user.get("user_id"), "rank": rank}
+            for name, values in self._columns.items():
+                values.append(row.get(name))
+            self._buffered += 1
+        if self._buffered >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffered:
+            self._writer.write_table(pa.table(self._columns, schema=self.schema))
+            self._columns = {name: [] for name in self._columns}
+            self._buffered = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+class CallbackSink:
+    """Hands every (user, result) pair to a callable, e.g. a notification enqueuer"""
+
+    def __init__(self, callback: Callable[[Dict[str, Any], Dict[str, Any]], None]):
+        self.callback = callback
+
+    def write(self, user: Dict[str, Any], result: Dict[str, Any]):
+        self.callback(user, result)
+
+    def close(self):
+        pass
+
+
+def open_sink(path: str):
+    """Pick a file sink from the output extension (.parquet or JSONL)"""
+    return ParquetSink(path) if path.endswith(".parquet") else JsonlSink(path)
+
+
+def write_results(results: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]], sink, log_every: int = 10_000) -> int:
+    """Drain a `recommend_batch` stream into a sink; returns the number of users written"""
+    count = 0
+    try:
+        for user, result in results:
+            sink.write(user, result)
+            count += 1
+            if count % log_every == 0:
+                logger.info(f"Wrote recommendations for {count} users")
+    finally:
+        sink.close()
+    return count
@@ -0,0 +1,151 @@
+"""Persistent memory-mapped store for catalog embeddings"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import logging
+import numpy as np
+from typing import List, Dict, Optional, Callable
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Superseded matrix files are only deleted once they are this old, so a file another
+# worker is still writing (before its sidecar swap) is never removed underneath it
+STALE_FILE_SECONDS = 600
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Catalog embeddings kept on disk as a raw float matrix plus a JSON sidecar.
+
+    The sidecar lists the equipment id and passage-text hash of every row and
+    names the matrix file. Matrix files are written under a fresh name and the
+    sidecar is replaced atomically afterwards, so readers in other workers either
+    see the old pair or the new pair. Matrices are opened with `np.memmap`, so all
+    workers share the same page-cache pages instead of holding private copies.
+    """
+
+    def __init__(self, directory: str = None, dtype: str = None, model_name: str = ""):
+        self.directory = directory or os.path.join(settings.DATA_DIR, "embeddings")
+        self.dtype = np.dtype(dtype or settings.CATALOG_EMBEDDING_DTYPE)
+        self.model_name = model_name
+        self.sidecar_path = os.path.join(self.directory, "catalog.json")
+        self._lock = threading.Lock()
+        self.ids: List[str] = []
+        self.hashes: List[str] = []
+        self.matrix: Optional[np.ndarray] = None
+        self._sidecar_mtime = None
+        self._open()
+
+    def _open(self):
+        """Map the persisted matrix if the sidecar matches our model and dtype"""
+        try:
+            self._sidecar_mtime = os.path.getmtime(self.sidecar_path)
+            with open(self.sidecar_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model_name or meta.get("dtype") != self.dtype.name:
+                logger.info("Persisted catalog embeddings were built with a different model/dtype. Ignoring them.")
+                return
+            count, dim = int(meta["count"]), int(meta["dim"])
+            path = os.path.join(self.directory, meta["matrix_file"])
+            self.matrix = np.memmap(path, dtype=self.dtype, mode="r", shape=(count, dim)) if count else None
+            self.ids, self.hashes = meta["ids"], meta["hashes"]
+            logger.info(f"Mapped {count} persisted catalog embeddings from {path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to open persisted catalog embeddings: {e}")
+            self.ids, self.hashes, self.matrix = [], [], None
+
+    def _reopen_if_changed(self):
+        """Pick up a matrix another worker persisted since we last looked"""
+        try:
+            mtime = os.path.getmtime(self.sidecar_path)
+        except OSError:
+            return
+        if mtime != self._sidecar_mtime:
+            self._open()
+
+    def sync(self, ids: List[str], texts: List[str], encode: Callable[[List[str]], np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Return an embedding matrix aligned with `ids`, encoding only rows whose text hash
+        is new or changed. Persists and re-maps the matrix when anything differs.
+        """
+        if not ids:
+            return None
+        hashes = [text_hash(t) for t in texts]
+        with self._lock:
+            self._reopen_if_changed()
+            if self.matrix is not None and ids == self.ids and hashes == self.hashes:
+                return self.matrix
+
+            # Embeddings depend only on the passage text, so reuse is keyed by text hash
+            known: Dict[str, int] = {h: row for row, h in enumerate(self.hashes)}
+            source = np.array([known.get(h, -1) for h in hashes], dtype=np.int64)
+            stale = np.flatnonzero(source < 0)
+            fresh = np.asarray(encode([texts[i] for i in stale]), dtype=np.float32) if len(stale) else None
+
+            dim = fresh.shape[1] if fresh is not None else self.matrix.shape[1]
+            matrix = np.empty((len(ids), dim), dtype=self.dtype)
+            keep = np.flatnonzero(source >= 0)
+            if len(keep):
+                matrix[keep] = self.matrix[source[keep]]
+            if fresh is not None:
+                matrix[stale] = fresh.astype(self.dtype)
+            logger.info(f"Catalog embeddings synced: {len(stale)} encoded, {len(keep)} reused")
+
+            persisted = self._persist(ids, hashes, matrix)
+            self.ids, self.hashes = list(ids), hashes
+            self.matrix = persisted if persisted is not None else matrix
+            return self.matrix
+
+    def _persist(self, ids: List[str], hashes: List[str], matrix: np.ndarray) -> Optional[np.memmap]:
+        """Write matrix + sidecar and return a read-only memmap of the new matrix"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            matrix_file = f"catalog-{uuid.uuid4().hex[:12]}.{self.dtype.name}"
+            path = os.path.join(self.directory, matrix_file)
+            out = np.memmap(path, dtype=self.dtype, mode="w+", shape=matrix.shape)
+            out[:] = matrix
+            out.flush()
+            del out
+
+            meta = {
+                "model": self.model_name,
+                "dtype": self.dtype.name,
+                "count": matrix.shape[0],
+                "dim": matrix.shape[1],
+                "matrix_file": matrix_file,
+                "ids": list(ids),
+                "hashes": hashes,
+            }
+            tmp_path = f"{self.sidecar_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self.sidecar_path)
+            self._sidecar_mtime = os.path.getmtime(self.sidecar_path)
+            self._remove_stale_files(keep=matrix_file)
+            return np.memmap(path, dtype=self.dtype, mode="r", shape=matrix.shape)
+        except Exception as e:
+            logger.error(f"Failed to persist catalog embeddings: {e}")
+            return None
+
+    def _remove_stale_files(self, keep: str):
+        """Delete superseded matrices (already-mapped pages stay valid for readers on POSIX)"""
+        cutoff = time.time() - STALE_FILE_SECONDS
+        for name in os.listdir(self.directory):
+            if name.startswith("catalog-") and name != keep:
+                path = os.path.join(self.directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
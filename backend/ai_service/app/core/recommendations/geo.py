@@ -0,0 +1,113 @@
+"""Geocoding and radius search for the hyperlocal liquidity fallback"""
+import os
+import json
+import logging
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.pricing.regions import RegionMatcher
+
+try:
+    from sklearn.neighbors import BallTree
+    HAS_SKLEARN = True
+except ImportError:
+    HAS_SKLEARN = False
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class Gazetteer:
+    """Place names (and aliases) -> coordinates, matched as substrings of free-text locations"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(settings.DATA_DIR, settings.GEO_PLACES_FILE)
+        self.coordinates: List[Tuple[float, float]] = []
+        patterns: Dict[str, int] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                places = json.load(f).get("places", [])
+            for place in places:
+                idx = len(self.coordinates)
+                self.coordinates.append((float(place["lat"]), float(place["lng"])))
+                for name in [place["name"]] + place.get("aliases", []):
+                    patterns[name.lower()] = idx
+            logger.info(f"Gazetteer loaded: {len(self.coordinates)} places from {self.path}")
+        except FileNotFoundError:
+            logger.warning(f"No gazetteer at {self.path}. Radius expansion is disabled.")
+        except Exception as e:
+            logger.error(f"Failed to load gazetteer {self.path}: {e}")
+        self.matcher = RegionMatcher(patterns)
+
+    def geocode(self, location: str) -> Optional[Tuple[float, float]]:
+        """(lat, lng) of the most specific place named in `location`, or None"""
+        if not location:
+            return None
+        idx = self.matcher.match(location)
+        return None if idx is None else self.coordinates[idx]
+
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distances from one point to many (degrees in, kilometres out)"""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GeoIndex:
+    """Radius search over geocoded catalog rows (BallTree with haversine metric when available)"""
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        """`latitudes`/`longitudes` are per catalog row; NaN marks rows that could not be geocoded"""
+        located = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        self.rows = np.flatnonzero(located)
+        self.latitudes = latitudes[located]
+        self.longitudes = longitudes[located]
+        self.tree = None
+        if HAS_SKLEARN and len(self.rows):
+            self.tree = BallTree(np.radians(np.column_stack([self.latitudes, self.longitudes])), metric="haversine")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def within(self, lat: float, lng: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Catalog rows within `radius_km` and their distances, nearest first"""
+        if not len(self.rows):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        if self.tree is not None:
+            point = np.radians([[lat, lng]])
+            ind, dist = self.tree.query_radius(point, r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True)
+            return self.rows[ind[0]], dist[0] * EARTH_RADIUS_KM
+        dist = haversine_km(lat, lng, self.latitudes, self.longitudes)
+        hits = np.flatnonzero(dist <= radius_km)
+        hits = hits[np.argsort(dist[hits], kind="stable")]
+        return self.rows[hits], dist[hits]
+
+    def expand(self, lat: float, lng: float, budget: int, rings_km: List[float] = None) -> np.ndarray:
+        """
+        Grow the search radius ring by ring until `budget` rows are found.
+        Returns at most `budget` rows, nearest first; empty if nothing lies within the last ring.
+        """
+        rows = np.empty(0, dtype=np.intp)
+        for radius in rings_km or settings.GEO_RADIUS_RINGS_KM:
+            rows, dist = self.within(lat, lng, radius)
+            if len(rows) >= budget:
+                logger.info(f"Radius expansion filled {budget} candidates within {radius:g} km")
+                break
+        return rows[:budget]
+
+
+# Global instance
+_gazetteer = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Get or create the global gazetteer instance"""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
+
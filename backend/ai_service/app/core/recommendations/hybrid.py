@@ -1,250 +1,498 @@
-import random
-import os
 import logging
+import threading
+import itertools
 import numpy as np
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+
+from app.config import settings
+from app.core.database import get_supabase_client
+from app.core.recommendations.catalog import CatalogStore, CatalogSnapshot, diff_snapshots
+from app.core.recommendations.embedding_store import EmbeddingStore
+from app.core.recommendations.neighbors import NeighborIndex
+from app.core.recommendations.collaborative import CollaborativeFilter
+from app.core.recommendations.toplists import TopListMaterializer
+from app.core.recommendations.availability import AvailabilityIndex, to_epoch
+from app.core.recommendations.cache import (
+    ResultCache, RankedList, InvalidCursor, ExpiredCursor, seeded_jitter, list_key, encode_cursor, decode_cursor
+)
+from app.core.embeddings.text import get_text_embedder, MODEL_NAME
+from app.core.vector.db import get_vdb_manager, equipment_fingerprint
 
 try:
-    from sentence_transformers import SentenceTransformer
-    from sklearn.metrics.pairwise import cosine_similarity
+    import sklearn  # noqa: F401 (availability check only)
     HAS_ML = True
 except ImportError:
     HAS_ML = False
 
 logger = logging.getLogger(__name__)
 
+# Reason phrases for the per-row flags kept in a RankedList, in column order
+REASON_TEXTS = ("high structural similarity", "same equipment type", "popularity with renters like you")
+
 
 class RecommendationEngine:
     """Hybrid recommendation system for equipment using AI Embeddings"""
     
     def __init__(self):
         """Initialize recommendation engine"""
-        url = os.environ.get("SUPABASE_URL")
-        key = os.environ.get("SUPABASE_SERVICE_KEY")
-        if url and key:
-            try:
-                from supabase import create_client
-                self.supabase = create_client(url, key)
-                logger.info("Supabase client initialized for Recommendations.")
-            except Exception as e:
-                logger.error(f"Failed to initialize Supabase: {e}")
-                self.supabase = None
+        self.supabase = get_supabase_client()
+        if self.supabase:
+            logger.info("Supabase client initialized for Recommendations.")
         else:
-            self.supabase = None
-            logger.warning("No SUPABASE_URL found. Will use mock data.")
-            
-        self.equipment_db = self._get_equipment_data()
+            logger.warning("No Supabase client available. Will use mock data.")
         
+        self.model = None
         if HAS_ML:
-            try:
-                # Load lightweight local multilingual text embedding model
-                self.model = SentenceTransformer('intfloat/multilingual-e5-small')
-                self._compute_equipment_embeddings()
-                logger.info("SentenceTransformers (multilingual-e5-small) loaded for semantic recommendations.")
-            except Exception as e:
-                logger.warning(f"Failed to load SentenceTransformers: {e}")
-                self.model = None
-                HAS_ML = False
-        else:
-            self.model = None
+            # Shared process-wide multilingual-e5 encoder (also used by the project estimator)
+            embedder = get_text_embedder()
+            self.model = embedder if embedder.available else None
+        if self.model is None:
             logger.info("ML packages omitted. Using heuristic recommendations.")
+        
+        # Catalog and embeddings are loaded once and refreshed incrementally in the background;
+        # embeddings persist under DATA_DIR so restarts and extra workers map them instead of re-encoding
+        embedding_store = EmbeddingStore(model_name=MODEL_NAME) if self.model else None
+        self.catalog = CatalogStore(self.supabase, encoder=self.model, embedding_store=embedding_store)
+        # Precomputed top-N "similar equipment" lists make anchored requests a lookup plus rerank
+        self.neighbors = NeighborIndex(self.catalog) if self.model else None
+        
+        # Per-user factors from cf_train_job.py; scoring is a dot product, no history fetch per request
+        self.collaborative = CollaborativeFilter()
+
+        # Ranked lists per normalized request and catalog version (first pages and cursor pages are
+        # slices of them); dropped on every catalog swap
+        self.result_cache = ResultCache()
+        self.catalog.subscribe(self._invalidate_results)
+
+        # Booked time slots per listing as bitsets, for "free between these dates" filtering
+        self.availability = AvailabilityIndex(self.supabase)
+
+        # Ranked lists per (location, role, category) for anonymous traffic, rebuilt after catalog changes
+        self.toplists = TopListMaterializer(self.catalog, self._rank_anonymous) if settings.TOPLIST_ENABLED else None
+        
+        # Qdrant "equipment" collection mirrors the catalog for filtered ANN retrieval
+        self.vdb = get_vdb_manager() if self.model else None
+        self._ann_ready = False
+        if self.vdb and self.vdb.qdrant_client:
+            self.catalog.subscribe(self._sync_vector_index)
+            threading.Thread(target=self._sync_vector_index, args=(None, self.catalog.snapshot), daemon=True).start()
             
         logger.info("RecommendationEngine initialized")
 
-    def _compute_equipment_embeddings(self):
-        """Pre-compute embeddings for all mock equipment"""
-        texts = [
-            f"passage: {e['name']} {e['category']} {e['type']} {e.get('specifications', {}).get('horsepower', '')} HP" 
-            for e in self.equipment_db
-        ]
-        self.embeddings = self.model.encode(texts)
-    
-    def _get_equipment_data(self) -> List[Dict[str, Any]]:
-        """Fetch real equipment data from Supabase or fallback to mock"""
-        if self.supabase:
-            try:
-                response = self.supabase.table("equipment").select(
-                    "id, name, type, category, pricing, location, available, verification_status, reliability_score, image_url, specifications"
-                ).is_("deleted_at", "null").execute()
-                
-                db_equipment = []
-                for row in response.data:
-                    price = row.get("pricing", {}).get("per_hour", 50) if isinstance(row.get("pricing"), dict) else 50
-                    loc = row.get("location", {})
-                    loc_str = loc.get("city", "Unknown") if isinstance(loc, dict) else str(loc)
-                    
-                    db_equipment.append({
-                        "equipment_id": str(row["id"]),
-                        "name": row.get("name", "Unknown Equipment"),
-                        "type": row.get("type", "unknown"),
-                        "category": row.get("category", "unknown"),
-                        "price_per_hour": price,
-                        "location": loc_str,
-                        "available": row.get("available", False),
-                        "verification_status": row.get("verification_status", "unverified"),
-                        "reliability_score": float(row.get("reliability_score") or 5.0),
-                        "rating": float(row.get("reliability_score") or 5.0), # Using reliability as rating surrogate for logic
-                        "total_rentals": 0,
-                        "image_url": row.get("image_url", ""),
-                        "specifications": row.get("specifications", {})
-                    })
-                if db_equipment:
-                    return db_equipment
-            except Exception as e:
-                logger.error(f"Failed to fetch equipment from DB: {e}")
-                
-        return self._create_mock_equipment()
-
-    def _create_mock_equipment(self) -> List[Dict[str, Any]]:
-        """Create mock equipment data for demo"""
-        equipment_types = [
-            ("John Deere 6M Series Tractor", "tractor", "agriculture"),
-            ("Caterpillar 320 Excavator", "excavator", "construction"),
-            ("Bobcat S650 Skid Steer", "skid_steer", "construction"),
-            ("Case IH Magnum Tractor", "tractor", "agriculture"),
-            ("Komatsu PC210 Excavator", "excavator", "construction"),
-            ("New Holland T7 Series", "tractor", "agriculture"),
-            ("JCB 3CX Backhoe", "backhoe", "construction"),
-            ("Kubota M7 Tractor", "tractor", "agriculture"),
-            ("Volvo EC220 Excavator", "excavator", "construction"),
-            ("Massey Ferguson 7700 Series", "tractor", "agriculture"),
-        ]
-        
-        equipment = []
-        for idx, (name, equip_type, category) in enumerate(equipment_types):
-            equipment.append({
-                "equipment_id": f"equip_{idx + 1:03d}",
-                "name": name,
-                "type": equip_type,
-                "category": category,
-                "price_per_hour": round(random.uniform(35, 120), 2),
-                "location": random.choice(["Iowa", "Texas", "California", "Florida"]),
-                "available": random.choice([True, True, True, False]),
-                "verification_status": random.choice(["verified", "verified", "unverified", "flagged"]),
-                "reliability_score": round(random.uniform(2.5, 5.0), 2),
-                "rating": round(random.uniform(3.5, 5.0), 1),
-                "total_rentals": random.randint(10, 500),
-                "image_url": f"https://example.com/equipment/{idx + 1}.jpg",
-                "specifications": {
-                    "year": random.randint(2018, 2024),
-                    "horsepower": random.randint(80, 200)
-                }
-            })
-        return equipment
+    def _sync_vector_index(self, old: Optional[CatalogSnapshot], new: CatalogSnapshot):
+        """Mirror a catalog snapshot into Qdrant (full sync on startup, diffs afterwards)"""
+        if new.embeddings is None:
+            return
+        if old is None:
+            # Compare per-listing fingerprints: edits and balanced inserts/deletes leave the count unchanged
+            indexed = self.vdb.equipment_fingerprints()
+            if indexed is None:
+                return
+            changed = [
+                i for i in range(len(new))
+                if indexed.get(new.ids[i]) != equipment_fingerprint(new.item(i), new.embeddings[i])
+            ]
+            deleted = list(indexed.keys() - set(new.ids))
+            if changed or deleted:
+                logger.info(f"Syncing Qdrant: {len(changed)} changed and {len(deleted)} removed listings...")
+        else:
+            changed, deleted = diff_snapshots(old, new)
+        if changed and not self.vdb.upsert_equipment([new.item(i) for i in changed], new.embeddings[changed]):
+            return
+        if deleted:
+            self.vdb.delete_equipment(deleted)
+        self._ann_ready = True
+
+    def _invalidate_results(self, old: Optional[CatalogSnapshot], new: CatalogSnapshot):
+        self.result_cache.clear()
+
+    @staticmethod
+    def _request_key(user_role: str, current_equipment_id: str = None, location: str = None, category: str = None,
+                     window: tuple = None) -> str:
+        """Normalized request identity: seeds the jitter and keys the result cache"""
+        key = f"{user_role}\x1f{current_equipment_id or ''}\x1f{(location or '').strip().lower()}"
+        # Filters are appended only when given, so unfiltered requests keep their jitter
+        if category:
+            key = f"{key}\x1f{category.strip().lower()}"
+        if window:
+            key = f"{key}\x1f{to_epoch(window[0]):.0f}-{to_epoch(window[1]):.0f}"
+        return key
+
+    def _eligible(self, snapshot: CatalogSnapshot, category: str = None, window: tuple = None) -> Optional[np.ndarray]:
+        """Mask of rows passing the category and availability-window filters (None when unfiltered)"""
+        eligible = None
+        if category:
+            wanted = category.strip().lower()
+            codes = [code for code, value in enumerate(snapshot.vocab["category"]) if value.lower() == wanted]
+            eligible = np.isin(snapshot.columns["category"], codes)
+        if window:
+            free = self.availability.free_mask(snapshot, window[0], window[1])
+            eligible = free if eligible is None else eligible & free
+        return eligible
+
+    def _neighbor_candidates(self, snapshot: CatalogSnapshot, current_idx: int, candidates: np.ndarray, limit: int = 10,
+                             eligible: np.ndarray = None) -> Optional[Dict[int, float]]:
+        """Precomputed eligible neighbors as {row: similarity}, restricted to the location candidates when enough remain"""
+        if self.neighbors is None:
+            return None
+        neighbors = self.neighbors.lookup(snapshot, current_idx)
+        if neighbors is None:
+            return None
+        if eligible is not None:
+            neighbors = {row: sim for row, sim in neighbors.items() if eligible[row]}
+        local = {row: sim for row, sim in neighbors.items() if candidates[row]}
+        # Not enough local liquidity among the neighbors: keep every eligible neighbor
+        return local if len(local) >= limit else neighbors
+
+    def _ann_candidates(self, snapshot: CatalogSnapshot, current_idx: int, location: str = None, limit: int = 10,
+                        category: str = None, eligible: np.ndarray = None) -> Optional[Dict[int, float]]:
+        """Top-k similar eligible listings from Qdrant as {row: similarity}, local first; None if ANN is unavailable"""
+        if not self._ann_ready:
+            return None
+        anchor_id = snapshot.ids[current_idx]
+        vector = snapshot.embeddings[current_idx]
+        if category:
+            # Category is filtered inside Qdrant (every catalog spelling of it); the window is applied to the hits below
+            wanted = category.strip().lower()
+            category = [value for value in snapshot.vocab["category"] if value.lower() == wanted] or [category]
+        # Same substring rule as `location_match`: filter on every catalog location containing the query
+        locations = snapshot.matching_locations(location) if location else None
+        hits = []
+        if locations or not location:
+            hits = self.vdb.search_equipment(vector, top_k=settings.ANN_CANDIDATES, location=locations, category=category,
+                                             exclude_ids=[anchor_id])
+        if hits is not None and location and len(hits) < limit:
+            # Not enough local liquidity: widen to the whole catalog
+            hits = self.vdb.search_equipment(vector, top_k=settings.ANN_CANDIDATES, category=category,
+                                             exclude_ids=[anchor_id])
+        if hits is None:
+            return None
+        rows = ((snapshot.index[i], score) for i, score in hits if i in snapshot.index)
+        return {row: score for row, score in rows if eligible is None or eligible[row]}
     
+    def _location_candidates(self, snapshot: CatalogSnapshot, location: str = None, limit: int = 10,
+                             eligible: np.ndarray = None) -> tuple:
+        """(rows matching the location, rows eligible for recommendation) as boolean masks"""
+        n = len(snapshot)
+        eligible = np.ones(n, dtype=bool) if eligible is None else eligible
+        # Hyperlocal Liquidity Control (Component E)
+        # We enforce strictly local matching first to build density.
+        local = snapshot.location_match(location) & eligible if location else np.zeros(n, dtype=bool)
+        candidates = eligible.copy()
+        if location:
+            # Only show out-of-region equipment if there is zero local liquidity
+            if local.any():
+                candidates = local.copy()
+            else:
+                # Expand outward from the requested location in radius rings instead of scoring everything
+                nearby = snapshot.nearby(location, max(limit, settings.GEO_CANDIDATE_BUDGET))
+                nearby = nearby[eligible[nearby]]
+                if len(nearby):
+                    logger.info(f"No local liquidity found for {location}. Using {len(nearby)} nearby listings.")
+                    candidates = np.zeros(n, dtype=bool)
+                    candidates[nearby] = True
+                else:
+                    logger.warning(f"No local liquidity found for {location}. Falling back to broader region.")
+        return local, candidates
+
     def recommend(
         self,
         user_id: str,
         user_role: str,
         current_equipment_id: str = None,
         location: str = None,
-        limit: int = 10
+        limit: int = 10,
+        category: str = None,
+        available_from=None,
+        available_to=None,
+        cursor: str = None
     ) -> Dict[str, Any]:
-        """Generate equipment recommendations using embeddings and filtering"""
-        # Always fetch fresh data per request
-        self.equipment_db = self._get_equipment_data()
-        if HAS_ML and self.model:
-            self._compute_equipment_embeddings()
+        """
+        Generate equipment recommendations using embeddings and filtering.
 
-        recommendations = []
-        candidates = self.equipment_db.copy()
+        The first call ranks candidates to RECOMMEND_RANKED_DEPTH and caches the list; pass the
+        returned `next_cursor` to get the following page as a slice of that list (no rescoring).
+        """
+        # Serve from the current snapshot; changes are picked up by a background refresh
+        self.catalog.maybe_refresh()
+        self.collaborative.maybe_reload()
+        snapshot = self.catalog.snapshot
+        if cursor:
+            list_id, offset = decode_cursor(cursor)
+            ranked = self.result_cache.get(list_id)
+            if ranked is None or ranked.version != snapshot.version:
+                raise ExpiredCursor("Cursor expired; request the first page again")
+            if ranked.user_id not in (None, user_id):
+                raise InvalidCursor("Cursor does not belong to this user")
+            return self._page(snapshot, ranked, list_id, offset, limit)
+
+        window = (available_from, available_to) if available_from and available_to else None
+        if window:
+            self.availability.maybe_refresh()
+        request_key = self._request_key(user_role, current_equipment_id, location, category, window)
+        # Only users the collaborative model knows get personalized (per-user) results
+        personalized = self.collaborative.knows(user_id)
+        list_id = list_key(
+            snapshot.version, request_key, limit,
+            (user_id, self.collaborative.version) if personalized else None,
+            self.availability.generation if window else None,
+        )
+        ranked = None
+        if self.toplists is not None and current_equipment_id is None and not personalized and not window:
+            # Anonymous landing-page traffic: constant-time lookup of a materialized list
+            ranked = self.toplists.lookup(snapshot, location, user_role, category)
+            if ranked is not None:
+                self.result_cache.put(list_id, ranked)  # Registered so cursors can page through it
+        if ranked is None:
+            ranked = self.result_cache.get(list_id)
+        if ranked is None:
+            ranked = self._rank(snapshot, user_id, user_role, current_equipment_id, location, limit, request_key,
+                                category, window)
+            ranked.user_id = user_id if personalized else None
+            self.result_cache.put(list_id, ranked)
+        return self._page(snapshot, ranked, list_id, 0, limit)
+
+    def _rank_anonymous(self, snapshot: CatalogSnapshot, location: Optional[str], user_role: str,
+                        category: Optional[str]) -> RankedList:
+        """Ranking for a request without history or anchor item (what the top-list materializer stores)"""
+        request_key = self._request_key(user_role, None, location, category)
+        return self._rank(snapshot, None, user_role, None, location, 0, request_key, category)
+
+    def _rank(self, snapshot: CatalogSnapshot, user_id: Optional[str], user_role: str, current_equipment_id: Optional[str],
+              location: Optional[str], limit: int, request_key: str, category: str = None, window: tuple = None,
+              depth: int = None) -> RankedList:
+        """Score the snapshot for one request and keep the best `depth` (RECOMMEND_RANKED_DEPTH) rows in order"""
+        n = len(snapshot)
+        current_idx = snapshot.index.get(current_equipment_id) if current_equipment_id else None
+
+        eligible = self._eligible(snapshot, category, window)
+        local, candidates = self._location_candidates(snapshot, location, limit, eligible)
 
-        # Hyperlocal Liquidity Control (Component E)
-        # We enforce strictly local matching first to build density.
-        if location:
-            local_equipment = [e for e in candidates if location.lower() in e["location"].lower()]
-            # Only show out-of-region equipment if there is zero local liquidity
-            if len(local_equipment) > 0:
-                candidates = local_equipment
-            else:
-                logger.warning(f"No local liquidity found for {location}. Falling back to broader region.")
-                # We could implement a radius expansion here, but for now we just fallback to all
-                candidates = candidates
-        
         similarities = None
         # Use Semantic Search if we have an item to anchor on
-        if current_equipment_id and self.model:
-            current_idx = next((i for i, e in enumerate(self.equipment_db) if e["equipment_id"] == current_equipment_id), None)
-            if current_idx is not None:
-                # Calculate cosine similarity between current item and all others
-                target_embedding = self.embeddings[current_idx].reshape(1, -1)
-                similarities = cosine_similarity(target_embedding, self.embeddings)[0]
-        
-        # Calculate scores
-        for idx, equipment in enumerate(self.equipment_db):
-            if equipment["equipment_id"] == current_equipment_id:
-                continue # Skip the current item
-                
-            # Base heuristic score
-            score = self._calculate_heuristic_score(equipment, user_role, location)
-            reason_base = []
-            
-            # Blend in semantic similarity score
-            if similarities is not None:
-                sim_score = similarities[idx]
-                # Boost total score significantly based on ML similarity
-                score = (score * 0.4) + (float(sim_score) * 0.6)
-                if sim_score > 0.6:
-                     reason_base.append("high structural similarity")
-            elif current_equipment_id:
-                 current = next((e for e in self.equipment_db if e["equipment_id"] == current_equipment_id), None)
-                 if current and current["type"] == equipment["type"]:
-                     score += 0.2
-                     reason_base.append("same equipment type")
-
-            reason = self._generate_reason(equipment, user_role, location, reason_base)
-            
-            recommendations.append({
-                "equipment_id": equipment["equipment_id"],
-                "name": equipment["name"],
-                "type": equipment["type"],
-                "score": score,
-                "price_per_hour": equipment["price_per_hour"],
-                "location": equipment["location"],
-                "available": equipment["available"],
-                "verification_status": equipment.get("verification_status", "unverified"),
-                "reliability_score": equipment.get("reliability_score", 5.0),
-                "image_url": equipment["image_url"],
-                "reason": reason,
-                "specifications": equipment["specifications"]
-            })
-        
-        recommendations.sort(key=lambda x: x["score"], reverse=True)
-        
+        if current_idx is not None and snapshot.embeddings is not None:
+            anchored = self._neighbor_candidates(snapshot, current_idx, candidates, limit, eligible)
+            if anchored is None:
+                anchored = self._ann_candidates(snapshot, current_idx, location, limit, category, eligible)
+            if anchored is not None:
+                # Precomputed neighbors or filtered ANN top-k from Qdrant (both local-first): only those are scored
+                candidates = np.zeros(n, dtype=bool)
+                similarities = np.zeros(n)
+                if anchored:
+                    rows = np.fromiter(anchored.keys(), dtype=np.intp, count=len(anchored))
+                    candidates[rows] = True
+                    if eligible is not None:
+                        candidates &= eligible  # Category and availability-window filters hold for anchored requests too
+                    similarities[rows] = np.fromiter(anchored.values(), dtype=np.float64, count=len(anchored))
+            else:
+                # Cosine similarity to all others on the quantized index (top candidates re-scored in float32)
+                similarities = snapshot.similarity_index().similarities(snapshot.embeddings[current_idx])
+
+        if current_idx is not None:
+            candidates[current_idx] = False  # Skip the current item
+
+        # Score every row at once over the columnar snapshot
+        scores = self._calculate_heuristic_scores(snapshot, user_role, local, jitter=request_key)
+        same_type = None
+        if similarities is not None:
+            # Boost total score significantly based on ML similarity
+            scores = (scores * 0.4) + (similarities * 0.6)
+        elif current_idx is not None:
+            same_type = snapshot.columns["type"] == snapshot.columns["type"][current_idx]
+            scores = scores + np.where(same_type, 0.2, 0.0)
+
+        # Personalize with the collaborative-filtering prediction when the user has history
+        preference = self.collaborative.scores(user_id, snapshot)
+        if preference is not None:
+            preference = np.clip(preference, 0.0, 1.0)
+            scores = scores * (1.0 - settings.CF_WEIGHT) + preference * settings.CF_WEIGHT
+
+        rows = np.flatnonzero(candidates)
+        total_count = len(rows)
+        depth = max(limit, settings.RECOMMEND_RANKED_DEPTH if depth is None else depth)
+        if total_count > depth:
+            # Partial selection of the top `depth` rows, then order just those
+            rows = rows[np.argpartition(-scores[rows], depth - 1)[:depth]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+
+        # Reason flags are kept only for the ranked rows; response dicts are built per page
+        reasons = np.zeros((len(rows), 3), dtype=bool)
+        if similarities is not None:
+            reasons[:, 0] = similarities[rows] > 0.6
+        elif same_type is not None:
+            reasons[:, 1] = same_type[rows]
+        if preference is not None:
+            reasons[:, 2] = preference[rows] > 0.5
+        return RankedList(
+            snapshot.version, rows, scores[rows], reasons, total_count,
+            "semantic_similarity" if (similarities is not None) else "heuristic", user_role, location
+        )
+
+    def _page(self, snapshot: CatalogSnapshot, ranked: RankedList, list_id: str, offset: int, limit: int) -> Dict[str, Any]:
+        """Response for `limit` entries of a ranked list starting at `offset`"""
+        end = offset + limit
+        recommendations = []
+        for idx, score, flags in zip(ranked.rows[offset:end].tolist(), ranked.scores[offset:end].tolist(), ranked.reasons[offset:end]):
+            reason_base = [text for text, flag in zip(REASON_TEXTS, flags) if flag]
+            recommendations.append(
+                self._recommendation(snapshot.item(idx), float(score), ranked.user_role, ranked.location, reason_base)
+            )
         return {
-            "recommendations": recommendations[:limit],
-            "total_count": len(recommendations),
-            "algorithm_used": "semantic_similarity" if (similarities is not None) else "heuristic"
+            "recommendations": recommendations,
+            "total_count": ranked.total_count,
+            "algorithm_used": ranked.algorithm,
+            "next_cursor": encode_cursor(list_id, end) if end < len(ranked.rows) else None
         }
-    
-    def _calculate_heuristic_score(self, equipment: Dict, user_role: str, location: str = None) -> float:
-        """Calculate heuristic base score"""
-        score = 0.5 
-        if equipment.get("rating", 0) >= 4.5:
-            score += 0.15
-        if equipment.get("available", False):
-            score += 0.10
-        if location and location.lower() in equipment["location"].lower():
-            score += 0.15
-        if user_role == "customer" and equipment["category"] == "agriculture":
-            score += 0.10
-            
+
+    def search_available(self, available_from, available_to, location: str = None, category: str = None,
+                         limit: int = 100) -> Dict[str, Any]:
+        """Listings free for the whole window (optionally in a location and category), best heuristic score first"""
+        self.catalog.maybe_refresh()
+        self.availability.maybe_refresh()
+        snapshot = self.catalog.snapshot
+        eligible = self._eligible(snapshot, category, (available_from, available_to))
+        local = snapshot.location_match(location) & eligible if location else np.zeros(len(snapshot), dtype=bool)
+        rows = np.flatnonzero(local if location else eligible)
+        total_count = len(rows)
+        scores = self._calculate_heuristic_scores(snapshot, "customer", local)[rows]
+        if total_count > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            rows, scores = rows[top], scores[top]
+        rows = rows[np.argsort(-scores, kind="stable")]
+        return {"equipment_ids": [snapshot.ids[i] for i in rows.tolist()], "total_count": total_count}
+
+    def recommend_batch(
+        self,
+        users: Iterable[Dict[str, Any]],
+        limit: int = 10,
+        chunk_size: int = None
+    ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Recommendations for many users (dicts with user_id, user_role, location), yielded as
+        (user, result) pairs in input order with the same result shape as `recommend()`.
+
+        Users are consumed lazily in chunks, so memory stays bounded regardless of how many
+        are streamed in. Within a chunk, users sharing (location, role) share one candidate
+        set and base score vector, and are scored together as a (users x candidates) matrix.
+        """
+        self.catalog.maybe_refresh()
+        self.collaborative.maybe_reload()
+        snapshot = self.catalog.snapshot  # One consistent catalog for the whole run
+        chunk_size = chunk_size or settings.RECOMMEND_BATCH_CHUNK
+        groups_seen: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+        users = iter(users)
+        while True:
+            chunk = list(itertools.islice(users, chunk_size))
+            if not chunk:
+                break
+            by_group: Dict[tuple, List[int]] = {}
+            for pos, user in enumerate(chunk):
+                by_group.setdefault((user.get("location") or None, user.get("user_role") or "customer"), []).append(pos)
+
+            results: List[Optional[Dict[str, Any]]] = [None] * len(chunk)
+            for key, positions in by_group.items():
+                group = groups_seen.get(key)
+                if group is None:
+                    location, role = key
+                    local, candidates = self._location_candidates(snapshot, location, limit)
+                    rows = np.flatnonzero(candidates)
+                    group = (rows, self._calculate_heuristic_scores(snapshot, role, local)[rows])
+                    groups_seen[key] = group
+                    if len(groups_seen) > settings.RECOMMEND_BATCH_GROUP_CACHE:
+                        groups_seen.popitem(last=False)
+                else:
+                    groups_seen.move_to_end(key)
+                self._score_group(snapshot, chunk, positions, key, group, limit, results)
+
+            yield from zip(chunk, results)
+
+    def _score_group(self, snapshot: CatalogSnapshot, chunk: List[Dict[str, Any]], positions: List[int], key: tuple,
+                     group: tuple, limit: int, results: List[Optional[Dict[str, Any]]]):
+        """Score one (location, role) group of a batch chunk, block by block"""
+        location, role = key
+        rows, base = group
+        # Same seeded jitter as `recommend()` for this (role, location), so batch and single results agree
+        jitter = seeded_jitter(snapshot.id_hashes()[rows], self._request_key(role, None, location))
+        model = self.collaborative.model
+        item_factors = model.item_matrix(snapshot)[rows] if model is not None else None
+        # Keep each (users x candidates) score block within a fixed element budget
+        step = max(1, settings.RECOMMEND_BATCH_MAX_ELEMENTS // max(len(rows), 1))
+        for start in range(0, len(positions), step):
+            block = positions[start:start + step]
+            scores = np.repeat(np.clip(base + jitter, 0.0, 1.0)[None, :], len(block), axis=0)
+            preference = None
+            if item_factors is not None:
+                user_rows = np.array([model.user_index.get(chunk[p].get("user_id"), -1) for p in block], dtype=np.int64)
+                known = user_rows >= 0
+                if known.any():
+                    preference = np.zeros_like(scores)
+                    preference[known] = np.clip(model.user_factors[user_rows[known]] @ item_factors.T, 0.0, 1.0)
+                    scores[known] = scores[known] * (1.0 - settings.CF_WEIGHT) + preference[known] * settings.CF_WEIGHT
+
+            k = min(limit, len(rows))
+            if 0 < k < len(rows):
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(k), (len(block), k))
+            order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+
+            for j, pos in enumerate(block):
+                recommendations = []
+                for col in top[j].tolist():
+                    reason_base = ["popularity with renters like you"] if preference is not None and preference[j, col] > 0.5 else []
+                    equipment = snapshot.item(int(rows[col]))
+                    recommendations.append(self._recommendation(equipment, float(scores[j, col]), role, location, reason_base))
+                results[pos] = {
+                    "recommendations": recommendations,
+                    "total_count": len(rows),
+                    "algorithm_used": "heuristic"
+                }
+
+    def _recommendation(self, equipment: Dict, score: float, user_role: str, location: str = None, reason_base: List[str] = None) -> Dict[str, Any]:
+        """Response entry for one recommended listing"""
+        return {
+            "equipment_id": equipment["equipment_id"],
+            "name": equipment["name"],
+            "type": equipment["type"],
+            "score": score,
+            "price_per_hour": equipment["price_per_hour"],
+            "location": equipment["location"],
+            "available": equipment["available"],
+            "verification_status": equipment["verification_status"],
+            "reliability_score": equipment["reliability_score"],
+            "image_url": equipment["image_url"],
+            "reason": self._generate_reason(equipment, user_role, location, reason_base),
+            "specifications": equipment["specifications"]
+        }
+
+    def _calculate_heuristic_scores(self, snapshot: CatalogSnapshot, user_role: str, local: np.ndarray, jitter: str = None) -> np.ndarray:
+        """
+        Calculate heuristic base scores for every row of the snapshot. `jitter` is the request key that
+        seeds the tie-breaking noise; without it the scores are returned unclipped and noise-free.
+        """
+        columns = snapshot.columns
+        score = np.full(len(snapshot), 0.5)
+        score += np.where(columns["rating"] >= 4.5, 0.15, 0.0)
+        score += np.where(columns["available"], 0.10, 0.0)
+        score += np.where(local, 0.15, 0.0)
+        if user_role == "customer":
+            score += np.where(columns["category"] == snapshot.code("category", "agriculture"), 0.10, 0.0)
+
         # Add Trust & Reliability Penalty/Boost
-        reliability = equipment.get("reliability_score", 5.0)
-        verification = equipment.get("verification_status", "unverified")
-        
-        if reliability >= 4.5:
-            score += 0.15
-        elif reliability < 3.5:
-            score -= 0.30  # Heavy penalty for unreliability
-            
-        if verification == "verified":
-            score += 0.20
-        elif verification == "flagged":
-            score -= 0.50  # Severe penalty for fake availability
-            
-        score += random.uniform(0, 0.05)
-        return min(1.0, max(0.0, score))
+        reliability = columns["reliability_score"]
+        score += np.where(reliability >= 4.5, 0.15, np.where(reliability < 3.5, -0.30, 0.0))  # Heavy penalty for unreliability
+
+        verification = columns["verification_status"]
+        score += np.where(verification == snapshot.code("verification_status", "verified"), 0.20, 0.0)
+        score -= np.where(verification == snapshot.code("verification_status", "flagged"), 0.50, 0.0)  # Severe penalty for fake availability
+
+        if jitter is None:
+            return score
+        score += seeded_jitter(snapshot.id_hashes(), jitter)
+        return np.clip(score, 0.0, 1.0)
     
     def _generate_reason(self, equipment: Dict, user_role: str, location: str = None, extra_reasons: List[str] = None) -> str:
         """Generate recommendation reason text"""
@@ -0,0 +1,247 @@
+"""Precomputed item-to-item neighbor lists for anchored ("similar equipment") recommendations"""
+import os
+import hashlib
+import threading
+import logging
+import numpy as np
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.core.recommendations.catalog import CatalogSnapshot, diff_snapshots
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the (block rows x catalog size) similarity tile held in memory at once
+MAX_BLOCK_ELEMENTS = 1 << 24
+# Above this share of changed rows an incremental update costs about as much as a rebuild
+FULL_REBUILD_FRACTION = 0.25
+
+
+def catalog_signature(snapshot: CatalogSnapshot) -> str:
+    """Digest of ids and passage texts, used to tell whether persisted neighbors still match the catalog"""
+    digest = hashlib.sha1()
+    for equipment_id, text in zip(snapshot.ids, snapshot.embedding_texts()):
+        digest.update(f"{equipment_id}\x1f{text}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _normalized(embeddings: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(keys: np.ndarray, k: int) -> np.ndarray:
+    """Column positions of the `k` largest keys in each row, best first"""
+    k = min(k, keys.shape[1])
+    if k <= 0:
+        return np.empty((keys.shape[0], 0), dtype=np.intp)
+    part = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(keys, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _block_rows(n: int, block_size: int) -> int:
+    return max(1, min(block_size, MAX_BLOCK_ELEMENTS // max(n, 1)))
+
+
+def top_neighbors(matrix: np.ndarray, types: np.ndarray, rows: np.ndarray, top_n: int,
+                  type_boost: float, block_size: int) -> tuple:
+    """
+    Top-`top_n` neighbors of `rows` over the whole normalized `matrix` with a blocked matmul.
+    Neighbors are ranked by cosine similarity plus `type_boost` for the same equipment type;
+    returns (neighbor rows, cosine similarities), padded with -1 / 0.
+    """
+    n = len(matrix)
+    k = min(top_n, n - 1)
+    neighbors = np.full((len(rows), top_n), -1, dtype=np.int32)
+    sims = np.zeros((len(rows), top_n), dtype=np.float16)
+    if k <= 0:
+        return neighbors, sims
+    step = _block_rows(n, block_size)
+    for start in range(0, len(rows), step):
+        block = rows[start:start + step]
+        sim = matrix[block] @ matrix.T
+        keys = sim + type_boost * (types[block][:, None] == types[None, :])
+        keys[np.arange(len(block)), block] = -np.inf  # Never recommend an item as its own neighbor
+        top = _top_k(keys, k)
+        neighbors[start:start + len(block), :k] = top
+        sims[start:start + len(block), :k] = np.take_along_axis(sim, top, axis=1)
+    return neighbors, sims
+
+
+class NeighborTable:
+    """Top-N neighbor rows (int32) and similarities (float16) per listing, aligned with `ids`"""
+
+    def __init__(self, ids: np.ndarray, neighbors: np.ndarray, scores: np.ndarray, signature: str, version: int = 0):
+        self.ids = ids
+        self.neighbors = neighbors
+        self.scores = scores
+        self.signature = signature
+        self.version = version  # Catalog snapshot version the rows are aligned with
+        self.index = {equipment_id: i for i, equipment_id in enumerate(ids)}
+
+    @classmethod
+    def build(cls, snapshot: CatalogSnapshot, top_n: int = None, type_boost: float = None,
+              block_size: int = None) -> "NeighborTable":
+        """Compute neighbor lists for every listing in the snapshot"""
+        top_n = top_n or settings.NEIGHBOR_TOP_N
+        type_boost = settings.NEIGHBOR_TYPE_BOOST if type_boost is None else type_boost
+        matrix = _normalized(snapshot.embeddings)
+        rows = np.arange(len(snapshot))
+        neighbors, scores = top_neighbors(
+            matrix, snapshot.columns["type"], rows, top_n, type_boost, block_size or settings.NEIGHBOR_BLOCK_SIZE
+        )
+        return cls(np.asarray(snapshot.ids), neighbors, scores, catalog_signature(snapshot), snapshot.version)
+
+    def updated(self, snapshot: CatalogSnapshot, changed_rows: List[int], type_boost: float = None,
+                block_size: int = None) -> "NeighborTable":
+        """
+        Neighbor lists for `snapshot`, recomputing only what the changed rows can affect:
+        changed/new listings and lists that referenced them get fresh lists, every other
+        list merges in its similarities to the changed rows.
+        """
+        type_boost = settings.NEIGHBOR_TYPE_BOOST if type_boost is None else type_boost
+        block_size = block_size or settings.NEIGHBOR_BLOCK_SIZE
+        n, top_n = len(snapshot), self.neighbors.shape[1]
+        new_to_old = np.array([self.index.get(i, -1) for i in snapshot.ids], dtype=np.int64)
+        changed = np.zeros(n, dtype=bool)
+        changed[list(changed_rows)] = True
+        changed |= new_to_old < 0
+        changed_rows = np.flatnonzero(changed)
+        if len(changed_rows) > n * FULL_REBUILD_FRACTION:
+            return NeighborTable.build(snapshot, top_n, type_boost, block_size)
+
+        matrix = _normalized(snapshot.embeddings)
+        types = snapshot.columns["type"]
+        # Old neighbor rows -> new rows; deleted and changed listings are re-scored below
+        old_to_new = np.array([snapshot.index.get(i, -1) for i in self.ids], dtype=np.int64)
+        mapped = old_to_new >= 0
+        old_to_new[mapped] = np.where(changed[old_to_new[mapped]], -1, old_to_new[mapped])
+
+        neighbors = np.full((n, top_n), -1, dtype=np.int32)
+        scores = np.zeros((n, top_n), dtype=np.float16)
+        carried = np.flatnonzero(~changed)
+        lost = []
+        step = _block_rows(len(changed_rows) + top_n, block_size)
+        for start in range(0, len(carried), step):
+            block = carried[start:start + step]
+            old_neighbors = self.neighbors[new_to_old[block]]
+            kept = np.where(old_neighbors >= 0, old_to_new[np.maximum(old_neighbors, 0)], -1)
+            lost.append(block[((old_neighbors >= 0) & (kept < 0)).any(axis=1)])
+            candidates = np.concatenate([kept, np.broadcast_to(changed_rows, (len(block), len(changed_rows)))], axis=1)
+            sims = np.concatenate(
+                [self.scores[new_to_old[block]].astype(np.float32), matrix[block] @ matrix[changed_rows].T], axis=1
+            )
+            keys = sims + type_boost * (types[block][:, None] == types[np.maximum(candidates, 0)])
+            keys[candidates < 0] = -np.inf
+            top = _top_k(keys, top_n)
+            valid = np.isfinite(np.take_along_axis(keys, top, axis=1))
+            neighbors[block, :top.shape[1]] = np.where(valid, np.take_along_axis(candidates, top, axis=1), -1)
+            scores[block, :top.shape[1]] = np.where(valid, np.take_along_axis(sims, top, axis=1), 0.0)
+
+        # Changed listings, and lists that lost a deleted or changed neighbor (whose true
+        # replacement may be any unchanged listing), are recomputed in full
+        recompute = np.concatenate([changed_rows] + lost)
+        neighbors[recompute], scores[recompute] = top_neighbors(matrix, types, recompute, top_n, type_boost, block_size)
+        return NeighborTable(np.asarray(snapshot.ids), neighbors, scores, catalog_signature(snapshot), snapshot.version)
+
+    def lookup(self, snapshot: CatalogSnapshot, row: int) -> Optional[Dict[int, float]]:
+        """Neighbors of a snapshot row as {snapshot row: similarity}; None if the listing is unknown"""
+        own = self.index.get(snapshot.ids[row])
+        if own is None:
+            return None
+        result = {}
+        for neighbor, score in zip(self.neighbors[own].tolist(), self.scores[own].tolist()):
+            if neighbor < 0:
+                break
+            target = snapshot.index.get(self.ids[neighbor])
+            if target is not None:
+                result[target] = score
+        return result
+
+    def save(self, path: str):
+        """Persist atomically as an uncompressed .npz"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, ids=self.ids.astype(str), neighbors=self.neighbors, scores=self.scores,
+                 signature=np.array(self.signature))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NeighborTable":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["ids"].astype(object), data["neighbors"], data["scores"], str(data["signature"]))
+
+
+class NeighborIndex:
+    """
+    Keeps a NeighborTable in step with the catalog.
+
+    Loads the persisted table written by `neighbors_job.py` when it matches the current
+    catalog, otherwise builds one in the background; catalog changes are applied
+    incrementally from the refresh thread.
+    """
+
+    def __init__(self, catalog, path: str = None, background: bool = True):
+        self.catalog = catalog
+        self.path = path or os.path.join(settings.DATA_DIR, "neighbors", "catalog_neighbors.npz")
+        self.table: Optional[NeighborTable] = None
+        self._lock = threading.Lock()
+        self._load()
+        catalog.subscribe(self._on_catalog_change)
+        if self.table is None and background:
+            threading.Thread(target=self.rebuild, daemon=True).start()
+
+    def _load(self):
+        snapshot = self.catalog.snapshot
+        if snapshot.embeddings is None or not os.path.exists(self.path):
+            return
+        try:
+            table = NeighborTable.load(self.path)
+            if table.signature == catalog_signature(snapshot):
+                table.version = snapshot.version
+                self.table = table
+                logger.info(f"Loaded precomputed neighbors for {len(table.ids)} listings from {self.path}")
+            else:
+                logger.info("Persisted neighbor lists are stale for the current catalog. Rebuilding.")
+        except Exception as e:
+            logger.warning(f"Failed to load neighbor lists from {self.path}: {e}")
+
+    def rebuild(self) -> Optional[NeighborTable]:
+        """Full rebuild from the current snapshot"""
+        with self._lock:
+            snapshot = self.catalog.snapshot
+            if snapshot.embeddings is None:
+                return None
+            table = NeighborTable.build(snapshot)
+            self._install(table)
+            logger.info(f"Neighbor lists built for {len(snapshot)} listings")
+            return table
+
+    def _on_catalog_change(self, old: CatalogSnapshot, new: CatalogSnapshot):
+        if new.embeddings is None:
+            return
+        with self._lock:
+            table = self.table
+            try:
+                if table is None or table.version != old.version:
+                    self._install(NeighborTable.build(new))
+                else:
+                    changed, _ = diff_snapshots(old, new)
+                    self._install(table.updated(new, changed))
+                logger.info(f"Neighbor lists refreshed for catalog v{new.version}")
+            except Exception as e:
+                logger.error(f"Neighbor list refresh failed: {e}")
+
+    def _install(self, table: NeighborTable):
+        self.table = table
+        try:
+            table.save(self.path)
+        except Exception as e:
+            logger.warning(f"Failed to persist neighbor lists: {e}")
+
+    def lookup(self, snapshot: CatalogSnapshot, row: int) -> Optional[Dict[int, float]]:
+        table = self.table
+        return table.lookup(snapshot, row) if table is not None else None
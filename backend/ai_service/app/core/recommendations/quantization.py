@@ -0,0 +1,104 @@
+"""Quantized in-memory similarity index over catalog embeddings (float32, float16 or int8)"""
+import numpy as np
+from typing import Optional
+
+from app.config import settings
+
+MODES = ("float32", "float16", "int8")
+# Upper bound on the temporary float32 tile when scanning a quantized matrix
+MAX_BLOCK_ELEMENTS = 1 << 22
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class QuantizedIndex:
+    """
+    Row-normalized catalog embeddings held as float32, float16 or int8 for cosine scoring.
+
+    int8 uses symmetric per-row scalar quantization (`code * scale` reconstructs the row), so a
+    similarity is `scale[row] * (codes[row] . query)` computed straight from the codes. The
+    quantized scan can be followed by an exact float32 re-score of its top candidates against
+    the full-precision `source` matrix (e.g. the memory-mapped EmbeddingStore), which only
+    touches the pages of those rows.
+    """
+
+    def __init__(self, embeddings: np.ndarray, mode: str = None, source: Optional[np.ndarray] = None):
+        self.mode = mode or settings.CATALOG_SIMILARITY_DTYPE
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown similarity mode {self.mode!r}; expected one of {', '.join(MODES)}")
+        self.source = embeddings if source is None else source
+        normalized = normalize_rows(embeddings)
+        self.scales = None
+        if self.mode == "int8":
+            self.scales = np.abs(normalized).max(axis=1) / 127.0
+            self.scales[self.scales == 0] = 1.0
+            self.codes = np.rint(normalized / self.scales[:, None]).astype(np.int8)
+            self.scales = self.scales.astype(np.float32)
+        else:
+            self.codes = normalized.astype(self.mode)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Resident size of the index (codes plus per-row scales)"""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _query(self, vector: np.ndarray) -> np.ndarray:
+        return normalize_rows(np.asarray(vector).reshape(1, -1))[0]
+
+    def scan(self, vector: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of `vector` to every row, computed on the quantized form"""
+        query = self._query(vector)
+        if self.mode == "float32":
+            return self.codes @ query
+        # BLAS has no float16/int8 kernels: widen bounded tiles so the float32 copy never spans the catalog
+        out = np.empty(len(self.codes), dtype=np.float32)
+        step = max(1, MAX_BLOCK_ELEMENTS // max(self.codes.shape[1], 1))
+        for start in range(0, len(self.codes), step):
+            out[start:start + step] = self.codes[start:start + step].astype(np.float32) @ query
+        return out * self.scales if self.scales is not None else out
+
+    def rescore(self, vector: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Exact float32 cosine similarity of `vector` to `rows` of the full-precision source"""
+        # Gather in ascending row order so a memory-mapped source is read sequentially
+        order = np.argsort(rows)
+        exact = np.empty(len(rows), dtype=np.float32)
+        exact[order] = normalize_rows(self.source[rows[order]]) @ self._query(vector)
+        return exact
+
+    def similarities(self, vector: np.ndarray, rescore: int = None) -> np.ndarray:
+        """Similarity to every row; the top `rescore` rows of the scan get exact float32 scores"""
+        scores = self.scan(vector)
+        rescore = settings.CATALOG_RESCORE_CANDIDATES if rescore is None else rescore
+        if self.mode != "float32" and rescore > 0 and len(scores):
+            top = self.top_k(scores, rescore)
+            scores[top] = self.rescore(vector, top)
+        return scores
+
+    def search(self, vector: np.ndarray, k: int, rescore: int = None) -> tuple:
+        """(rows, similarities) of the `k` most similar rows, best first"""
+        scores = self.scan(vector)
+        rescore = settings.CATALOG_RESCORE_CANDIDATES if rescore is None else rescore
+        if self.mode != "float32" and rescore > 0:
+            rows = self.top_k(scores, max(k, rescore))
+            exact = self.rescore(vector, rows)
+            order = np.argsort(-exact, kind="stable")[:k]
+            return rows[order], exact[order]
+        rows = self.top_k(scores, k)
+        return rows, scores[rows]
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the `k` largest scores, best first"""
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        part = np.argpartition(-scores, k - 1)[:k]
+        return part[np.argsort(-scores[part], kind="stable")]
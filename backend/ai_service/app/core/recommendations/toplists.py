@@ -0,0 +1,95 @@
+"""Materialized "top equipment per city" ranked lists for anonymous recommendation traffic"""
+import time
+import threading
+import logging
+from typing import Callable, Dict, List, Optional, Set
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.recommendations.catalog import CatalogStore, CatalogSnapshot
+from app.core.recommendations.cache import RankedList
+
+logger = logging.getLogger(__name__)
+
+TOPLIST_HITS = metrics.counter("recommend_toplist_hits_total", "Anonymous requests served from a materialized top list")
+TOPLIST_BUILD_SECONDS = metrics.histogram("recommend_toplist_build_seconds", "Wall time to materialize all top lists")
+
+
+def toplist_key(location: Optional[str], user_role: str, category: Optional[str]) -> tuple:
+    return ((location or "").strip().lower(), user_role, (category or "").strip().lower())
+
+
+class TopListMaterializer:
+    """
+    Ranked lists per (listing location, user role, category) combination, including "any
+    location" and "any category".
+
+    `rank(snapshot, location, role, category)` is the engine's own ranking for a request with
+    no user history and no anchor item, so a materialized list is exactly what live scoring
+    would return. After each catalog swap the "any location" lists (one per role and category)
+    are rebuilt in the background; per-location lists are materialized on their first lookup,
+    and only for locations and categories that have listings, so a refresh never ranks the
+    whole location x category grid. Until the rebuild for a new catalog version finishes,
+    lookups miss and requests are scored live.
+    """
+
+    def __init__(self, catalog: CatalogStore, rank: Callable[..., RankedList], roles: List[str] = None,
+                 background: bool = True):
+        self.catalog = catalog
+        self.rank = rank
+        self.roles = roles or settings.TOPLIST_ROLES
+        self.background = background
+        self._lists: Dict[tuple, RankedList] = {}
+        self._locations: Set[str] = set()
+        self._categories: Set[str] = set()
+        self._version = None
+        self._lock = threading.Lock()
+        catalog.subscribe(self._on_catalog_change)
+        self._on_catalog_change(None, catalog.snapshot)
+
+    def _on_catalog_change(self, old: Optional[CatalogSnapshot], new: CatalogSnapshot):
+        if self.background:
+            threading.Thread(target=self.rebuild, args=(new,), daemon=True).start()
+        else:
+            self.rebuild(new)
+
+    def rebuild(self, snapshot: CatalogSnapshot = None) -> int:
+        """Materialize the "any location" lists for `snapshot` and swap the table in; returns the number of lists"""
+        snapshot = snapshot or self.catalog.snapshot
+        with self._lock:
+            if snapshot.version == self._version or snapshot is not self.catalog.snapshot:
+                return len(self._lists)  # Already current, or superseded by a newer snapshot
+            started = time.perf_counter()
+            locations = {loc.strip().lower() for loc in snapshot.vocab["location"]}
+            categories = {cat.strip().lower() for cat in snapshot.vocab["category"]}
+            lists: Dict[tuple, RankedList] = {}
+            for role in self.roles:
+                for category in [None] + sorted(categories):
+                    lists[toplist_key(None, role, category)] = self.rank(snapshot, None, role, category)
+            self._lists, self._locations, self._categories = lists, locations, categories
+            self._version = snapshot.version
+            elapsed = time.perf_counter() - started
+        TOPLIST_BUILD_SECONDS.observe(elapsed)
+        logger.info(f"Materialized {len(lists)} top lists for catalog v{snapshot.version} in {elapsed:.2f}s")
+        return len(lists)
+
+    def lookup(self, snapshot: CatalogSnapshot, location: Optional[str], user_role: str,
+               category: Optional[str]) -> Optional[RankedList]:
+        """Materialized list for the request, or None if it is not materialized for this catalog version"""
+        if self._version != snapshot.version:
+            return None
+        key = toplist_key(location, user_role, category)
+        ranked = self._lists.get(key)
+        if ranked is None:
+            location_key, _, category_key = key
+            if (user_role not in self.roles or location_key not in self._locations
+                    or (category_key and category_key not in self._categories)):
+                return None  # No listings for the combination: scored live, never materialized
+            ranked = self.rank(snapshot, location, user_role, category)
+            with self._lock:
+                if self._version != snapshot.version:
+                    return ranked
+                ranked = self._lists.setdefault(key, ranked)
+            return ranked
+        TOPLIST_HITS.inc()
+        return ranked
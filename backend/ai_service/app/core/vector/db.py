@@ -1,19 +1,59 @@
 """Hybrid Vector Database Integrations"""
 import os
+import json
 import uuid
+import hashlib
 import logging
-from typing import Dict, Any, List, Optional
+import numpy as np
+from typing import Dict, Any, List, Optional, Union
 
 try:
     import chromadb
     from qdrant_client import QdrantClient
-    from qdrant_client.models import VectorParams, Distance, PointStruct
+    from qdrant_client.models import (
+        VectorParams, Distance, PointStruct, PayloadSchemaType,
+        Filter, FieldCondition, MatchValue, MatchAny, HasIdCondition, PointIdsList
+    )
     HAS_VDB = True
 except ImportError:
     HAS_VDB = False
 
 logger = logging.getLogger(__name__)
 
+EQUIPMENT_COLLECTION = "equipment"
+# Payload fields filtered on during equipment retrieval
+EQUIPMENT_PAYLOAD_INDEXES = {
+    "location": "keyword",
+    "category": "keyword",
+    "available": "bool",
+    "verification_status": "keyword",
+}
+
+
+def equipment_point_id(equipment_id: str) -> str:
+    """Qdrant point ids must be UUIDs or integers; derive a stable UUID from the listing id"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"axent:equipment:{equipment_id}"))
+
+
+def equipment_payload(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Filterable payload stored with a listing's point"""
+    return {
+        "equipment_id": item["equipment_id"],
+        "type": item.get("type"),
+        "category": item.get("category"),
+        "location": str(item.get("location", "")).lower(),
+        "available": bool(item.get("available", False)),
+        "verification_status": item.get("verification_status", "unverified"),
+    }
+
+
+def equipment_fingerprint(item: Dict[str, Any], vector) -> str:
+    """Digest of a listing's payload and vector; a point whose stored fingerprint differs is stale"""
+    digest = hashlib.sha1(json.dumps(equipment_payload(item), sort_keys=True).encode("utf-8"))
+    digest.update(np.asarray(vector, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
 class VectorDBManager:
     """Manages connections to ChromaDB (Memory) and Qdrant (Retrieval)"""
     
@@ -45,11 +85,18 @@ class VectorDBManager:
                 
                 # Ensure collection exists for equipment
                 collections = [c.name for c in self.qdrant_client.get_collections().collections]
-                if "equipment" not in collections:
+                if EQUIPMENT_COLLECTION not in collections:
                     self.qdrant_client.create_collection(
-                        collection_name="equipment",
+                        collection_name=EQUIPMENT_COLLECTION,
                         vectors_config=VectorParams(size=384, distance=Distance.COSINE) # e5-small size
                     )
+                # Idempotent, so collections created before the indexes existed get them too
+                for field, schema in EQUIPMENT_PAYLOAD_INDEXES.items():
+                    self.qdrant_client.create_payload_index(
+                        collection_name=EQUIPMENT_COLLECTION,
+                        field_name=field,
+                        field_schema=PayloadSchemaType(schema)
+                    )
                 logger.info("Qdrant initialized for semantic retrieval.")
             except Exception as e:
                 logger.error(f"Vector DB initialization failed: {e}")
@@ -113,6 +160,109 @@ class VectorDBManager:
             logger.error(f"Failed to fetch training batch: {e}")
             return [], [], [], []
 
+    def equipment_fingerprints(self, page_size: int = 1000) -> Optional[Dict[str, str]]:
+        """{equipment_id: fingerprint} of every indexed listing, or None if Qdrant is unavailable"""
+        if not self.qdrant_client:
+            return None
+        try:
+            fingerprints, offset = {}, None
+            while True:
+                points, offset = self.qdrant_client.scroll(
+                    collection_name=EQUIPMENT_COLLECTION, limit=page_size, offset=offset,
+                    with_payload=["equipment_id", "fingerprint"], with_vectors=False
+                )
+                for point in points:
+                    fingerprints[point.payload["equipment_id"]] = point.payload.get("fingerprint")
+                if offset is None:
+                    return fingerprints
+        except Exception as e:
+            logger.error(f"Failed to scroll Qdrant equipment points: {e}")
+            return None
+
+    def upsert_equipment(self, items: List[Dict[str, Any]], vectors, batch_size: int = 256) -> bool:
+        """Upsert listing embeddings with their filterable payload into Qdrant."""
+        if not self.qdrant_client or not items:
+            return False
+        try:
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                batch_vectors = vectors[start:start + batch_size]
+                points = [
+                    PointStruct(
+                        id=equipment_point_id(item["equipment_id"]),
+                        vector=[float(v) for v in vector],
+                        payload={**equipment_payload(item), "fingerprint": equipment_fingerprint(item, vector)}
+                    )
+                    for item, vector in zip(batch, batch_vectors)
+                ]
+                self.qdrant_client.upsert(collection_name=EQUIPMENT_COLLECTION, points=points)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to upsert equipment into Qdrant: {e}")
+            return False
+
+    def delete_equipment(self, equipment_ids: List[str]) -> bool:
+        """Remove listings from the Qdrant equipment collection."""
+        if not self.qdrant_client or not equipment_ids:
+            return False
+        try:
+            self.qdrant_client.delete(
+                collection_name=EQUIPMENT_COLLECTION,
+                points_selector=PointIdsList(points=[equipment_point_id(i) for i in equipment_ids])
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete equipment from Qdrant: {e}")
+            return False
+
+    def search_equipment(
+        self,
+        vector,
+        top_k: int = 50,
+        location: Optional[Union[str, List[str]]] = None,
+        category: Optional[Union[str, List[str]]] = None,
+        available: Optional[bool] = None,
+        verification_status: Optional[str] = None,
+        exclude_ids: Optional[List[str]] = None
+    ) -> Optional[List[tuple]]:
+        """
+        Filtered approximate nearest-neighbour search over listings.
+        Returns [(equipment_id, cosine_similarity)] best first, or None if Qdrant is unavailable.
+        """
+        if not self.qdrant_client:
+            return None
+        must = []
+        # A list matches any of the given values (e.g. every catalog location containing the query)
+        if location:
+            match = MatchAny(any=[loc.lower() for loc in location]) if isinstance(location, list) else MatchValue(value=location.lower())
+            must.append(FieldCondition(key="location", match=match))
+        if category:
+            match = MatchAny(any=list(category)) if isinstance(category, list) else MatchValue(value=category)
+            must.append(FieldCondition(key="category", match=match))
+        if available is not None:
+            must.append(FieldCondition(key="available", match=MatchValue(value=available)))
+        if verification_status:
+            must.append(FieldCondition(key="verification_status", match=MatchValue(value=verification_status)))
+        must_not = [HasIdCondition(has_id=[equipment_point_id(i) for i in exclude_ids])] if exclude_ids else []
+        query_filter = Filter(must=must or None, must_not=must_not or None) if (must or must_not) else None
+
+        try:
+            query = [float(v) for v in vector]
+            if hasattr(self.qdrant_client, "query_points"):
+                hits = self.qdrant_client.query_points(
+                    collection_name=EQUIPMENT_COLLECTION, query=query, query_filter=query_filter,
+                    limit=top_k, with_payload=["equipment_id"]
+                ).points
+            else:
+                hits = self.qdrant_client.search(
+                    collection_name=EQUIPMENT_COLLECTION, query_vector=query, query_filter=query_filter,
+                    limit=top_k, with_payload=["equipment_id"]
+                )
+            return [(hit.payload["equipment_id"], float(hit.score)) for hit in hits]
+        except Exception as e:
+            logger.error(f"Qdrant equipment search failed: {e}")
+            return None
+
 # Global instance
 _vdb_manager = None
 
@@ -6,6 +6,9 @@ from typing import Dict, Any, List
 import logging
 import io
 
+from app.config import settings
+from app.core.embeddings.batcher import MicroBatcher
+
 try:
     import torch
     import open_clip
@@ -44,6 +47,11 @@ class ImageAnalyzer:
         self.device = "cuda" if torch.cuda.is_available() else "cpu" if OPENCLIP_AVAILABLE else "cpu"
         self.use_openclip = OPENCLIP_AVAILABLE
         
+        # Concurrent frames/requests share one OpenCLIP image-tower forward pass
+        self.image_batcher = MicroBatcher(
+            "openclip_image", self._encode_images, max_batch_size=settings.IMAGE_EMBEDDING_BATCH_SIZE
+        )
+
         if self.use_openclip:
             try:
                 logger.info(f"Loading OpenCLIP ViT-B-32 on {self.device}...")
@@ -141,27 +149,26 @@ class ImageAnalyzer:
         work_type_counts = {}
         total_condition = 0.0
         pooled_features = []
-        
-        for frame in frames:
-            # Extract basic embedding if using OpenCLIP
-            if self.use_openclip:
-                try:
-                    image = Image.open(io.BytesIO(frame)).convert("RGB")
-                    image_input = self.preprocess(image).unsqueeze(0).to(self.device)
-                    with torch.no_grad():
-                        feats = self.model.encode_image(image_input)
-                        feats /= feats.norm(dim=-1, keepdim=True)
-                        pooled_features.append(feats)
-                except Exception as e:
-                    logger.error(f"Failed to extract frame embedding: {e}")
+
+        # Embed every frame once, in as few batched forward passes as possible
+        frame_features = [None] * len(frames)
+        if self.use_openclip:
+            try:
+                frame_features = await self.image_batcher.submit_many(frames)
+            except Exception as e:
+                logger.error(f"Failed to extract frame embeddings: {e}")
+
+        for frame, feats in zip(frames, frame_features):
+            if feats is not None:
+                pooled_features.append(feats)
 
             # Detect equipment
-            eq_type, eq_conf = await self._detect_equipment_type(frame)
+            eq_type, eq_conf = await self._detect_equipment_type(frame, feats)
             if eq_conf > 0.6:
                 result["detected_equipment"].add(eq_type)
                 
             # Detect work type
-            wt, wt_conf = await self._detect_work_type(frame)
+            wt, wt_conf = await self._detect_work_type(frame, feats)
             if wt in work_type_counts:
                 work_type_counts[wt] += wt_conf
             else:
@@ -171,7 +178,7 @@ class ImageAnalyzer:
             total_condition += random.uniform(50, 95)
             
         if pooled_features:
-            avg_features = torch.mean(torch.cat(pooled_features, dim=0), dim=0)
+            avg_features = torch.mean(torch.stack(pooled_features), dim=0)
             result["visual_embedding"] = avg_features.cpu().numpy().tolist()
         else:
             result["visual_embedding"] = None
@@ -186,21 +193,14 @@ class ImageAnalyzer:
         result["detected_equipment"] = list(result["detected_equipment"])
         return result
 
-    async def _detect_equipment_type(self, image_bytes: bytes) -> tuple[str, float]:
+    async def _detect_equipment_type(self, image_bytes: bytes, image_features=None) -> tuple[str, float]:
         """Use OpenCLIP local model or Ollama to detect equipment type"""
         if self.use_openclip:
             try:
-                image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-                image_input = self.preprocess(image).unsqueeze(0).to(self.device)
-                
-                with torch.no_grad():
-                    image_features = self.model.encode_image(image_input)
-                    image_features /= image_features.norm(dim=-1, keepdim=True)
-                    text_probs = (100.0 * image_features @ self.eq_features.T).softmax(dim=-1)
-                    
-                best_idx = text_probs[0].argmax().item()
-                confidence = text_probs[0][best_idx].item()
-                return self.equipment_types[best_idx], round(confidence, 2)
+                if image_features is None:
+                    image_features = await self.image_batcher.submit(image_bytes)
+                if image_features is not None:
+                    return self._zero_shot(image_features, self.eq_features, self.equipment_types)
             except Exception as e:
                 logger.error(f"OpenCLIP inference error: {e}")
 
@@ -222,21 +222,14 @@ class ImageAnalyzer:
         # Ultimate fallback
         return random.choice(self.equipment_types), round(random.uniform(0.7, 0.9), 2)
 
-    async def _detect_work_type(self, image_bytes: bytes) -> tuple[str, float]:
+    async def _detect_work_type(self, image_bytes: bytes, image_features=None) -> tuple[str, float]:
         """Detect the general category of work happening in the frame using OpenCLIP."""
         if self.use_openclip:
             try:
-                image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-                image_input = self.preprocess(image).unsqueeze(0).to(self.device)
-                
-                with torch.no_grad():
-                    image_features = self.model.encode_image(image_input)
-                    image_features /= image_features.norm(dim=-1, keepdim=True)
-                    text_probs = (100.0 * image_features @ self.wt_features.T).softmax(dim=-1)
-                    
-                best_idx = text_probs[0].argmax().item()
-                confidence = text_probs[0][best_idx].item()
-                return self.work_types[best_idx], round(confidence, 2)
+                if image_features is None:
+                    image_features = await self.image_batcher.submit(image_bytes)
+                if image_features is not None:
+                    return self._zero_shot(image_features, self.wt_features, self.work_types)
             except Exception as e:
                 logger.error(f"OpenCLIP Work Type API Error: {e}")
                 
@@ -256,6 +249,34 @@ class ImageAnalyzer:
 
         return random.choice(self.work_types), round(random.uniform(0.6, 0.8), 2)
 
+    def _encode_images(self, images: List[bytes]) -> list:
+        """Batcher callback: normalized OpenCLIP features per image (None for undecodable images)"""
+        tensors, positions = [], []
+        for i, image_bytes in enumerate(images):
+            try:
+                image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+                tensors.append(self.preprocess(image))
+                positions.append(i)
+            except Exception as e:
+                logger.error(f"Failed to decode image for OpenCLIP: {e}")
+
+        results = [None] * len(images)
+        if tensors:
+            with torch.no_grad():
+                features = self.model.encode_image(torch.stack(tensors).to(self.device))
+                features /= features.norm(dim=-1, keepdim=True)
+            for i, row in zip(positions, features):
+                results[i] = row
+        return results
+
+    @staticmethod
+    def _zero_shot(image_features, text_features, labels: List[str]) -> tuple[str, float]:
+        """Best label and its softmax probability for one image embedding"""
+        with torch.no_grad():
+            text_probs = (100.0 * image_features @ text_features.T).softmax(dim=-1)
+        best_idx = text_probs.argmax().item()
+        return labels[best_idx], round(text_probs[best_idx].item(), 2)
+
     async def _ask_ollama_vision(self, image_bytes: bytes, prompt: str) -> str:
          """Ask Ollama's vision model a question about an image"""
          url = f"{self.ollama_base_url}/api/generate"
@@ -1,12 +1,14 @@
 """FastAPI main application"""
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 import logging
 
 from app.config import settings
 from app.api.v1 import estimate, recommend, forecast, vision, chat, analyzer
+from app.core.metrics import metrics
+from app.core.forecasting.fleet import get_fleet_forecaster
 
 # Configure logging
 logging.basicConfig(level=settings.LOG_LEVEL)
@@ -32,6 +34,7 @@ async def lifespan(app: FastAPI):
     
     # Cleanup on shutdown
     logger.info("🛑 Shutting down AI Service...")
+    get_fleet_forecaster().shutdown()
 
 
 # Create FastAPI app
@@ -67,6 +70,14 @@ async def health_check():
     )
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics (embedding cache, encode latency, ...)"""
+    if not settings.METRICS_ENABLED:
+        return PlainTextResponse("", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -28,13 +28,45 @@ class PriceEstimateRequest(BaseModel):
         }
 
 
+class PriceEstimateBatchRequest(BaseModel):
+    """Request model for batch price estimation"""
+    items: List[PriceEstimateRequest] = Field(..., min_length=1, max_length=5000, description="Listings to estimate (1-5000)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {
+                        "equipment_type": "tractor",
+                        "equipment_category": "agriculture",
+                        "condition": "good",
+                        "age_years": 3.5,
+                        "location": "Ludhiana, Punjab",
+                        "season": "spring"
+                    },
+                    {
+                        "equipment_type": "excavator",
+                        "equipment_category": "construction",
+                        "condition": "fair",
+                        "age_years": 8,
+                        "location": "Bengaluru"
+                    }
+                ]
+            }
+        }
+
+
 class RecommendationRequest(BaseModel):
     """Request model for equipment recommendations"""
     user_id: str = Field(..., description="User ID")
     current_equipment_id: Optional[str] = Field(None, description="Current equipment being viewed")
     user_role: str = Field(..., description="User role (customer, organization, provider)")
     location: Optional[str] = Field(None, description="User location")
+    category: Optional[str] = Field(None, description="Only recommend equipment of this category")
+    available_from: Optional[datetime] = Field(None, description="Only recommend equipment free from this time...")
+    available_to: Optional[datetime] = Field(None, description="...until this time (both bounds required)")
     limit: int = Field(10, ge=1, le=50, description="Number of recommendations")
+    cursor: Optional[str] = Field(None, description="next_cursor from the previous page (omit for the first page)")
     
     class Config:
         json_schema_extra = {
@@ -43,7 +75,79 @@ class RecommendationRequest(BaseModel):
                 "current_equipment_id": "equip_456",
                 "user_role": "customer",
                 "location": "California",
-                "limit": 10
+                "category": None,
+                "available_from": "2026-06-01T00:00:00Z",
+                "available_to": "2026-06-04T00:00:00Z",
+                "limit": 10,
+                "cursor": None
+            }
+        }
+
+
+class BatchRecommendationUser(BaseModel):
+    """One user in a batch recommendation request"""
+    user_id: str = Field(..., description="User ID")
+    user_role: str = Field("customer", description="User role (customer, organization, provider)")
+    location: Optional[str] = Field(None, description="User location")
+
+
+class RecommendationBatchRequest(BaseModel):
+    """Request model for batch recommendations (digests, notifications)"""
+    users: List[BatchRecommendationUser] = Field(..., min_length=1, max_length=5000, description="Users to recommend for (1-5000)")
+    limit: int = Field(10, ge=1, le=50, description="Number of recommendations per user")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "users": [
+                    {"user_id": "user_123", "user_role": "customer", "location": "Ludhiana, Punjab"},
+                    {"user_id": "user_456", "user_role": "organization", "location": "Bengaluru"}
+                ],
+                "limit": 5
+            }
+        }
+
+
+class CatalogChangeNotification(BaseModel):
+    """Notification that equipment listings were created, updated or deleted"""
+    equipment_ids: Optional[List[str]] = Field(None, description="Changed listing ids (omit to poll all recent changes)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "equipment_ids": ["equip_456", "equip_789"]
+            }
+        }
+
+
+class AvailabilitySearchRequest(BaseModel):
+    """Request model for listings free over a time window"""
+    available_from: datetime = Field(..., description="Window start")
+    available_to: datetime = Field(..., description="Window end (exclusive)")
+    location: Optional[str] = Field(None, description="Only listings in this location")
+    category: Optional[str] = Field(None, description="Only listings of this category")
+    limit: int = Field(100, ge=1, le=1000, description="Maximum listings returned")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "available_from": "2026-06-01T00:00:00Z",
+                "available_to": "2026-06-04T00:00:00Z",
+                "location": "Ludhiana",
+                "category": "agriculture",
+                "limit": 100
+            }
+        }
+
+
+class BookingChangeNotification(BaseModel):
+    """Notification that bookings (rentals or availability blocks) of some listings changed"""
+    equipment_ids: Optional[List[str]] = Field(None, description="Listings whose bookings changed (omit to poll all recent changes)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "equipment_ids": ["equip_456"]
             }
         }
 
@@ -66,6 +170,24 @@ class ForecastRequest(BaseModel):
         }
 
 
+class ForecastFleetRequest(BaseModel):
+    """Request model for fleet forecasting: every equipment type x region series"""
+    equipment_types: List[str] = Field(..., min_length=1, max_length=100, description="Equipment types to forecast")
+    regions: List[str] = Field(..., min_length=1, max_length=100, description="Geographic regions")
+    forecast_days: int = Field(30, ge=7, le=365, description="Number of days to forecast")
+    include_seasonality: bool = Field(True, description="Include seasonal trends")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "equipment_types": ["tractor", "excavator", "crane"],
+                "regions": ["Texas", "Punjab"],
+                "forecast_days": 90,
+                "include_seasonality": True
+            }
+        }
+
+
 class ImageAnalysisRequest(BaseModel):
     """Request model for image analysis (file upload handled separately)"""
     analyze_condition: bool = Field(True, description="Assess equipment condition")
@@ -35,6 +35,12 @@ class PriceEstimateResponse(BaseModel):
         }
 
 
+class PriceEstimateBatchResponse(BaseModel):
+    """Response model for batch price estimation"""
+    estimates: List[PriceEstimateResponse] = Field(..., description="Estimates in the same order as the request items")
+    count: int = Field(..., description="Number of estimates returned")
+
+
 class EquipmentRecommendation(BaseModel):
     """Single equipment recommendation"""
     equipment_id: str
@@ -54,6 +60,7 @@ class RecommendationResponse(BaseModel):
     recommendations: List[EquipmentRecommendation]
     total_count: int
     algorithm_used: str = Field(..., description="Recommendation algorithm")
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page; None on the last page")
     
     class Config:
         json_schema_extra = {
@@ -73,11 +80,29 @@ class RecommendationResponse(BaseModel):
                     }
                 ],
                 "total_count": 10,
-                "algorithm_used": "hybrid_collaborative_content"
+                "algorithm_used": "hybrid_collaborative_content",
+                "next_cursor": "ZjNhOWMxZDJlNGI1YTZjN2Q4ZTlmMGExOjEw"
             }
         }
 
 
+class UserRecommendations(RecommendationResponse):
+    """Recommendations for one user of a batch request"""
+    user_id: str
+
+
+class RecommendationBatchResponse(BaseModel):
+    """Response model for batch recommendations"""
+    results: List[UserRecommendations] = Field(..., description="Results in the same order as the request users")
+    count: int = Field(..., description="Number of users returned")
+
+
+class AvailabilitySearchResponse(BaseModel):
+    """Response model for an availability-window search"""
+    equipment_ids: List[str] = Field(..., description="Free listings, best heuristic score first")
+    total_count: int = Field(..., description="Free listings matching the filters before the limit")
+
+
 class ForecastDataPoint(BaseModel):
     """Single forecast data point"""
     date: str
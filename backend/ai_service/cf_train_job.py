@@ -0,0 +1,66 @@
+"""
+Offline Collaborative-Filtering Training Job for AXENT.
+Pulls implicit feedback from Supabase (non-cancelled `rentals` as bookings, `user_activity` views),
+builds a sparse user x item matrix, trains implicit ALS and writes float32 user/item factors to
+DATA_DIR/cf/model.npz. The recommendation service reloads the file when it changes and blends the
+per-user dot product into its hybrid score. Schedule it nightly via cron or a background worker.
+
+Usage:
+    python cf_train_job.py --factors 32 --iterations 10
+"""
+import os
+import time
+import logging
+import argparse
+
+from app.config import settings
+from app.core.database import get_supabase_client, get_postgrest_client
+from app.core.recommendations.collaborative import CollaborativeModel, fetch_interactions, HAS_SCIPY
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("CFTrainingJob")
+
+
+def run_cf_training(client, factors: int = 32, iterations: int = 10, regularization: float = 0.05,
+                    alpha: float = 20.0, output: str = None):
+    if not HAS_SCIPY:
+        logger.error("scipy not available. Cannot build the interaction matrix.")
+        return None
+
+    started = time.perf_counter()
+    events = fetch_interactions(client)
+    logger.info(f"Fetched {len(events)} interaction events in {time.perf_counter() - started:.2f}s")
+    if not events:
+        logger.info("No interactions yet. Nothing to train.")
+        return None
+
+    model = CollaborativeModel.train(
+        events, factors=factors, iterations=iterations, regularization=regularization, alpha=alpha
+    )
+    output = output or os.path.join(settings.DATA_DIR, settings.CF_MODEL_FILE)
+    model.save(output)
+    logger.info(f"Collaborative model written to {output} in {time.perf_counter() - started:.2f}s total")
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train implicit-ALS factors from bookings and views")
+    parser.add_argument("--factors", type=int, default=32, help="Latent factors per user/item")
+    parser.add_argument("--iterations", type=int, default=10, help="ALS sweeps")
+    parser.add_argument("--regularization", type=float, default=0.05)
+    parser.add_argument("--alpha", type=float, default=20.0, help="Confidence scaling of event weights")
+    parser.add_argument("--output", help="Model file (defaults to DATA_DIR/CF_MODEL_FILE)")
+    parser.add_argument("--postgrest-url", help="Talk to a PostgREST endpoint directly (e.g. a local stand-in)")
+    parser.add_argument("--postgrest-key", help="Optional JWT for --postgrest-url")
+    args = parser.parse_args()
+
+    client = get_postgrest_client(args.postgrest_url, args.postgrest_key) if args.postgrest_url else get_supabase_client()
+    if client is None:
+        logger.error("No Supabase/PostgREST client available. Set SUPABASE_URL and SUPABASE_SERVICE_KEY or pass --postgrest-url.")
+        return
+
+    run_cf_training(client, args.factors, args.iterations, args.regularization, args.alpha, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Nightly "Equipment Near You" Digest Job for AXENT.
+Streams every active user from the Supabase `profiles` table (or a JSONL file of
+{"user_id", "user_role", "location"} objects), scores them against the catalog in chunks with
+RecommendationEngine.recommend_batch (users grouped by location and role, one matrix per group),
+and writes the results to JSONL or Parquet as they are produced. Memory stays bounded by the
+chunk size, not by the number of users.
+
+Usage:
+    python digest_job.py --output data/jobs/digest.jsonl
+    python digest_job.py --users users.jsonl --output data/jobs/digest.parquet --limit 5
+"""
+import json
+import time
+import logging
+import argparse
+from typing import Dict, Any, Iterator
+
+from app.config import settings
+from app.core.database import get_supabase_client, get_postgrest_client
+from app.core.recommendations.hybrid import get_recommender
+from app.core.recommendations.digest import open_sink, write_results
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("DigestJob")
+
+
+def _location_text(location: Any) -> str:
+    """City (falling back to the whole value) from the profiles.location jsonb"""
+    if isinstance(location, dict):
+        return str(location.get("city") or location.get("state") or "")
+    return str(location or "")
+
+
+def users_from_profiles(client, page_size: int = None) -> Iterator[Dict[str, Any]]:
+    """Keyset-paginated stream of profiles (the table has no soft-delete column); only one page is held at a time"""
+    page_size = page_size or settings.CATALOG_PAGE_SIZE
+    last_id = None
+    while True:
+        query = client.table("profiles").select("id, role, location")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(page_size).execute().data or []
+        for row in rows:
+            yield {"user_id": str(row["id"]), "user_role": row.get("role") or "customer",
+                   "location": _location_text(row.get("location")) or None}
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1]["id"]
+
+
+def users_from_file(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def run_digest(users: Iterator[Dict[str, Any]], output: str, limit: int = 10, chunk_size: int = None) -> Dict[str, Any]:
+    recommender = get_recommender()
+    started = time.perf_counter()
+    count = write_results(recommender.recommend_batch(users, limit=limit, chunk_size=chunk_size), open_sink(output))
+    elapsed = time.perf_counter() - started
+    summary = {
+        "users": count,
+        "seconds": round(elapsed, 2),
+        "users_per_second": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "output": output,
+    }
+    logger.info(f"Digest complete: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate per-user equipment recommendation digests")
+    parser.add_argument("--output", default="data/jobs/digest.jsonl", help="Output file (.jsonl or .parquet)")
+    parser.add_argument("--users", help="JSONL file of users instead of the Supabase profiles table")
+    parser.add_argument("--limit", type=int, default=10, help="Recommendations per user")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Users scored per chunk (RECOMMEND_BATCH_CHUNK)")
+    parser.add_argument("--postgrest-url", help="Talk to a PostgREST endpoint directly (e.g. a local stand-in)")
+    parser.add_argument("--postgrest-key", help="Optional JWT for --postgrest-url")
+    args = parser.parse_args()
+
+    if args.users:
+        users = users_from_file(args.users)
+    else:
+        client = get_postgrest_client(args.postgrest_url, args.postgrest_key) if args.postgrest_url else get_supabase_client()
+        if client is None:
+            logger.error("No Supabase/PostgREST client available. Set SUPABASE_URL and SUPABASE_SERVICE_KEY, pass --postgrest-url or --users.")
+            return
+        users = users_from_profiles(client)
+
+    run_digest(users, args.output, limit=args.limit, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
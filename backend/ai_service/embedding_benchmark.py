@@ -0,0 +1,78 @@
+"""
+Catalog Embedding Quantization Benchmark for AXENT.
+Compares the similarity index modes (float32, float16, int8, each quantized mode with and without
+float32 re-scoring) on memory, per-query latency and recall@k against exact float32 search, so
+CATALOG_SIMILARITY_DTYPE / CATALOG_RESCORE_CANDIDATES can be chosen per deployment.
+
+Runs on a synthetic clustered catalog of the requested size, or with --from-store on the persisted
+catalog embeddings (DATA_DIR/embeddings). The quantized modes trade latency for memory: BLAS has
+no float16/int8 kernels, so their scans widen tiles to float32 and run several times slower than
+the float32 mode; re-scoring is exact only when the store is float32 (CATALOG_EMBEDDING_DTYPE).
+
+Usage:
+    python embedding_benchmark.py --rows 100000 --dim 384 --queries 200 --k 10
+    python embedding_benchmark.py --from-store
+"""
+import time
+import logging
+import argparse
+import numpy as np
+
+from app.core.recommendations.quantization import QuantizedIndex, normalize_rows
+from app.core.recommendations.embedding_store import EmbeddingStore
+from app.core.embeddings.text import MODEL_NAME
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("EmbeddingBenchmark")
+
+
+def synthetic_catalog(rows: int, dim: int, clusters: int = 64, seed: int = 7) -> np.ndarray:
+    """Listings scattered around a few dozen equipment "types", like real catalog embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    return normalize_rows(centers[labels] + 0.6 * rng.normal(size=(rows, dim)).astype(np.float32))
+
+
+def run_benchmark(embeddings: np.ndarray, queries: int = 200, k: int = 10, rescore: int = 100, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(len(embeddings), size=min(queries, len(embeddings)), replace=False)
+    exact = QuantizedIndex(embeddings, mode="float32")
+    truth = [set(exact.search(embeddings[r], k)[0].tolist()) for r in query_rows]
+
+    variants = [("float32", 0), ("float16", 0), ("float16", rescore), ("int8", 0), ("int8", rescore)]
+    print(f"{len(embeddings)} rows x {embeddings.shape[1]} dims, {len(query_rows)} queries, recall@{k}")
+    print(f"{'mode':<10}{'rescore':>8}{'memory MB':>12}{'p50 ms':>10}{'p95 ms':>10}{'recall':>9}")
+    for mode, top in variants:
+        index = exact if mode == "float32" else QuantizedIndex(embeddings, mode=mode)
+        latencies, hits = [], 0
+        for row, expected in zip(query_rows, truth):
+            started = time.perf_counter()
+            found, _ = index.search(embeddings[row], k, rescore=top)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            hits += len(expected.intersection(found.tolist()))
+        p50, p95 = np.percentile(latencies, [50, 95])
+        recall = hits / (k * len(query_rows))
+        print(f"{mode:<10}{top:>8}{index.nbytes / 1e6:>12.1f}{p50:>10.2f}{p95:>10.2f}{recall:>9.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark quantized catalog similarity modes")
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic catalog size")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (multilingual-e5-small: 384)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, default=100, help="Candidates re-scored in float32")
+    parser.add_argument("--from-store", action="store_true", help="Use the persisted catalog embeddings")
+    args = parser.parse_args()
+
+    matrix = None
+    if args.from_store:
+        store = EmbeddingStore(model_name=MODEL_NAME)
+        if store.matrix is None:
+            logger.warning("No persisted catalog embeddings found. Using a synthetic catalog.")
+        else:
+            matrix = np.asarray(store.matrix, dtype=np.float32)
+    if matrix is None:
+        matrix = synthetic_catalog(args.rows, args.dim)
+    run_benchmark(matrix, queries=args.queries, k=args.k, rescore=args.rescore)
@@ -0,0 +1,59 @@
+"""
+Booking History Ingestion Job for AXENT.
+Pulls booking events (`rentals` joined to their equipment's type and location) created since the
+last run from Supabase, a local PostgREST/SQLite stand-in or a CSV/JSONL export, rolls only those
+events into daily counts per (equipment type, region) and appends them to DATA_DIR/HISTORY_DIR as
+one new Parquet partition. DemandForecaster fits on these counts (reading only the tail it needs)
+and refits when a new partition lands. Schedule it hourly or nightly via cron.
+
+Usage:
+    python history_ingest_job.py
+    python history_ingest_job.py --sqlite data/standin.db
+    python history_ingest_job.py --events bookings.csv --compact
+"""
+import time
+import logging
+import argparse
+
+from app.core.database import get_supabase_client, get_postgrest_client
+from app.core.forecasting.history import BookingHistoryStore, ingest, HAS_PYARROW
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("HistoryIngestJob")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll new booking events into daily history partitions")
+    parser.add_argument("--sqlite", help="SQLite stand-in with rentals and equipment tables")
+    parser.add_argument("--events", help="CSV/JSONL export of events (created_at, equipment_type, region)")
+    parser.add_argument("--root", help="History directory (defaults to DATA_DIR/HISTORY_DIR)")
+    parser.add_argument("--compact", action="store_true", help="Merge all partitions into one after ingesting")
+    parser.add_argument("--postgrest-url", help="Talk to a PostgREST endpoint directly (e.g. a local stand-in)")
+    parser.add_argument("--postgrest-key", help="Optional JWT for --postgrest-url")
+    args = parser.parse_args()
+
+    if not HAS_PYARROW:
+        logger.error("pyarrow not available. Cannot write history partitions.")
+        return
+
+    store = BookingHistoryStore(args.root)
+    started = time.perf_counter()
+    if args.sqlite:
+        summary = ingest(store, "sqlite", path=args.sqlite)
+    elif args.events:
+        summary = ingest(store, "file", path=args.events)
+    else:
+        client = get_postgrest_client(args.postgrest_url, args.postgrest_key) if args.postgrest_url else get_supabase_client()
+        if client is None:
+            logger.error("No Supabase/PostgREST client available. Set SUPABASE_URL and SUPABASE_SERVICE_KEY, pass --postgrest-url, --sqlite or --events.")
+            return
+        summary = ingest(store, "supabase", client=client)
+    logger.info(f"Ingested {summary} in {time.perf_counter() - started:.2f}s")
+
+    if args.compact:
+        merged = store.compact()
+        logger.info(f"Compacted {merged} partitions (history v{store.version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Offline Neighbor Precompute Job for AXENT.
+Builds the top-N "similar equipment" list for every listing with a blocked matrix multiply over the
+catalog embeddings (same-type neighbors get a ranking boost) and writes the compact table to
+DATA_DIR/neighbors/catalog_neighbors.npz. The recommendation service loads that file on startup when
+it still matches the catalog, and keeps it current incrementally as listings change.
+
+Usage:
+    python neighbors_job.py
+"""
+import time
+import logging
+
+from app.core.database import get_supabase_client
+from app.core.recommendations.catalog import CatalogStore
+from app.core.recommendations.embedding_store import EmbeddingStore
+from app.core.recommendations.neighbors import NeighborIndex
+from app.core.embeddings.text import get_text_embedder, MODEL_NAME
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("NeighborJob")
+
+
+def run_neighbor_precompute():
+    model = get_text_embedder()
+    if not model.available:
+        logger.error("sentence-transformers not available. Cannot embed the catalog.")
+        return
+
+    embedding_store = EmbeddingStore(model_name=MODEL_NAME)
+    catalog = CatalogStore(get_supabase_client(), encoder=model, embedding_store=embedding_store)
+
+    started = time.perf_counter()
+    table = NeighborIndex(catalog, background=False).rebuild()
+    if table is None:
+        logger.error("Catalog has no embeddings. Nothing to precompute.")
+        return
+    logger.info(f"Precomputed {table.neighbors.shape[1]} neighbors for {len(table.ids)} listings "
+                f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    run_neighbor_precompute()
@@ -0,0 +1,210 @@
+"""
+Bulk Fleet Repricing Job for AXENT.
+Streams every listing in the Supabase `equipment` table with keyset pagination, computes fresh
+fair-market price bands with the vectorized PriceEstimator one page at a time, and writes them
+back with one batched upsert per page.
+
+The job is resumable: the last committed equipment id is checkpointed under DATA_DIR after every
+page, and a rerun continues from there. Bands are upserted into `equipment_price_bands`
+(see setup_database.sql).
+
+Usage:
+    python reprice_job.py                                  # Supabase from SUPABASE_URL / SUPABASE_SERVICE_KEY
+    python reprice_job.py --postgrest-url http://localhost:3000   # local PostgREST stand-in
+"""
+import os
+import json
+import time
+import logging
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from app.config import settings
+from app.core.database import get_supabase_client, get_postgrest_client
+from app.core.pricing.estimator import get_estimator
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("RepricingJob")
+
+SOURCE_COLUMNS = "id, type, category, location, specifications"
+DEFAULT_CHECKPOINT = os.path.join(settings.DATA_DIR, "jobs", "reprice_checkpoint.json")
+
+
+def _current_season(now: datetime) -> str:
+    month = now.month
+    if month in [3, 4, 5]:
+        return "spring"
+    elif month in [6, 7, 8]:
+        return "summer"
+    elif month in [9, 10, 11]:
+        return "fall"
+    return "winter"
+
+
+def _age_years(specifications: Any, year_now: int) -> float:
+    """Age from `specifications.age_years` or `specifications.year`, defaulting to new"""
+    if not isinstance(specifications, dict):
+        return 0.0
+    try:
+        if specifications.get("age_years") is not None:
+            return max(0.0, float(specifications["age_years"]))
+        if specifications.get("year"):
+            return float(max(0, year_now - int(specifications["year"])))
+    except (TypeError, ValueError):
+        pass
+    return 0.0
+
+
+def _condition(specifications: Any) -> str:
+    """Condition from `specifications.condition` (equipment has no condition column), defaulting to good"""
+    if isinstance(specifications, dict) and specifications.get("condition"):
+        return str(specifications["condition"])
+    return "good"
+
+
+def _location_text(location: Any) -> str:
+    """Flatten the jsonb location so the region matcher sees city, district, state and pin code"""
+    if isinstance(location, dict):
+        parts = [location.get(k) for k in ("address", "city", "district", "state", "pincode", "pin_code")]
+        return ", ".join(str(p) for p in parts if p)
+    return str(location or "")
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    """Write the checkpoint atomically so a crash never leaves a torn file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def fetch_page(client, last_id: Optional[str], page_size: int) -> List[Dict[str, Any]]:
+    """Keyset pagination: rows strictly after `last_id` in primary-key order"""
+    query = client.table("equipment").select(SOURCE_COLUMNS).is_("deleted_at", "null")
+    if last_id is not None:
+        query = query.gt("id", last_id)
+    return query.order("id").limit(page_size).execute().data or []
+
+
+def price_page(estimator, rows: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+    """Compute bands for a whole page with one vectorized estimator call"""
+    season = _current_season(now)
+    estimates = estimator.estimate_many(
+        equipment_types=[str(r.get("type") or "unknown") for r in rows],
+        conditions=[_condition(r.get("specifications")) for r in rows],
+        age_years=[_age_years(r.get("specifications"), now.year) for r in rows],
+        locations=[_location_text(r.get("location")) for r in rows],
+        seasons=[season] * len(rows),
+        equipment_categories=[r.get("category") for r in rows]
+    )
+    computed_at = now.isoformat()
+    return [
+        {
+            "equipment_id": str(row["id"]),
+            "currency": est["currency"],
+            "fair_market_band_min": est["fair_market_band_min"],
+            "fair_market_band_max": est["fair_market_band_max"],
+            "recommended_hourly_rate": est["recommended_hourly_rate"],
+            "confidence_score": est["confidence_score"],
+            "market_trend": est["market_trend"],
+            "computed_at": computed_at,
+        }
+        for row, est in zip(rows, estimates)
+    ]
+
+
+def run_repricing(client, page_size: int = 1000, target_table: str = "equipment_price_bands",
+                  checkpoint_path: str = DEFAULT_CHECKPOINT, reset: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+    """Reprice the whole fleet, resuming from the checkpoint unless `reset` is set"""
+    estimator = get_estimator()
+    checkpoint = {} if reset else load_checkpoint(checkpoint_path)
+    last_id = checkpoint.get("last_id")
+    rows_done = int(checkpoint.get("rows_done", 0))
+    if last_id:
+        logger.info(f"Resuming from checkpoint after id {last_id} ({rows_done} rows already repriced).")
+
+    started = time.perf_counter()
+    rows_this_run = 0
+    while True:
+        page_started = time.perf_counter()
+        rows = fetch_page(client, last_id, page_size)
+        if not rows:
+            break
+
+        bands = price_page(estimator, rows, datetime.now(timezone.utc))
+        if not dry_run:
+            client.table(target_table).upsert(bands, on_conflict="equipment_id").execute()
+
+        # Only advance the checkpoint once the page is durably written
+        last_id = str(rows[-1]["id"])
+        rows_done += len(rows)
+        rows_this_run += len(rows)
+        if not dry_run:
+            save_checkpoint(checkpoint_path, {"last_id": last_id, "rows_done": rows_done})
+
+        page_elapsed = time.perf_counter() - page_started
+        total_elapsed = time.perf_counter() - started
+        logger.info(
+            f"Repriced {len(rows)} rows in {page_elapsed:.2f}s "
+            f"({len(rows) / max(page_elapsed, 1e-9):.0f} rows/s page, "
+            f"{rows_this_run / max(total_elapsed, 1e-9):.0f} rows/s overall, {rows_done} total)"
+        )
+        if len(rows) < page_size:
+            break
+
+    elapsed = time.perf_counter() - started
+    if not dry_run and os.path.exists(checkpoint_path):
+        # Full pass finished; the next run starts from the beginning
+        os.remove(checkpoint_path)
+
+    summary = {
+        "rows": rows_this_run,
+        "rows_total": rows_done,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows_this_run / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    logger.info(f"Repricing complete: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute fair-market price bands for every equipment listing")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows fetched, priced and upserted per round trip")
+    parser.add_argument("--target-table", default="equipment_price_bands", help="Table receiving the upserted bands")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file used to resume")
+    parser.add_argument("--reset", action="store_true", help="Ignore any checkpoint and start from the first row")
+    parser.add_argument("--dry-run", action="store_true", help="Price rows without writing bands or checkpoints")
+    parser.add_argument("--postgrest-url", help="Talk to a PostgREST endpoint directly (e.g. a local stand-in)")
+    parser.add_argument("--postgrest-key", help="Optional JWT for --postgrest-url")
+    args = parser.parse_args()
+
+    if args.postgrest_url:
+        client = get_postgrest_client(args.postgrest_url, args.postgrest_key)
+    else:
+        client = get_supabase_client()
+    if client is None:
+        logger.error("No Supabase/PostgREST client available. Set SUPABASE_URL and SUPABASE_SERVICE_KEY or pass --postgrest-url.")
+        return
+
+    run_repricing(
+        client,
+        page_size=args.page_size,
+        target_table=args.target_table,
+        checkpoint_path=args.checkpoint,
+        reset=args.reset,
+        dry_run=args.dry_run
+    )
+
+
+if __name__ == "__main__":
+    main()
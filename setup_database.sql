@@ -149,6 +149,18 @@ end;
 $$;
 create trigger ensure_no_overlap before insert or update on public.equipment_availability for each row execute function prevent_double_booking();
 
+-- Fair-market price bands, written in bulk by the AI service's reprice_job.py
+create table public.equipment_price_bands (
+  equipment_id uuid primary key references public.equipment(id) on delete cascade,
+  currency text not null default 'INR',
+  fair_market_band_min numeric not null,
+  fair_market_band_max numeric not null,
+  recommended_hourly_rate numeric not null,
+  confidence_score numeric not null,
+  market_trend text not null,
+  computed_at timestamp with time zone not null default now()
+);
+
 -- Auto-Expiry / State Machine Logic
 create extension if not exists pg_cron;
 
@@ -542,6 +554,7 @@ alter table public.organizations enable row level security;
 alter table public.organization_members enable row level security;
 alter table public.equipment enable row level security;
 alter table public.equipment_availability enable row level security;
+alter table public.equipment_price_bands enable row level security;
 alter table public.projects enable row level security;
 alter table public.bids enable row level security;
 alter table public.rentals enable row level security;